@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+"""
+This runs slow work (loading the report, counting genres, binning ratings) on a worker thread so the Tk
+window never freezes. Tk widgets may only be touched from the main thread, so the worker never calls back
+into Tk directly: progress messages and results go through a queue that the main loop polls with after().
+Every job has a slot; submitting a new job into a busy slot cancels the one that was still running there.
+"""
+
+# Raised inside a job when it notices that it was cancelled.
+class Cancelled(Exception):
+    pass
+
+# The token handed to every job, used to report progress and to notice cancellation.
+class JobToken:
+    def __init__(self, runner, job_id):
+        self._runner = runner
+        self.job_id = job_id
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    # Function for the job to call between steps; stops the job if it was cancelled
+    def check(self):
+        if self._cancelled.is_set():
+            raise Cancelled()
+
+    # Function for the job to report progress, shown by the main loop on its next poll
+    def report(self, message, fraction=None):
+        self.check()
+        self._runner._events.put(('progress', self.job_id, (message, fraction)))
+
+# The runner owns the worker pool and the polling on the Tk side.
+class BackgroundRunner:
+    def __init__(self, root, max_workers=2, poll_ms=50):
+        self.root = root
+        self.poll_ms = poll_ms
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='datamax')
+        self._events = queue.Queue()
+        self._jobs = {}      # job id -> (slot, token, future, callbacks)
+        self._slots = {}     # slot -> job id currently running there
+        self._next_id = 0
+        self._polling = False
+
+    # Function to start job(token, *args) on the worker; the callbacks always run on the Tk main thread
+    def submit(self, slot, job, *args, on_done=None, on_error=None, on_progress=None):
+        self.cancel(slot)
+
+        self._next_id += 1
+        job_id = self._next_id
+        token = JobToken(self, job_id)
+        future = self._executor.submit(self._run, token, job, args)
+        self._jobs[job_id] = (slot, token, future, (on_done, on_error, on_progress))
+        self._slots[slot] = job_id
+        self._schedule_poll()
+        return token
+
+    # Function to cancel whatever is running in a slot; its result is thrown away even if it finishes
+    def cancel(self, slot):
+        job_id = self._slots.pop(slot, None)
+        if job_id is None:
+            return
+        _, token, future, _ = self._jobs.pop(job_id)
+        token.cancel()
+        future.cancel()  # only works if it has not started yet; otherwise the token stops it
+
+    # Function to tell whether a slot has a job in flight
+    def busy(self, slot):
+        return slot in self._slots
+
+    def shutdown(self):
+        for slot in list(self._slots):
+            self.cancel(slot)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    # Function that runs on the worker thread and only ever talks to the queue
+    def _run(self, token, job, args):
+        try:
+            result = job(token, *args)
+        except Cancelled:
+            return
+        except Exception as e:
+            self._events.put(('error', token.job_id, e))
+            return
+        self._events.put(('done', token.job_id, result))
+
+    def _schedule_poll(self):
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.poll_ms, self._poll)
+
+    # Function that runs on the Tk main loop and hands queued events to the callbacks
+    def _poll(self):
+        while True:
+            try:
+                kind, job_id, payload = self._events.get_nowait()
+            except queue.Empty:
+                break
+
+            entry = self._jobs.get(job_id)
+            if entry is None:
+                continue  # the job was cancelled, drop whatever it sent
+            slot, token, _, (on_done, on_error, on_progress) = entry
+
+            if kind == 'progress':
+                if on_progress:
+                    on_progress(*payload)
+                continue
+
+            del self._jobs[job_id]
+            if self._slots.get(slot) == job_id:
+                del self._slots[slot]
+            callback = on_done if kind == 'done' else on_error
+            if callback:
+                callback(payload)
+
+        self._polling = bool(self._jobs)
+        if self._polling:
+            self.root.after(self.poll_ms, self._poll)
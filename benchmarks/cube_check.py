@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+import os
+import sys
+import tempfile
+import pandas as pd
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from charts import CUBE_CHARTS
+from cube import AggregateCube, load_or_build_cube
+from export_charts import build_aggregates
+from report_writer import write_report
+
+"""
+This checks the aggregate cube (cube.py) on the catalogs that used to break it: ratings outside 0..10,
+which must count as missing instead of spilling into the type and year of other cells, and a top picks
+report without a single title, which must give an empty cube that every chart (and datamax export) can
+still be drawn from. It needs no data files; the catalogs are built here.
+"""
+
+# Function to build a small catalog with the given ratings, one title per rating
+def make_catalog(ratings, types):
+    return pd.DataFrame({
+        'title': [f'Title {i}' for i in range(len(ratings))],
+        'type': types,
+        'genres': ['Drama, Crime'] * len(ratings),
+        'releaseYear': [2000 + i % 3 for i in range(len(ratings))],
+        'imdbAverageRating': ratings,
+        'availableCountries': ['US, SE'] * len(ratings),
+    })
+
+def main():
+    # Out-of-range ratings are missing ratings: they are counted, but in no rating bucket and no mean
+    data = make_catalog([9.2, 11.0, -1.0, 9.2, 7.0], ['movie', 'movie', 'movie', 'tv', 'tv'])
+    cube = AggregateCube.from_frame(data)
+    by_type = cube.rollup('type')
+    assert by_type['titles'].to_dict() == {'movie': 3, 'tv': 2}, by_type
+    assert by_type['mean_rating'].round(6).to_dict() == {'movie': 9.2, 'tv': 8.1}, by_type
+    by_rating = cube.rollup('rating', type='movie')
+    rated = by_rating[by_rating.index.notna()]
+    assert rated['titles'].to_dict() == {9.2: 1} and by_rating['titles'].sum() == 3, by_rating
+    assert cube.rollup((), rating_above=9)['titles'].iloc[0] == 2
+    print("ratings outside 0..10 were counted as missing")
+
+    # A report without titles gives an empty cube, and the charts and export still work
+    with tempfile.TemporaryDirectory() as workdir:
+        report_file = os.path.join(workdir, 'empty.txt')
+        write_report(make_catalog([], [])[['title', 'genres', 'releaseYear', 'imdbAverageRating', 'availableCountries']], report_file)
+        cube = load_or_build_cube(report_file)
+        assert len(cube) == 0 and len(load_or_build_cube(report_file)) == 0
+        for name, aggregate in CUBE_CHARTS.items():
+            aggregate(cube)
+        build_aggregates(cube, ['US'], all_countries=True)
+    print("an empty report gave an empty cube the charts can be drawn from")
+    print("all cube checks passed")
+
+if __name__ == "__main__":
+    main()
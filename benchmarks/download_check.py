@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+import argparse
+import hashlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from downloader import HttpSource, dataset_folder, download_all, download_dataset, save_manifest
+
+"""
+This runs downloader.py against a local stand-in for the Kaggle server, without network access. The server
+hands out zip archives of synthetic data.csv files with an ETag and a SHA-256 header, honours Range requests,
+and can cut a download off halfway. The check goes through the cases the downloader has to get right:
+several datasets at once, resuming a cut-off download, skipping an unchanged dataset, picking up a new
+version, refusing a corrupted archive, finishing a .part that is already complete without a request,
+not resuming a .part left by an older version, starting over when the server answers a Range request with 416 or with the wrong bytes, and not sending
+the credentials on to the host a download is redirected to. It also prints how long the concurrent
+download took.
+"""
+
+# Function to build an in-memory zip holding one data.csv of roughly the given size
+def make_archive(rows, version):
+    text = io.StringIO()
+    text.write("title,type,genres,releaseYear,imdbId,imdbAverageRating,imdbNumVotes,availableCountries\n")
+    for i in range(rows):
+        text.write(f'Title {i} v{version},movie,"Drama, Comedy",{1950 + i % 70},tt{i:07d},{5 + i % 50 / 10},{i * 7},"US, SE"\n')
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, 'w', zipfile.ZIP_DEFLATED) as zipped:
+        zipped.writestr('data.csv', text.getvalue())
+        zipped.writestr('README.txt', 'synthetic catalog\n')
+    return archive.getvalue()
+
+# The stand-in server: GET/HEAD /<id>.zip with ETag, Content-Length, X-Checksum-Sha256 and Range support.
+# /api/<id>.zip redirects to the same archive on another host name (localhost), like Kaggle's signed URLs.
+class ArchiveServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), ArchiveHandler)
+        self.archives = {}
+        self.cut_after = None
+        self.corrupt = False
+        self.refuse_ranges = False
+        self.range_shift = 0
+        self.requests = []
+
+    def publish(self, dataset_id, payload, version):
+        self.archives[dataset_id] = (payload, f'"{version}"', hashlib.sha256(payload).hexdigest())
+
+class ArchiveHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def lookup(self):
+        name = self.path.lstrip('/')
+        if name.startswith('api/'):
+            self.send_response(302)
+            self.send_header('Location', f'http://localhost:{self.server.server_port}/{name[4:]}')
+            self.end_headers()
+            return None
+        entry = self.server.archives.get(name[:-4]) if name.endswith('.zip') else None
+        if entry is None:
+            self.send_error(404)
+        return entry
+
+    def send_headers(self, payload, etag, digest, start=0):
+        self.send_response(206 if start else 200)
+        self.send_header('ETag', etag)
+        self.send_header('X-Checksum-Sha256', digest)
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('Content-Length', str(len(payload) - start))
+        if start:
+            self.send_header('Content-Range', f'bytes {start}-{len(payload) - 1}/{len(payload)}')
+        self.end_headers()
+
+    def do_HEAD(self):
+        entry = self.lookup()
+        if entry:
+            self.send_headers(*entry)
+
+    def do_GET(self):
+        entry = self.lookup()
+        if not entry:
+            return
+        payload, etag, digest = entry
+        start = 0
+        if self.headers.get('Range', '').startswith('bytes='):
+            start = int(self.headers['Range'][6:].split('-')[0])
+        self.server.requests.append((self.path, start, self.headers.get('Authorization'), self.headers.get('If-Range')))
+        if start and self.headers.get('If-Range', etag) != etag:
+            # The archive changed since the client's copy was started: send all of it (RFC 9110 If-Range)
+            start = 0
+        if start and (self.server.refuse_ranges or start >= len(payload)):
+            self.send_response(416)
+            self.send_header('Content-Range', f'bytes */{len(payload)}')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        # A broken server may answer a Range request from another byte (with a Content-Range saying so)
+        start = max(0, start - self.server.range_shift) if start else 0
+        self.send_headers(payload, etag, digest, start)
+        body = payload[start:]
+        if self.server.corrupt:
+            body = body[:-1] + bytes([body[-1] ^ 0xFF])
+        if self.server.cut_after is not None:
+            # Send part of the body and drop the connection, like a network failure halfway through
+            self.wfile.write(body[:self.server.cut_after])
+            self.wfile.flush()
+            self.close_connection = True
+            self.connection.shutdown(2)
+            return
+        self.wfile.write(body)
+
+# Function to leave a .part file behind for a dataset, as an interrupted run of that version would
+def leave_part(dest, dataset_id, data, version):
+    folder = dataset_folder(dest, dataset_id)
+    os.makedirs(folder, exist_ok=True)
+    with open(os.path.join(folder, 'archive.zip.part'), 'wb') as file:
+        file.write(data)
+    save_manifest(folder, {'partial_version': f'"{version}"'})
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the downloader against a local stand-in server")
+    parser.add_argument('--datasets', type=int, default=4)
+    parser.add_argument('--rows', type=int, default=50_000, help="rows per synthetic data.csv")
+    args = parser.parse_args()
+
+    server = ArchiveServer()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    source = HttpSource(f'http://127.0.0.1:{server.server_port}')
+    dest = tempfile.mkdtemp(prefix='download_check_')
+    ids = [f'owner/dataset-{i}' for i in range(args.datasets)]
+    for dataset_id in ids:
+        server.publish(dataset_id, make_archive(args.rows, 1), 'v1')
+
+    try:
+        # A download cut off halfway leaves a .part file, which the next run resumes with a Range request
+        server.cut_after = len(server.archives[ids[0]][0]) // 2
+        try:
+            download_dataset(source, ids[0], dest)
+            raise AssertionError("a cut off download should fail")
+        except OSError:
+            pass
+        server.cut_after = None
+
+        start = time.perf_counter()
+        results = download_all(source, ids, dest, workers=args.datasets)
+        elapsed = time.perf_counter() - start
+        statuses = {result['dataset']: result['status'] for result in results}
+        assert statuses[ids[0]] == 'resumed', results[0]
+        assert results[0]['resumed_from'] > 0
+        assert any(start and if_range == '"v1"' for _, start, _, if_range in server.requests), server.requests
+        assert all(statuses[dataset_id] == 'downloaded' for dataset_id in ids[1:]), statuses
+        total = sum(result['downloaded_bytes'] for result in results)
+        print(f"{len(ids)} datasets, {total / 1e6:.1f} MB in {elapsed:.2f}s (first one resumed from byte {results[0]['resumed_from']})")
+
+        # Nothing is fetched again while the ETag stays the same
+        server.requests.clear()
+        assert all(result['status'] == 'unchanged' for result in download_all(source, ids, dest))
+        assert not server.requests, server.requests
+        print("unchanged datasets were skipped without a download")
+
+        # A new version is downloaded and only the changed file is extracted again
+        server.publish(ids[1], make_archive(args.rows, 2), 'v2')
+        result = download_dataset(source, ids[1], dest)
+        assert result['status'] == 'downloaded' and result['extracted'] == ['data.csv'], result
+        print("a new version re-extracted only the changed file")
+
+        # A corrupted archive is refused and the old files stay in place
+        server.publish(ids[2], make_archive(args.rows, 3), 'v3')
+        server.corrupt = True
+        result = download_all(source, [ids[2]], dest)[0]
+        assert result['status'] == 'failed' and 'ChecksumError' in result['error'], result
+        server.corrupt = False
+        print("a corrupted archive was refused")
+
+        # A .part file that already holds every byte is checked and used without another request
+        payload = make_archive(args.rows, 4)
+        server.publish(ids[3], payload, 'v4')
+        leave_part(dest, ids[3], payload, 'v4')
+        server.requests.clear()
+        result = download_dataset(source, ids[3], dest)
+        assert result['status'] == 'resumed' and result['downloaded_bytes'] == 0, result
+        assert not server.requests, server.requests
+        print("a complete .part file was used without a request")
+
+        # A .part left by an older version is not resumed against the new archive
+        old = make_archive(args.rows, 7)
+        leave_part(dest, ids[3], old[:len(old) // 2], 'v7')
+        payload = make_archive(args.rows, 8)
+        server.publish(ids[3], payload, 'v8')
+        server.requests.clear()
+        result = download_dataset(source, ids[3], dest)
+        assert result['status'] == 'downloaded' and result['downloaded_bytes'] == len(payload), result
+        assert all(start == 0 for _, start, _, _ in server.requests), server.requests
+        print("a .part from an older version was downloaded again from the start")
+
+        # A 416 answer to the Range request, or bytes from the wrong offset, restart the download from byte 0
+        for setting, value in (('refuse_ranges', True), ('range_shift', 1000)):
+            payload = make_archive(args.rows, 5)
+            server.publish(ids[3], payload, setting)
+            leave_part(dest, ids[3], payload[:len(payload) // 2], setting)
+            setattr(server, setting, value)
+            result = download_dataset(source, ids[3], dest)
+            setattr(server, setting, type(value)())
+            assert result['status'] == 'downloaded' and result['downloaded_bytes'] == len(payload), result
+        print("a refused or misplaced Range request restarted the download")
+
+        # Credentials go to the API host only, not to the host it redirects the download to
+        server.publish(ids[0], make_archive(args.rows, 6), 'v6')
+        server.requests.clear()
+        api = HttpSource(f'http://127.0.0.1:{server.server_port}/api', headers={'Authorization': 'Basic secret'})
+        result = download_dataset(api, ids[0], dest)
+        assert result['status'] == 'downloaded', result
+        assert server.requests and all(auth is None for _, _, auth, _ in server.requests), server.requests
+        print("the redirected download was fetched without the credentials")
+    finally:
+        server.shutdown()
+        shutil.rmtree(dest)
+    print("all download checks passed")
+
+if __name__ == "__main__":
+    main()
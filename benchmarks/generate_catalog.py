@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+import argparse
+import os
+import numpy as np
+import pandas as pd
+
+"""
+This generates synthetic catalogs with the same schema as the Kaggle HBO Max data.csv, from ten thousand to
+ten million rows, so the pipeline can be measured at sizes the real 5.7k row file never reaches. Genre
+combinations and country lists are sampled from the real file when it is available (so the lists have the
+same lengths and regional bundles); ratings, votes, years and the share of missing values follow the shape
+of the real data. Rows are generated and written in chunks, so memory use does not depend on the size.
+"""
+
+SEED_DATA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'maxTopic', 'data.csv')
+COLUMNS = ['title', 'type', 'genres', 'releaseYear', 'imdbId', 'imdbAverageRating', 'imdbNumVotes', 'availableCountries']
+CHUNK_ROWS = 200_000
+
+# Used when the real data.csv is not around to sample from.
+FALLBACK_GENRES = ['Drama', 'Comedy', 'Documentary', 'Action', 'Animation', 'Crime', 'Adventure', 'Romance',
+                   'Thriller', 'Family', 'Horror', 'Mystery', 'Fantasy', 'Sci-Fi', 'Reality-TV', 'Biography',
+                   'Music', 'History', 'Sport', 'War', 'Western', 'Musical', 'Short', 'Talk-Show', 'News']
+FALLBACK_REGIONS = [
+    'AG, AR, BB, BO, BR, BS, BZ, CL, CO, CR, DO, EC, GT, GY, HN, JM, LC, MX, NI, PA, PE, PY, SV, TC, TT, UY, VE',
+    'DK, FI, NO, SE',
+    'AD, BE, ES, FR, MC, NL, PT',
+    'BA, BG, CZ, HR, HU, MD, ME, MK, PL, RO, RS, SI, SK',
+    'US',
+]
+WORDS = ['The', 'Last', 'Night', 'City', 'Blue', 'House', 'Dragon', 'Silent', 'River', 'Lost', 'Game', 'Empire',
+         'Summer', 'Secret', 'Road', 'Iron', 'Wild', 'Heart', 'Shadow', 'Kings', 'Of', 'Little', 'Star', 'War',
+         'Love', 'Girls', 'Dark', 'Gold', 'Winter', 'Story', 'Island', 'Ghost', 'Garden', 'Storm', 'Murder']
+
+# Function to collect the value frequencies of a comma separated column from the real data
+def empirical(column, fallback):
+    if os.path.exists(SEED_DATA):
+        counts = pd.read_csv(SEED_DATA, usecols=[column])[column].dropna().value_counts()
+        return counts.index.to_numpy(dtype=object), (counts / counts.sum()).to_numpy()
+    values = np.array(fallback, dtype=object)
+    return values, np.full(len(values), 1 / len(values))
+
+# Function to generate one chunk of rows
+def generate_chunk(rng, start, rows, genres, regions):
+    genre_values, genre_weights = genres
+    region_values, region_weights = regions
+
+    words = rng.choice(np.array(WORDS, dtype=object), size=(rows, 3))
+    lengths = rng.integers(1, 4, size=rows)
+    titles = np.array([' '.join(w[:n]) for w, n in zip(words, lengths)], dtype=object)
+    titles = titles + np.char.mod(' %d', np.arange(start, start + rows)).astype(object)
+
+    # Ratings and votes follow the real file: ratings around 6.7, votes heavy tailed, ~7% of both missing.
+    ratings = np.clip(rng.normal(6.65, 1.05, size=rows), 1.0, 10.0).round(1)
+    votes = np.floor(rng.lognormal(mean=7.8, sigma=2.6, size=rows)).clip(5, 3_000_000)
+    unrated = rng.random(rows) < 0.074
+    ratings[unrated] = np.nan
+    votes[unrated] = np.nan
+
+    # Release years lean heavily towards recent titles.
+    years = (2025 - np.floor(rng.gamma(shape=1.1, scale=9.0, size=rows))).clip(1903, 2025)
+    years[rng.random(rows) < 0.003] = np.nan
+
+    chunk = pd.DataFrame({
+        'title': titles,
+        'type': np.where(rng.random(rows) < 0.64, 'movie', 'tv'),
+        'genres': rng.choice(genre_values, size=rows, p=genre_weights),
+        'releaseYear': pd.array(years, dtype='Int64'),
+        'imdbId': np.char.mod('tt%08d', np.arange(start, start + rows) + 10_000_000),
+        'imdbAverageRating': ratings,
+        'imdbNumVotes': pd.array(votes, dtype='Int64'),
+        'availableCountries': rng.choice(region_values, size=rows, p=region_weights),
+    }, columns=COLUMNS)
+    chunk.loc[rng.random(rows) < 0.022, 'genres'] = np.nan
+    return chunk
+
+# Function to write a synthetic catalog with the given number of rows
+def generate_catalog(path, rows, seed=0):
+    rng = np.random.default_rng(seed)
+    genres = empirical('genres', FALLBACK_GENRES)
+    regions = empirical('availableCountries', FALLBACK_REGIONS)
+
+    with open(path, 'w', newline='') as file:
+        for start in range(0, rows, CHUNK_ROWS):
+            chunk = generate_chunk(rng, start, min(CHUNK_ROWS, rows - start), genres, regions)
+            chunk.to_csv(file, header=(start == 0), index=False)
+    return path
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic HBO Max style catalog")
+    parser.add_argument('rows', type=int, help="number of titles, e.g. 10000 to 10000000")
+    parser.add_argument('output', nargs='?', default='data.csv')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    generate_catalog(args.output, args.rows, args.seed)
+    print(f"Wrote {args.rows} titles to {args.output}")
+
+if __name__ == "__main__":
+    main()
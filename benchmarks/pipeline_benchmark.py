@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+import pandas as pd
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from generate_catalog import generate_catalog
+from charts import CHARTS, CUBE_CHARTS
+from cube import AggregateCube
+from dataset_cache import parse_report
+from report_writer import rank_rows, report_values, write_report
+from schema import schema_for
+from sidecar import load_sidecar, sidecar_path
+
+"""
+This is the end-to-end benchmark of the top picks pipeline. For every catalog size it generates a synthetic
+data.csv and times each stage on its own: resolving the columns, loading the CSV with its dtypes the way
+every script does (schema.read), filtering and sorting, writing the report, parsing the report back (and
+loading the sidecar), and each of the plot aggregations, both from the report rows and the way the viewer
+does them: building the aggregate cube of the report once and reading every chart from it. Every stage records its wall time and the peak memory allocated while
+it ran, measured in two separate passes so tracemalloc does not slow down the timed one. Results are
+written as JSON so a later run can be compared against a saved baseline.
+"""
+
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+
+# Function to run one stage, measuring its time, or the peak memory it allocated while tracemalloc is on
+# Time and memory come from separate passes, since tracemalloc slows every allocation down a lot.
+def run_stage(results, size, name, function, *args):
+    result = results.setdefault((size, name), {'size': size, 'stage': name})
+    if tracemalloc.is_tracing():
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        value = function(*args)
+        _, peak = tracemalloc.get_traced_memory()
+        result['peak_bytes'] = max(0, peak - before)
+    else:
+        start = time.perf_counter()
+        value = function(*args)
+        result['seconds'] = round(time.perf_counter() - start, 6)
+    return value
+
+# Function to filter and sort the way the analysis scripts do (the ratings are already numbers, see schema.read)
+def filter_and_sort(data, columns):
+    top_picks = data.iloc[rank_rows(data[columns['rating']], 7.5)]
+    top_picks = top_picks[[columns[key] for key in ('title', 'genres', 'year', 'rating', 'countries')]]
+    return report_values(top_picks, columns)
+
+# Function to run every stage for one catalog size
+def benchmark_size(size, workdir, results, keep_data=False):
+    csv_path = os.path.join(workdir, f'catalog_{size}.csv')
+    if not os.path.exists(csv_path):
+        generate_catalog(csv_path, size)
+    report_file = os.path.join(workdir, f'top_picks_{size}.txt')
+
+    schema = run_stage(results, size, 'column_resolution', lambda: schema_for(csv_path).check())
+    data = run_stage(results, size, 'csv_load', schema.read, csv_path)
+
+    top_picks = run_stage(results, size, 'filter_sort', filter_and_sort, data, schema.columns)
+    del data
+    run_stage(results, size, 'report_write', write_report, top_picks, report_file)
+    del top_picks
+
+    report = run_stage(results, size, 'load_data_parse', parse_report, report_file)
+    run_stage(results, size, 'sidecar_load', load_sidecar, sidecar_path(report_file))
+    for name, (aggregate, _) in CHARTS.items():
+        run_stage(results, size, f'aggregate_{name}', aggregate, report)
+    cube = run_stage(results, size, 'cube_build', AggregateCube.from_frame, report)
+    for name, aggregate in CUBE_CHARTS.items():
+        run_stage(results, size, f'cube_{name}', aggregate, cube)
+
+    if not keep_data:
+        os.remove(csv_path)
+
+# Function to compare results with a saved baseline and list the stages that got slower
+def find_regressions(results, baseline_file, tolerance):
+    with open(baseline_file, 'r') as file:
+        baseline = {(item['size'], item['stage']): item for item in json.load(file)['results']}
+    regressions = []
+    for item in results:
+        old = baseline.get((item['size'], item['stage']))
+        if old and old['seconds'] > 0 and item['seconds'] > old['seconds'] * (1 + tolerance):
+            regressions.append({**item, 'baseline_seconds': old['seconds']})
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Time every stage of the top picks pipeline")
+    parser.add_argument('--sizes', default=','.join(str(size) for size in DEFAULT_SIZES),
+                        help="comma separated catalog sizes, e.g. 10000,100000,10000000")
+    parser.add_argument('--output', default='bench_results.json', help="where to write the JSON results")
+    parser.add_argument('--workdir', default=None, help="keep generated catalogs here instead of a temp dir")
+    parser.add_argument('--baseline', default=None, help="earlier results to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="allowed slowdown before a stage is flagged")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',') if size]
+    measured = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = args.workdir or tmp
+        os.makedirs(workdir, exist_ok=True)
+        for size in sizes:
+            # First pass for the times, second pass (same catalog) for the peak memory
+            benchmark_size(size, workdir, measured, keep_data=True)
+            tracemalloc.start()
+            benchmark_size(size, workdir, measured, keep_data=bool(args.workdir))
+            tracemalloc.stop()
+            for (result_size, _), result in measured.items():
+                if result_size == size:
+                    print(json.dumps(result), flush=True)
+    results = list(measured.values())
+
+    summary = {
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'machine': platform.machine(),
+        'results': results,
+    }
+    with open(args.output, 'w') as file:
+        json.dump(summary, file, indent=2)
+    print(f"Results saved to {args.output}")
+
+    if args.baseline:
+        regressions = find_regressions(results, args.baseline, args.tolerance)
+        for item in regressions:
+            print(f"Regression: {item['stage']} at {item['size']} rows took {item['seconds']:.3f}s "
+                  f"(baseline {item['baseline_seconds']:.3f}s)")
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
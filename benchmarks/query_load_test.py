@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from urllib.parse import urlencode, urlsplit
+
+"""
+This is the load test of query_service.py. Many concurrent clients each keep one connection open and send
+random /titles queries (a rating threshold, a genre, a country, a year range and a page) for a fixed time.
+It reports requests per second and the p50/p99 latency. By default it starts the service on a free port
+for the given report; pass --url to test a service that is already running.
+
+    python benchmarks/query_load_test.py --report HBO_Max_Top_Picks.txt --clients 64 --seconds 10
+"""
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GENRES = ['Drama', 'Comedy', 'Documentary', 'Crime', 'Animation', 'Action', 'Romance', 'Thriller']
+COUNTRIES = ['US', 'SE', 'BR', 'MX', 'ES', 'PL', 'NL', 'CO']
+
+# Function to make one random query; distinct enough that both cache hits and misses happen
+def random_query(rng):
+    params = [('min_rating', rng.choice([7.5, 8, 8.5, 9]))]
+    if rng.random() < 0.6:
+        params.append(('genre', rng.choice(GENRES)))
+    if rng.random() < 0.6:
+        params.append(('country', rng.choice(COUNTRIES)))
+    if rng.random() < 0.3:
+        start = rng.randrange(1950, 2020, 10)
+        params += [('year_from', start), ('year_to', start + 9)]
+    params.append(('page', rng.randint(1, 3)))
+    return '/titles?' + urlencode(params)
+
+# Function to run one client: a keep-alive connection sending requests until the deadline
+async def client(host, port, deadline, latencies, errors, seed):
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while time.perf_counter() < deadline:
+            target = random_query(rng)
+            start = time.perf_counter()
+            writer.write(f"GET {target} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode())
+            await writer.drain()
+            status = (await reader.readline()).split()
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b''):
+                    break
+                if line.lower().startswith(b'content-length:'):
+                    length = int(line.split(b':')[1])
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - start)
+            if len(status) < 2 or status[1] != b'200':
+                errors.append(status)
+    finally:
+        writer.close()
+
+# Function to run all clients for a number of seconds and summarize the latencies
+async def load_test(host, port, clients, seconds):
+    latencies, errors = [], []
+    deadline = time.perf_counter() + seconds
+    start = time.perf_counter()
+    await asyncio.gather(*(client(host, port, deadline, latencies, errors, seed) for seed in range(clients)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))] * 1000 if latencies else None
+    return {
+        'clients': clients,
+        'requests': len(latencies),
+        'errors': len(errors),
+        'requests_per_second': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(percentile(50), 3),
+        'p99_ms': round(percentile(99), 3),
+    }
+
+# Function to wait until a freshly started service answers /health
+async def wait_until_up(host, port, timeout=30):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            reader, writer = await asyncio.open_connection(host, port)
+            writer.write(b"GET /health HTTP/1.0\r\n\r\n")
+            await writer.drain()
+            await reader.read()
+            writer.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.1)
+    raise RuntimeError(f"The service on {host}:{port} did not start")
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the top picks query service")
+    parser.add_argument('--report', default='HBO_Max_Top_Picks.txt', help="report to serve when starting the service")
+    parser.add_argument('--url', default=None, help="test an already running service, e.g. http://127.0.0.1:8765")
+    parser.add_argument('--port', type=int, default=8799, help="port for the service started by this script")
+    parser.add_argument('--clients', type=int, default=64)
+    parser.add_argument('--seconds', type=float, default=10)
+    args = parser.parse_args()
+
+    server = None
+    if args.url:
+        url = urlsplit(args.url)
+        host, port = url.hostname, url.port or 80
+    else:
+        host, port = '127.0.0.1', args.port
+        server = subprocess.Popen([sys.executable, os.path.join(ROOT, 'query_service.py'), '--report', args.report,
+                                   '--port', str(port)], cwd=ROOT, stdout=subprocess.DEVNULL)
+    try:
+        asyncio.run(wait_until_up(host, port))
+        result = asyncio.run(load_test(host, port, args.clients, args.seconds))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    print(json.dumps(result))
+    print(f"{result['requests_per_second']} requests/s, p50 {result['p50_ms']} ms, p99 {result['p99_ms']} ms "
+          f"({result['requests']} requests, {result['errors']} errors, {args.clients} clients)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+import argparse
+import os
+import sys
+import tempfile
+import time
+import pandas as pd
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from report_writer import write_report
+
+"""
+This benchmark measures how many rows per second the report writer gets through, next to the old
+iterrows() loop it replaced, and checks that both produce exactly the same bytes. The Kaggle file is
+repeated until it has the number of rows asked for.
+"""
+
+DATA_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'maxTopic', 'data.csv')
+
+# Function to write the report the way the scripts used to, one row and five writes at a time
+def legacy_write(frame, output_file):
+    title_col, genres_col, release_year_col, imdb_rating_col, available_countries_col = frame.columns
+    with open(output_file, 'w') as file:
+        for _, row in frame.iterrows():
+            file.write(f"Title: {row[title_col]}\n")
+            file.write(f"Genre: {row[genres_col]}\n")
+            file.write(f"Year: {row[release_year_col]}\n")
+            file.write(f"IMDb Rating: {row[imdb_rating_col]}\n")
+            file.write(f"Available in: {row[available_countries_col]}\n")
+            file.write("\n")
+
+# Function to build a frame with the report columns and the requested number of rows
+def build_frame(rows):
+    data = pd.read_csv(DATA_FILE, usecols=['title', 'genres', 'releaseYear', 'imdbAverageRating', 'availableCountries'])
+    data = data[['title', 'genres', 'releaseYear', 'imdbAverageRating', 'availableCountries']]
+    repeats = -(-rows // len(data))
+    return pd.concat([data] * repeats, ignore_index=True).iloc[:rows]
+
+# Function to time one writer and return rows per second
+def time_writer(writer, frame, output_file):
+    start = time.perf_counter()
+    writer(frame, output_file)
+    elapsed = time.perf_counter() - start
+    return len(frame) / elapsed, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description="Report writer throughput benchmark")
+    parser.add_argument('--rows', type=int, default=200_000, help="rows to write with the new writer")
+    parser.add_argument('--legacy-rows', type=int, default=20_000, help="rows to write with the old iterrows loop")
+    args = parser.parse_args()
+
+    frame = build_frame(args.rows)
+    with tempfile.TemporaryDirectory() as tmp:
+        new_file = os.path.join(tmp, 'new.txt')
+        old_file = os.path.join(tmp, 'old.txt')
+
+        sample = frame.iloc[:args.legacy_rows]
+        legacy_rate, legacy_time = time_writer(legacy_write, sample, old_file)
+        write_report(sample, new_file, sidecar=False)
+        with open(old_file, 'rb') as old, open(new_file, 'rb') as new:
+            identical = old.read() == new.read()
+
+        text_rate, text_time = time_writer(lambda f, o: write_report(f, o, sidecar=False), frame, new_file)
+        full_rate, full_time = time_writer(write_report, frame, new_file)
+
+    print(f"iterrows loop:        {legacy_rate:12,.0f} rows/s ({len(sample)} rows in {legacy_time:.2f}s)")
+    print(f"write_report (text):  {text_rate:12,.0f} rows/s ({len(frame)} rows in {text_time:.2f}s)")
+    print(f"write_report (+cols): {full_rate:12,.0f} rows/s ({len(frame)} rows in {full_time:.2f}s)")
+    print(f"Byte identical output: {identical}")
+    if not identical:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from generate_catalog import generate_catalog
+from virtual_table import TableModel
+
+"""
+This measures the viewer's title search the way a user drives it: a query is typed one character at a time,
+then deleted again with backspace, and every keystroke runs the search, applies it to the table model
+(together with a sort by rating) and fetches the visible rows. The time of each keystroke is compared with
+a 60 fps frame budget of 16 ms. The catalog is synthetic, with the real titles mixed in so that titles with
+accents are searched as well.
+"""
+
+FRAME_BUDGET_MS = 16.0
+DEFAULT_QUERIES = ['the last', 'dragon', 'amelie', 'night city', 'los', 'e', 'garden of', 'ca', 'winter story']
+
+# Function to type a query and delete it again, timing every keystroke
+def type_query(model, query, visible_rows=25):
+    timings = []
+    steps = [query[:i] for i in range(1, len(query) + 1)] + [query[:i] for i in range(len(query) - 1, -1, -1)]
+    for text in steps:
+        start = time.perf_counter()
+        model.search(text)
+        model.window(0, min(model.row_count, visible_rows))
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure as-you-type title search latency")
+    parser.add_argument('--size', type=int, default=500_000)
+    parser.add_argument('--query', action='append', help="query to type (repeatable)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        csv_path = os.path.join(workdir, 'catalog.csv')
+        generate_catalog(csv_path, args.size)
+        data = pd.read_csv(csv_path, usecols=['title', 'genres', 'releaseYear', 'imdbAverageRating', 'availableCountries'])
+    data.columns = ['title', 'genre', 'year', 'imdb rating', 'available regions']
+
+    model = TableModel(data)
+    start = time.perf_counter()
+    model.build_search_index()
+    build_seconds = time.perf_counter() - start
+    model.sort_by(3)
+
+    timings = []
+    for query in args.query or DEFAULT_QUERIES:
+        timings += type_query(model, query)
+    timings = np.array(timings)
+    result = {
+        'titles': len(data),
+        'index_build_seconds': round(build_seconds, 3),
+        'keystrokes': len(timings),
+        'p50_ms': round(float(np.percentile(timings, 50)), 3),
+        'p99_ms': round(float(np.percentile(timings, 99)), 3),
+        'max_ms': round(float(timings.max()), 3),
+        'over_budget': int((timings > FRAME_BUDGET_MS).sum()),
+    }
+    print(json.dumps(result))
+
+if __name__ == "__main__":
+    main()
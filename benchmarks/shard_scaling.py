@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import os
+import sys
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from generate_catalog import generate_catalog
+from sharded_analysis import analyze_shards
+
+"""
+This checks that the sharded analysis scales with the number of worker processes. It writes a set of
+synthetic catalog dumps (every one with its own seed, like one dump per region), then analyzes all of them
+with 1, 2, 4, ... workers up to the number of cores and prints one JSON line per run: wall time, rows per
+second, the speedup over one worker and the parallel efficiency (speedup / workers). The same numbers are
+given for the shard phase alone, because the k-way merge in the parent runs on one core whatever the
+number of workers; with --top it only touches the best N titles and all but disappears.
+"""
+
+# Function to list the worker counts to try: powers of two up to the number of cores, and the core count itself
+def default_workers():
+    cores = os.cpu_count() or 1
+    counts = [1]
+    while counts[-1] * 2 <= cores:
+        counts.append(counts[-1] * 2)
+    return counts + ([cores] if counts[-1] != cores else [])
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure how the sharded analysis scales with worker processes")
+    parser.add_argument('--shards', type=int, default=8, help="number of CSV files")
+    parser.add_argument('--rows', type=int, default=250_000, help="rows per CSV file")
+    parser.add_argument('--workers', type=int, nargs='+', default=None, help="worker counts to try")
+    parser.add_argument('--top', type=int, default=None, help="only merge the best N titles")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        dumps = os.path.join(workdir, 'dumps')
+        os.makedirs(dumps)
+        for shard in range(args.shards):
+            generate_catalog(os.path.join(dumps, f'region_{shard:03d}.csv'), args.rows, seed=shard)
+
+        baseline = None
+        for workers in args.workers or default_workers():
+            with open(os.devnull, 'w') as quiet:
+                stdout, sys.stdout = sys.stdout, quiet
+                try:
+                    summary = analyze_shards(dumps, os.path.join(workdir, 'merged.txt'), os.path.join(workdir, 'shards'),
+                                             top_n=args.top, workers=workers)
+                finally:
+                    sys.stdout = stdout
+            wall = summary['wall_seconds']
+            parallel = summary['shard_seconds']
+            # Speedups are relative to the first run, normally the one with a single worker
+            baseline = baseline or (wall, parallel, workers)
+            speedup = baseline[0] / wall
+            shard_speedup = baseline[1] / parallel
+            scale = workers / baseline[2]
+            print(json.dumps({
+                'workers': workers, 'cores': os.cpu_count(), 'shards': summary['shards'], 'rows': summary['rows'],
+                'picks': summary['written'], 'wall_seconds': round(wall, 3),
+                'shard_seconds': round(parallel, 3), 'merge_seconds': round(summary['merge_seconds'], 3),
+                'rows_per_second': round(summary['rows'] / wall),
+                'speedup': round(speedup, 2), 'efficiency': round(speedup / scale, 2),
+                'shard_speedup': round(shard_speedup, 2), 'shard_efficiency': round(shard_speedup / scale, 2),
+            }), flush=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from generate_catalog import generate_catalog
+from similarity import SimilarityEngine
+
+"""
+This measures the "more like this" engine on synthetic catalogs from ten thousand to a million titles. For
+every size it reports how long building the feature matrix takes, the median and p99 latency of a single
+query, and the time per query when a batch of queries is answered at once, for both metrics and with and
+without countries. Every result is printed as one JSON line.
+"""
+
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+
+# Function to time single queries and one batch on an engine
+def measure(engine, size, metric, countries, queries, batch, k, rng):
+    rows = rng.integers(0, len(engine), size=queries)
+    engine.similar_batch(rows[:1], k, metric)
+    latencies = []
+    for row in rows:
+        start = time.perf_counter()
+        engine.similar_batch([row], k, metric)
+        latencies.append(time.perf_counter() - start)
+
+    batch_rows = rng.integers(0, len(engine), size=batch)
+    start = time.perf_counter()
+    engine.similar_batch(batch_rows, k, metric)
+    batch_seconds = time.perf_counter() - start
+
+    latencies = np.sort(latencies) * 1000
+    return {
+        'size': size, 'metric': metric, 'countries': countries, 'k': k,
+        'single_p50_ms': round(float(np.percentile(latencies, 50)), 3),
+        'single_p99_ms': round(float(np.percentile(latencies, 99)), 3),
+        'batch_queries': batch,
+        'batch_ms_per_query': round(batch_seconds * 1000 / batch, 3),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the similarity engine")
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES))
+    parser.add_argument('--queries', type=int, default=50, help="single queries timed per size")
+    parser.add_argument('--batch', type=int, default=1000, help="queries answered in one batch")
+    parser.add_argument('--k', type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in args.sizes:
+            csv_path = os.path.join(workdir, f'catalog_{size}.csv')
+            generate_catalog(csv_path, size)
+            data = pd.read_csv(csv_path)
+            os.remove(csv_path)
+            for countries in (False, True):
+                start = time.perf_counter()
+                engine = SimilarityEngine.from_frame(data, countries=countries)
+                build_seconds = time.perf_counter() - start
+                print(json.dumps({'size': size, 'countries': countries, 'build_seconds': round(build_seconds, 3),
+                                  'features': engine.features.shape[1], 'matrix_mb': round(engine.features.nbytes / 1e6, 1)}),
+                      flush=True)
+                for metric in ('jaccard', 'cosine'):
+                    print(json.dumps(measure(engine, size, metric, countries, args.queries, args.batch, args.k, rng)), flush=True)
+                del engine
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+"""
+This checks that the datamax command line starts quickly. It runs `datamax.py --help` and the analysis-only
+path under `python -X importtime`, reads which modules were imported and how long they took, and fails when
+--help imports anything heavy, goes over its time budget, or when analyzing a local file pulls in kaggle,
+tkinter or matplotlib.
+"""
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CLI = os.path.join(ROOT, 'datamax.py')
+HELP_BUDGET_MS = 100
+HEAVY_MODULES = ('pandas', 'numpy', 'kaggle', 'tkinter', 'matplotlib')
+NOT_FOR_ANALYSIS = ('kaggle', 'tkinter', 'matplotlib')
+
+# Function to run the CLI under -X importtime
+# Returns the wall time in ms, every imported package, and the import time in ms (top level imports only,
+# since nested imports are already part of their parent's cumulative time).
+def run_with_importtime(args, cwd=ROOT):
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-X', 'importtime', CLI, *args],
+                            cwd=cwd, capture_output=True, text=True)
+    wall_ms = (time.perf_counter() - start) * 1000
+    if result.returncode != 0:
+        raise RuntimeError(f"datamax {' '.join(args)} failed:\n{result.stderr}")
+
+    packages = set()
+    import_us = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        packages.add(name.strip().split('.')[0])
+        if len(name) - len(name.lstrip()) == 1:
+            import_us += int(cumulative)
+    return wall_ms, packages, import_us / 1000
+
+def main():
+    failures = []
+
+    runs = [run_with_importtime(['--help']) for _ in range(5)]
+    wall_ms = statistics.median(wall for wall, _, _ in runs)
+    import_ms = statistics.median(imports for _, _, imports in runs)
+    packages = runs[-1][1]
+    print(f"--help: {wall_ms:.1f} ms wall, {import_ms:.1f} ms in imports (median of {len(runs)} runs)")
+
+    heavy = [name for name in HEAVY_MODULES if name in packages]
+    if heavy:
+        failures.append(f"--help imported {heavy}")
+    if wall_ms > HELP_BUDGET_MS:
+        failures.append(f"--help took {wall_ms:.1f} ms, over the {HELP_BUDGET_MS} ms budget")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'data.csv')
+        with open(csv_path, 'w') as file:
+            file.write("title,type,genres,releaseYear,imdbId,imdbAverageRating,imdbNumVotes,availableCountries\n")
+            file.write('Unforgiven,movie,"Drama, Western",1992,tt0105695,8.2,443878,"BR, US"\n')
+        wall_ms, packages, import_ms = run_with_importtime(
+            ['analyze', csv_path, '--output', os.path.join(tmp, 'out.txt')], cwd=tmp)
+    print(f"analyze: {wall_ms:.1f} ms wall, {import_ms:.1f} ms in imports")
+    unwanted = [name for name in NOT_FOR_ANALYSIS if name in packages]
+    if unwanted:
+        failures.append(f"analyze imported {unwanted}")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+import argparse
+import os
+import threading
+import numpy as np
+import pandas as pd
+from schema import SchemaError, normalize_columns, schema_for
+
+"""
+This is an inverted index over the comma separated genres and availableCountries columns of data.csv.
+Every genre and every country code maps to the sorted array of row numbers that contain it, so a question
+like "Drama AND available in SE AND rating > 8" becomes a couple of array intersections instead of a scan
+over every row's strings. The index is built once and saved next to the dataset as <name>.index.npz; it is
+rebuilt automatically when data.csv changes.
+"""
+
+INDEX_SUFFIX = '.index.npz'
+
+# Function to find where the index for a dataset is saved
+def index_path(csv_path):
+    root, _ = os.path.splitext(csv_path)
+    return root + INDEX_SUFFIX
+
+# Function to describe the dataset file so a stale index can be detected
+def file_signature(path):
+    stat = os.stat(path)
+    return np.array([stat.st_mtime_ns, stat.st_size], dtype=np.int64)
+
+# Function to save arrays as an .npz without anyone ever seeing a half-written file: they are written to a
+# temporary file of their own (per process and thread) in the same folder and moved into place, so a reader
+# gets the old file or the new one
+def save_npz(path, **arrays):
+    tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    try:
+        with open(tmp_path, 'wb') as file:
+            np.savez(file, **arrays)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return path
+
+# Function to split a comma separated column into (vocabulary, token codes, row numbers)
+# The pairs are sorted by token and then by row, with a token listed twice on one row kept once.
+# Catalogs repeat the same genre and country lists over and over, so every distinct string is split
+# only once and the rows are expanded from those with array operations.
+def split_tokens(values):
+    row_codes, uniques = pd.factorize(values.reset_index(drop=True).astype(object))
+    token_lists = [sorted({token.strip() for token in str(text).split(',')} - {''}) for text in uniques]
+    vocab = np.array(sorted({token for tokens in token_lists for token in tokens}), dtype=str)
+    lookup = {token: code for code, token in enumerate(vocab.tolist())}
+
+    # Flatten the token codes of every distinct string, with offsets per string
+    lengths = np.array([len(tokens) for tokens in token_lists], dtype=np.int64)
+    flat = np.array([lookup[token] for tokens in token_lists for token in tokens], dtype=np.int64)
+    starts = np.zeros(len(token_lists), dtype=np.int64)
+    np.cumsum(lengths[:-1], out=starts[1:])
+
+    # Expand to one (row, token) pair per token of every row; missing values (code -1) have no tokens
+    present = np.flatnonzero(row_codes >= 0)
+    string_codes = row_codes[present]
+    counts = lengths[string_codes]
+    rows = np.repeat(present, counts)
+    position_in_row = np.arange(len(rows)) - np.repeat(np.cumsum(counts) - counts, counts)
+    codes = flat[np.repeat(starts[string_codes], counts) + position_in_row]
+
+    # Rows are already ascending, so a stable sort on the token gives (token, row) order
+    order = np.argsort(codes, kind='stable')
+    return vocab, codes[order], rows[order]
+
+# Function to build posting lists for a comma separated column
+# Returns the vocabulary, the offsets into the row array, and the row numbers sorted per token.
+def build_postings(values):
+    vocab, codes, rows = split_tokens(values)
+    offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(codes, minlength=len(vocab)), out=offsets[1:])
+    return vocab, offsets, rows
+
+# Function to patch posting lists: existing rows move to old_to_new (-1 drops them), and the comma separated
+# values of new_rows are split and merged in. Tokens left without rows are dropped, as a fresh build would.
+def patch_postings(vocab, offsets, rows, old_to_new, values, new_rows):
+    codes = np.repeat(np.arange(len(vocab)), np.diff(offsets))
+    rows = old_to_new[rows]
+    keep = rows >= 0
+    added_vocab, added_codes, added_rows = split_tokens(values)
+    merged_vocab = np.union1d(vocab, added_vocab)
+    old_codes = np.searchsorted(merged_vocab, vocab)[codes[keep]]
+    new_codes = np.searchsorted(merged_vocab, added_vocab)[added_codes]
+    new_rows = np.asarray(new_rows, dtype=np.int64)
+    old_rows, added_rows = rows[keep], new_rows[added_rows]
+
+    moved = old_to_new[old_to_new >= 0]
+    if np.all(moved[1:] > moved[:-1]) and np.all(new_rows[1:] > new_rows[:-1]):
+        # The kept rows did not change order, so both lists are still sorted by (token, row): merge them
+        width = max(int(old_rows.max(initial=-1)), int(added_rows.max(initial=-1))) + 1
+        slots = np.searchsorted(old_codes * width + old_rows, new_codes * width + added_rows) + np.arange(len(new_codes))
+        is_new = np.zeros(len(old_codes) + len(new_codes), dtype=bool)
+        is_new[slots] = True
+        codes = np.empty(len(is_new), dtype=np.int64)
+        rows = np.empty(len(is_new), dtype=np.int64)
+        codes[is_new], codes[~is_new] = new_codes, old_codes
+        rows[is_new], rows[~is_new] = added_rows, old_rows
+    else:
+        codes = np.concatenate([old_codes, new_codes])
+        rows = np.concatenate([old_rows, added_rows])
+        order = np.lexsort((rows, codes))
+        codes, rows = codes[order], rows[order]
+
+    counts = np.bincount(codes, minlength=len(merged_vocab))
+    used = counts > 0
+    offsets = np.zeros(int(used.sum()) + 1, dtype=np.int64)
+    np.cumsum(counts[used], out=offsets[1:])
+    return merged_vocab[used], offsets, rows
+
+# The index holds one set of posting lists for genres and one for countries, plus the ratings per row.
+class CatalogIndex:
+    def __init__(self, genre_vocab, genre_offsets, genre_rows,
+                 country_vocab, country_offsets, country_rows, ratings, signature=None):
+        self.genre_vocab = genre_vocab
+        self.genre_offsets = genre_offsets
+        self.genre_rows = genre_rows
+        self.country_vocab = country_vocab
+        self.country_offsets = country_offsets
+        self.country_rows = country_rows
+        self.ratings = ratings
+        self.signature = signature
+        self._genre_lookup = {name: i for i, name in enumerate(genre_vocab.tolist())}
+        self._country_lookup = {name: i for i, name in enumerate(country_vocab.tolist())}
+
+    # Function to build the index from a data.csv file
+    @classmethod
+    def build(cls, csv_path):
+        schema = schema_for(csv_path)
+        columns, original = schema.columns, schema.original
+        wanted = [columns['genres'], columns['countries'], columns['rating']]
+        missing = [col for col in wanted if col not in original]
+        if missing:
+            raise SchemaError(missing)
+
+        data = pd.read_csv(csv_path, usecols=[original[col] for col in wanted], dtype=object)
+        data.columns = normalize_columns(data.columns)
+        ratings = pd.to_numeric(data[columns['rating']], errors='coerce').to_numpy(dtype=np.float64)
+        genres = build_postings(data[columns['genres']])
+        countries = build_postings(data[columns['countries']])
+        return cls(*genres, *countries, ratings, signature=file_signature(csv_path))
+
+    # Function to bring the index up to date with a changed data.csv without splitting the unchanged rows again
+    # old_to_new maps every old row to its row in the new file (-1 when it was removed or changed); rows,
+    # genres, countries and ratings describe the added and changed rows.
+    def patch(self, old_to_new, rows, genres, countries, ratings, row_count, signature=None):
+        old_to_new = np.asarray(old_to_new, dtype=np.int64)
+        genre_vocab, genre_offsets, genre_rows = patch_postings(
+            self.genre_vocab, self.genre_offsets, self.genre_rows, old_to_new, genres, rows)
+        country_vocab, country_offsets, country_rows = patch_postings(
+            self.country_vocab, self.country_offsets, self.country_rows, old_to_new, countries, rows)
+        new_ratings = np.full(row_count, np.nan)
+        moved = old_to_new >= 0
+        new_ratings[old_to_new[moved]] = self.ratings[moved]
+        new_ratings[rows] = ratings
+        return CatalogIndex(genre_vocab, genre_offsets, genre_rows, country_vocab, country_offsets, country_rows,
+                            new_ratings, signature=signature)
+
+    # Function to save the index as a single .npz file
+    def save(self, path):
+        return save_npz(
+            path,
+            genre_vocab=self.genre_vocab, genre_offsets=self.genre_offsets, genre_rows=self.genre_rows,
+            country_vocab=self.country_vocab, country_offsets=self.country_offsets, country_rows=self.country_rows,
+            ratings=self.ratings, signature=self.signature,
+        )
+
+    # Function to load a saved index
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as saved:
+            return cls(
+                saved['genre_vocab'], saved['genre_offsets'], saved['genre_rows'],
+                saved['country_vocab'], saved['country_offsets'], saved['country_rows'],
+                saved['ratings'], signature=saved['signature'],
+            )
+
+    @property
+    def row_count(self):
+        return len(self.ratings)
+
+    # Function to return the sorted rows that list a genre (empty if the genre is unknown)
+    def genre(self, name):
+        code = self._genre_lookup.get(name)
+        if code is None:
+            return np.empty(0, dtype=np.int64)
+        return self.genre_rows[self.genre_offsets[code]:self.genre_offsets[code + 1]]
+
+    # Function to return the sorted rows that are available in a country
+    def country(self, code):
+        position = self._country_lookup.get(code)
+        if position is None:
+            return np.empty(0, dtype=np.int64)
+        return self.country_rows[self.country_offsets[position]:self.country_offsets[position + 1]]
+
+    # Function to count how many rows list each genre, most common first
+    def genre_counts(self):
+        counts = pd.Series(np.diff(self.genre_offsets), index=self.genre_vocab)
+        return counts.sort_values(ascending=False, kind='stable')
+
+    # Function to count how many rows are available in each country, most common first
+    def country_counts(self):
+        counts = pd.Series(np.diff(self.country_offsets), index=self.country_vocab)
+        return counts.sort_values(ascending=False, kind='stable')
+
+    # Function to answer "all of these genres AND all of these countries AND rating above x"
+    # Returns the matching row numbers of data.csv in ascending order.
+    def query(self, genres=(), countries=(), rating_above=None):
+        postings = [self.genre(name) for name in genres] + [self.country(code) for code in countries]
+        if postings:
+            # Intersect the shortest lists first so the candidate set shrinks as fast as possible.
+            postings.sort(key=len)
+            rows = postings[0]
+            for other in postings[1:]:
+                if not len(rows):
+                    break
+                rows = np.intersect1d(rows, other, assume_unique=True)
+        else:
+            rows = np.arange(self.row_count, dtype=np.int64)
+
+        if rating_above is not None:
+            rows = rows[self.ratings[rows] > rating_above]
+        return rows
+
+# Function to load the saved index for a dataset, building and saving it first if it is missing or stale
+def load_or_build_index(csv_path):
+    path = index_path(csv_path)
+    if os.path.exists(path):
+        index = CatalogIndex.load(path)
+        if index.signature is not None and np.array_equal(index.signature, file_signature(csv_path)):
+            return index
+
+    index = CatalogIndex.build(csv_path)
+    index.save(path)
+    return index
+
+def main():
+    parser = argparse.ArgumentParser(description="Query data.csv through its genre/country index")
+    parser.add_argument('csv_path', nargs='?', default='data.csv')
+    parser.add_argument('--genre', action='append', default=[], help="genre that must be listed (repeatable)")
+    parser.add_argument('--country', action='append', default=[], help="country code that must be listed (repeatable)")
+    parser.add_argument('--above', type=float, default=None, help="only titles rated above this")
+    args = parser.parse_args()
+
+    index = load_or_build_index(args.csv_path)
+    rows = index.query(args.genre, args.country, args.above)
+    print(f"{len(rows)} of {index.row_count} titles match")
+    if len(rows):
+        schema = schema_for(args.csv_path)
+        print(schema.read(args.csv_path, extra=schema.names).iloc[rows].head(20).to_string())
+
+if __name__ == "__main__":
+    main()
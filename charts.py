@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+import numpy as np
+import pandas as pd
+
+"""
+These are the numbers behind the four views of hbo_dataMax.py, kept apart from the drawing. The aggregate
+functions only need the report DataFrame and are safe to run on a worker thread; the draw functions take
+those small results and a matplotlib Axes, so nothing heavy happens on the Tk main loop.
+
+The viewer and export_charts.py read the same numbers from the aggregate cube of the report instead (see
+cube.py and CUBE_CHARTS), which never touches the titles themselves. IMDb ratings have one decimal, so
+the cube's rating buckets give back the exact histogram; the scatter plot gets every distinct
+(year, rating) point once, which draws the same picture.
+"""
+
+# Function to bin the IMDb ratings for the histogram
+def rating_histogram(data, bins=10):
+    ratings = pd.to_numeric(data.get('imdb rating', pd.Series(dtype=float)), errors='coerce').to_numpy(dtype=float)
+    ratings = ratings[np.isfinite(ratings)]
+    counts, edges = np.histogram(ratings, bins=bins)
+    return counts, edges
+
+# Function to count the most common genres
+def top_genre_counts(data, n=10):
+    genres = data.get('genre', pd.Series(dtype=object)).dropna().astype(object)
+    # Handle genres properly, split and count them
+    return genres.str.split(', ').explode().value_counts().head(n)
+
+# Function to collect the (year, rating) pairs for the scatter plot
+def rating_year_points(data):
+    years = pd.to_numeric(data.get('year', pd.Series(dtype=float)), errors='coerce').to_numpy(dtype=float)
+    ratings = pd.to_numeric(data.get('imdb rating', pd.Series(dtype=float)), errors='coerce').to_numpy(dtype=float)
+    keep = np.isfinite(years) & np.isfinite(ratings)
+    return years[keep], ratings[keep]
+
+# Function to draw the IMDb rating histogram from its bins
+def draw_histogram(ax, histogram):
+    counts, edges = histogram
+    ax.hist(edges[:-1], bins=edges, weights=counts, color='skyblue', edgecolor='black')
+    ax.set_title('IMDb Rating Distribution')
+    ax.set_xlabel('IMDb Rating')
+    ax.set_ylabel('Frequency')
+
+# Function to draw the top genres bar chart from the genre counts
+def draw_top_genres(ax, counts):
+    ax.bar([str(name) for name in counts.index], counts.to_numpy(), color='lightcoral')
+    ax.set_title('Top 10 Genres')
+    ax.set_xlabel('Genres')
+    ax.set_ylabel('Frequency')
+    ax.tick_params(axis='x', labelrotation=45)
+    for label in ax.get_xticklabels():
+        label.set_horizontalalignment('right')
+
+# Function to draw the rating vs year scatter plot from its points
+def draw_rating_vs_year(ax, points):
+    years, ratings = points
+    ax.scatter(years, ratings, color='darkgreen')
+    ax.set_title('IMDb Rating vs Year')
+    ax.set_xlabel('Year')
+    ax.set_ylabel('IMDb Rating')
+
+# Function to bin the IMDb ratings for the histogram from the rating buckets of an aggregate cube
+def cube_histogram(cube, bins=10, **filters):
+    counts = cube.rollup('rating', **filters)['titles']
+    counts = counts[counts.index.notna() & (counts > 0)]
+    counts, edges = np.histogram(counts.index.to_numpy(dtype=float), bins=bins, weights=counts.to_numpy())
+    return counts.astype(np.int64), edges
+
+# Function to count the most common genres from an aggregate cube
+def cube_top_genres(cube, n=10, **filters):
+    return cube.top_genres(n, **filters)
+
+# Function to collect the distinct (year, rating) points for the scatter plot from an aggregate cube
+def cube_rating_year_points(cube, **filters):
+    points = cube.rollup(['year', 'rating'], **filters).reset_index()
+    points = points[(points['titles'] > 0) & (points['year'] >= 0) & points['rating'].notna()]
+    return points['year'].to_numpy(dtype=float), points['rating'].to_numpy(dtype=float)
+
+# The charts by name: (aggregate function, draw function)
+CHARTS = {
+    'histogram': (rating_histogram, draw_histogram),
+    'genres': (top_genre_counts, draw_top_genres),
+    'rating_vs_year': (rating_year_points, draw_rating_vs_year),
+}
+
+# The same aggregates from an aggregate cube, by chart name; they take the cube and any rollup() filters
+CUBE_CHARTS = {
+    'histogram': cube_histogram,
+    'genres': cube_top_genres,
+    'rating_vs_year': cube_rating_year_points,
+}
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+import argparse
+import numpy as np
+import pandas as pd
+from catalog_index import split_tokens
+from schema import normalize_columns, resolve_columns, schema_for
+
+"""
+This loads data.csv into a compact in-memory form. A plain pd.read_csv keeps genres, availableCountries
+and type as Python strings, and with 50+ country codes per row those strings dominate the memory of a big
+catalog. Here type becomes a categorical, ratings float32, years and votes small nullable integers, and
+genres and countries become multi-hot matrices over a shared vocabulary, bit-packed to one bit per code.
+memory_report() shows how much that saves compared to the plain read_csv frame.
+"""
+
+# A multi-hot matrix: one row per title, one bit per vocabulary entry, packed eight to a byte.
+class MultiHot:
+    def __init__(self, vocab, packed, row_count):
+        self.vocab = vocab
+        self.packed = packed
+        self.row_count = row_count
+        self._lookup = {name: i for i, name in enumerate(vocab.tolist())}
+
+    # Function to encode a comma separated column
+    @classmethod
+    def from_strings(cls, values):
+        vocab, codes, rows = split_tokens(values)
+        # Set the bits straight into the packed matrix; a dense bool matrix would be 8x bigger.
+        packed = np.zeros((len(values), (len(vocab) + 7) // 8), dtype=np.uint8)
+        np.bitwise_or.at(packed, (rows, codes // 8), (0x80 >> (codes % 8)).astype(np.uint8))
+        return cls(vocab, packed, len(values))
+
+    @property
+    def nbytes(self):
+        return self.packed.nbytes + self.vocab.nbytes
+
+    # Function to return the rows that list one vocabulary entry, as a boolean array
+    def contains(self, name):
+        code = self._lookup.get(name)
+        if code is None:
+            return np.zeros(self.row_count, dtype=bool)
+        byte, bit = divmod(code, 8)
+        return (self.packed[:, byte] & (0x80 >> bit)) != 0
+
+    # Function to unpack to a dense 0/1 matrix (rows x vocabulary) for matrix maths
+    def dense(self, dtype=np.uint8, rows=None):
+        packed = self.packed if rows is None else self.packed[rows]
+        return np.unpackbits(packed, axis=1, count=len(self.vocab)).astype(dtype, copy=False)
+
+    # Function to count how many rows list each entry, most common first
+    def counts(self):
+        totals = np.unpackbits(self.packed, axis=1, count=len(self.vocab)).sum(axis=0, dtype=np.int64)
+        return pd.Series(totals, index=self.vocab).sort_values(ascending=False, kind='stable')
+
+    # Function to turn one row back into its comma separated string
+    def decode(self, row):
+        bits = np.unpackbits(self.packed[row], count=len(self.vocab))
+        return ', '.join(self.vocab[bits.astype(bool)].tolist())
+
+# The compact catalog: a narrow DataFrame plus the genre and country matrices.
+class CompactCatalog:
+    def __init__(self, frame, genres, countries, columns):
+        self.frame = frame
+        self.genres = genres
+        self.countries = countries
+        self.columns = columns
+
+    def __len__(self):
+        return len(self.frame)
+
+    @property
+    def nbytes(self):
+        return int(self.frame.memory_usage(deep=True).sum()) + self.genres.nbytes + self.countries.nbytes
+
+# Function to convert a numeric column to the smallest nullable integer that fits
+def narrow_int(values):
+    values = pd.to_numeric(values, errors='coerce')
+    return pd.to_numeric(values.round().astype('Int64'), downcast='unsigned' if (values.dropna() >= 0).all() else 'integer')
+
+# Function to turn an already loaded data.csv frame into a compact catalog
+def compact_frame(data):
+    data = data.copy(deep=False)
+    data.columns = normalize_columns(data.columns)
+    columns = resolve_columns(data.columns)
+
+    frame = pd.DataFrame(index=data.index)
+    for column in data.columns:
+        if column in (columns['genres'], columns['countries']):
+            continue
+        values = data[column]
+        if column == columns['rating']:
+            frame[column] = pd.to_numeric(values, errors='coerce').astype(np.float32)
+        elif column in (columns['year'], 'imdbnumvotes'):
+            frame[column] = narrow_int(values)
+        elif column == 'type':
+            frame[column] = values.astype('category')
+        else:
+            frame[column] = values
+
+    genres = MultiHot.from_strings(data[columns['genres']])
+    countries = MultiHot.from_strings(data[columns['countries']])
+    return CompactCatalog(frame, genres, countries, columns)
+
+# Function to load data.csv straight into a compact catalog, every column read with its dtype (see schema.py)
+def load_compact(file_path):
+    schema = schema_for(file_path)
+    return compact_frame(schema.read(file_path, extra=schema.names))
+
+# Function to compare the memory of the compact catalog with the plain read_csv frame
+def memory_report(file_path):
+    plain = pd.read_csv(file_path)
+    plain_bytes = int(plain.memory_usage(deep=True).sum())
+    catalog = compact_frame(plain)
+    compact_bytes = catalog.nbytes
+    return {
+        'rows': len(plain),
+        'read_csv_bytes': plain_bytes,
+        'compact_bytes': compact_bytes,
+        'saved_bytes': plain_bytes - compact_bytes,
+        'ratio': round(plain_bytes / compact_bytes, 2) if compact_bytes else None,
+        'genre_vocab': len(catalog.genres.vocab),
+        'country_vocab': len(catalog.countries.vocab),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Show how much memory the compact loader saves")
+    parser.add_argument('csv_path', nargs='?', default='data.csv')
+    args = parser.parse_args()
+
+    report = memory_report(args.csv_path)
+    print(f"{report['rows']} rows")
+    print(f"pd.read_csv frame: {report['read_csv_bytes'] / 1e6:10.2f} MB")
+    print(f"compact catalog:   {report['compact_bytes'] / 1e6:10.2f} MB")
+    print(f"saved:             {report['saved_bytes'] / 1e6:10.2f} MB ({report['ratio']}x smaller)")
+
+if __name__ == "__main__":
+    main()
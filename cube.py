@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+import argparse
+import os
+import numpy as np
+import pandas as pd
+from catalog_index import file_signature, save_npz, split_tokens
+from schema import VALID_RANGES, normalize_columns, resolve_columns, schema_for
+
+"""
+This is a precomputed aggregate cube over the catalog (or over the top picks report): the number of titles
+and the sum of their IMDb ratings for every combination of country, genre, release year, type and rating
+(in steps of 0.1). Only the combinations that occur are stored, and the cube is saved next to its source
+as <name>.cube.npz and rebuilt when the source changes.
+
+A title lists several genres and countries, so adding up the cells of every genre would count a Drama
+Comedy twice. The cube therefore also has an "all genres" and an "all countries" member (ALL), and a
+question that does not ask about genres reads that member instead of adding genres up. The other
+dimensions hold one value per title and can simply be summed.
+
+    python cube.py data.csv --genre Drama --country BR --above 8 --by decade
+    python cube.py HBO_Max_Top_Picks.txt --by genre --top 10
+"""
+
+CUBE_SUFFIX = '.cube.npz'
+ALL = '*'
+DIMENSIONS = ('country', 'genre', 'year', 'type', 'bucket')
+# Rows of the group table expanded per country at a time while building, to bound memory
+BUILD_CHUNK = 1 << 20
+
+# Function to find where the cube of a dataset or report is saved
+def cube_path(path):
+    root, _ = os.path.splitext(path)
+    return root + CUBE_SUFFIX
+
+# Function to list the tokens of every distinct comma separated string as CSR arrays, with ALL appended
+# to every list. Index len(uniques) stands for a missing value, which only belongs to ALL.
+def token_lists(uniques):
+    vocab, codes, rows = split_tokens(pd.Series(uniques, dtype=object))
+    all_code = len(vocab)
+    order = np.lexsort((codes, rows))
+    rows, codes = rows[order], codes[order]
+    # Every distinct string (and the missing value) also gets the ALL member
+    count = len(uniques) + 1
+    rows = np.concatenate([rows, np.arange(count)])
+    codes = np.concatenate([codes, np.full(count, all_code)])
+    order = np.argsort(rows, kind='stable')
+    rows, codes = rows[order], codes[order]
+    offsets = np.zeros(count + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=count), out=offsets[1:])
+    return np.append(vocab, ALL), offsets, codes
+
+# Function to expand every group into one entry per token of its list
+def expand(group_codes, offsets, tokens):
+    lengths = offsets[group_codes + 1] - offsets[group_codes]
+    index = np.repeat(np.arange(len(group_codes)), lengths)
+    position = np.arange(len(index)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return index, tokens[np.repeat(offsets[group_codes], lengths) + position]
+
+# Function to add up the count and rating sum of entries that share a packed key
+def combine(keys, counts, sums):
+    keys, inverse = np.unique(keys, return_inverse=True)
+    return keys, np.bincount(inverse, weights=counts, minlength=len(keys)), np.bincount(inverse, weights=sums, minlength=len(keys))
+
+class AggregateCube:
+    def __init__(self, vocabs, cells, counts, rating_sums, signature=None):
+        self.vocabs = vocabs
+        self.cells = cells
+        self.counts = counts
+        self.rating_sums = rating_sums
+        self.signature = signature
+
+    # Function to build the cube from a catalog or report DataFrame (columns are matched like everywhere else)
+    @classmethod
+    def from_frame(cls, data, signature=None):
+        names = normalize_columns(data.columns)
+        columns = resolve_columns(names)
+        frame = dict(zip(names, (data[column] for column in data.columns)))
+
+        # Group identical titles first: genre list, country list, year, type and rating bucket
+        genre_codes, genre_uniques = pd.factorize(frame[columns['genres']].astype(object))
+        country_codes, country_uniques = pd.factorize(frame[columns['countries']].astype(object))
+        genre_codes[genre_codes < 0] = len(genre_uniques)
+        country_codes[country_codes < 0] = len(country_uniques)
+
+        years = pd.to_numeric(frame[columns['year']], errors='coerce').to_numpy(dtype=float)
+        year_values, year_codes = np.unique(np.nan_to_num(years, nan=-1).round().astype(np.int64), return_inverse=True)
+        type_codes, type_vocab = pd.factorize(frame['type'].astype(object) if 'type' in frame else pd.Series([''] * len(data)))
+        type_vocab = np.append(np.asarray(type_vocab, dtype=str), '')
+        type_codes[type_codes < 0] = len(type_vocab) - 1
+        ratings = pd.to_numeric(frame[columns['rating']], errors='coerce').to_numpy(dtype=float)
+        # Ratings outside 0..10 count as missing (bucket -1), like in report_writer.top_pick_mask
+        low, high = VALID_RANGES['rating']
+        ratings = np.where((ratings < low) | (ratings > high), np.nan, ratings)
+        buckets = np.where(np.isnan(ratings), -1, np.round(ratings * 10)).astype(np.int64)
+
+        sizes = [len(country_uniques) + 1, len(genre_uniques) + 1, len(year_values), len(type_vocab), 102]
+        group_key = (((genre_codes * sizes[0] + country_codes) * sizes[2] + year_codes) * sizes[3] + type_codes) * sizes[4] + buckets + 1
+        group_key, counts, sums = combine(group_key, np.ones(len(data)), np.nan_to_num(ratings))
+        rest, bucket = np.divmod(group_key, sizes[4])
+        rest, type_code = np.divmod(rest, sizes[3])
+        rest, year_code = np.divmod(rest, sizes[2])
+        genre_group, country_group = np.divmod(rest, sizes[0])
+
+        # Expand every group into its genres, then into its countries, adding up as we go
+        genre_vocab, genre_offsets, genre_tokens = token_lists(genre_uniques)
+        country_vocab, country_offsets, country_tokens = token_lists(country_uniques)
+        index, genre = expand(genre_group, genre_offsets, genre_tokens)
+        shape = (len(country_vocab), len(genre_vocab), len(year_values), len(type_vocab), 102)
+
+        # Start from empty arrays, so a report without titles gives an empty cube
+        keys, cell_counts, cell_sums = [np.empty(0, dtype=np.int64)], [np.empty(0)], [np.empty(0)]
+        step = max(1, BUILD_CHUNK // len(country_vocab))
+        for start in range(0, len(index), step):
+            part = index[start:start + step]
+            part_genre = genre[start:start + step]
+            inner, country = expand(country_group[part], country_offsets, country_tokens)
+            rows = part[inner]
+            key = np.ravel_multi_index((country, part_genre[inner], year_code[rows], type_code[rows], bucket[rows]), shape)
+            key, part_counts, part_sums = combine(key, counts[rows], sums[rows])
+            keys.append(key)
+            cell_counts.append(part_counts)
+            cell_sums.append(part_sums)
+        key, cell_counts, cell_sums = combine(np.concatenate(keys), np.concatenate(cell_counts), np.concatenate(cell_sums))
+
+        cells = np.stack(np.unravel_index(key, shape)).astype(np.int16 if max(shape) < 2 ** 15 else np.int32)
+        vocabs = {'country': country_vocab, 'genre': genre_vocab, 'year': year_values,
+                  'type': type_vocab, 'bucket': np.arange(-1, 101)}
+        return cls(vocabs, cells, cell_counts.astype(np.int64), cell_sums, signature)
+
+    # Function to build the cube of a data.csv file or a top picks report
+    # load reads the report into a DataFrame (default dataset_cache.load_report); the viewer passes its
+    # cache, so a report it already loaded is not read again.
+    @classmethod
+    def build(cls, path, load=None):
+        signature = file_signature(path)
+        if path.endswith('.txt'):
+            if load is None:
+                from dataset_cache import load_report as load
+            data = load(path)
+        else:
+            # Typed like every other reader; report_values gives back the ratings as written in the CSV
+            from report_writer import report_values
+            schema = schema_for(path)
+            data = report_values(schema.read(path, extra=('type',)), schema.columns)
+        return cls.from_frame(data, signature=signature)
+
+    # Function to save the cube; two chart jobs may build it at once, so it is moved into place whole (see save_npz)
+    def save(self, path):
+        return save_npz(path, cells=self.cells, counts=self.counts, rating_sums=self.rating_sums,
+                        signature=self.signature if self.signature is not None else np.zeros(2, dtype=np.int64),
+                        **{f'vocab_{name}': values for name, values in self.vocabs.items()})
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as saved:
+            vocabs = {name: saved[f'vocab_{name}'] for name in DIMENSIONS}
+            return cls(vocabs, saved['cells'], saved['counts'], saved['rating_sums'], signature=saved['signature'])
+
+    def __len__(self):
+        return self.cells.shape[1]
+
+    # Function to look up the codes of some members of a dimension (unknown members are skipped)
+    def member_codes(self, dimension, values):
+        vocab = self.vocabs[dimension].tolist()
+        return [vocab.index(value) for value in values if value in vocab]
+
+    # Function to find the contiguous cells of one country, and of one genre within it, with binary searches
+    def cell_range(self, country_code=None, genre_code=None):
+        start, stop = 0, len(self)
+        if country_code is None:
+            return start, stop
+        start, stop = np.searchsorted(self.cells[0], [country_code, country_code + 1])
+        if genre_code is not None:
+            genres = self.cells[1][start:stop]
+            start, stop = start + np.searchsorted(genres, [genre_code, genre_code + 1])
+        return int(start), int(stop)
+
+    # Function to answer a roll-up: titles (and their mean rating) per combination of the `by` dimensions
+    # by may contain 'country', 'genre', 'year', 'decade', 'type' and 'rating'; filters narrow the titles first.
+    def rollup(self, by=(), country=None, genre=None, type=None, year_from=None, year_to=None, rating_above=None):
+        by = [by] if isinstance(by, str) else list(by)
+
+        # The members to read per multi-valued dimension: the ones asked for, every real member when
+        # grouping by it, otherwise only ALL
+        wanted = {}
+        for dimension, values in (('country', country), ('genre', genre)):
+            if values is not None:
+                wanted[dimension] = self.member_codes(dimension, [values] if isinstance(values, str) else values)
+            elif dimension in by:
+                wanted[dimension] = None
+            else:
+                wanted[dimension] = self.member_codes(dimension, [ALL])
+
+        # Cells are sorted by country, then genre: a single country (and a single genre within it) is one slice
+        single = {dimension: codes[0] for dimension, codes in wanted.items() if codes is not None and len(codes) == 1}
+        narrowed = [] if 'country' not in single else ['country', 'genre'] if 'genre' in single else ['country']
+        start, stop = self.cell_range(single.get('country'), single.get('genre') if 'genre' in narrowed else None)
+        cells = self.cells[:, start:stop]
+        counts, rating_sums = self.counts[start:stop], self.rating_sums[start:stop]
+
+        mask = np.ones(stop - start, dtype=bool)
+        for axis, dimension in enumerate(('country', 'genre')):
+            codes = wanted[dimension]
+            if codes is None:
+                mask &= cells[axis] != self.member_codes(dimension, [ALL])[0]
+            elif dimension not in narrowed:
+                mask &= np.isin(cells[axis], codes)
+        if type is not None:
+            mask &= np.isin(cells[3], self.member_codes('type', [type] if isinstance(type, str) else type))
+
+        years = self.vocabs['year'][cells[2]]
+        if year_from is not None:
+            mask &= years >= year_from
+        if year_to is not None:
+            mask &= years <= year_to
+        buckets = self.vocabs['bucket'][cells[4]]
+        if rating_above is not None:
+            # Ratings have one decimal, so "above 8" means bucket 81 and up
+            mask &= buckets > int(np.floor(rating_above * 10 + 1e-9))
+
+        labels = {}
+        for dimension in by:
+            if dimension == 'decade':
+                labels[dimension] = np.where(years < 0, -1, (years // 10) * 10)[mask]
+            elif dimension == 'rating':
+                labels[dimension] = np.where(buckets < 0, np.nan, buckets / 10)[mask]
+            else:
+                labels[dimension] = self.vocabs[dimension][cells[DIMENSIONS.index(dimension)]][mask]
+
+        counts = counts[mask]
+        frame = pd.DataFrame({**labels, 'titles': counts, 'rated': np.where(buckets[mask] >= 0, counts, 0),
+                              'rating_sum': rating_sums[mask]})
+        if by:
+            frame = frame.groupby(by, sort=True, dropna=False).sum()
+        else:
+            frame = frame.sum().to_frame().T
+        frame['mean_rating'] = frame['rating_sum'] / frame['rated'].where(frame['rated'] > 0)
+        return frame[['titles', 'mean_rating']]
+
+    # Function to count the most common genres, like charts.top_genre_counts but from the cube
+    def top_genres(self, n=10, **filters):
+        counts = self.rollup('genre', **filters)['titles']
+        counts = counts[counts > 0].sort_values(ascending=False, kind='stable').head(n)
+        counts.index.name = None
+        return counts.rename('count')
+
+# Function to load the cube of a dataset or report, building and saving it first when missing or stale
+def load_or_build_cube(path, load=None):
+    saved = cube_path(path)
+    if os.path.exists(saved):
+        cube = AggregateCube.load(saved)
+        if np.array_equal(cube.signature, file_signature(path)):
+            return cube
+    cube = AggregateCube.build(path, load)
+    cube.save(saved)
+    return cube
+
+def main():
+    parser = argparse.ArgumentParser(description="Ask the aggregate cube how many titles match")
+    parser.add_argument('path', nargs='?', default='data.csv', help="data.csv or a top picks report")
+    parser.add_argument('--country', default=None)
+    parser.add_argument('--genre', default=None)
+    parser.add_argument('--type', default=None)
+    parser.add_argument('--above', type=float, default=None, help="only titles rated above this")
+    parser.add_argument('--year-from', type=int, default=None)
+    parser.add_argument('--year-to', type=int, default=None)
+    parser.add_argument('--by', action='append', default=[], choices=['country', 'genre', 'year', 'decade', 'type', 'rating'])
+    parser.add_argument('--top', type=int, default=None, help="only print the N largest groups")
+    args = parser.parse_args()
+
+    cube = load_or_build_cube(args.path)
+    result = cube.rollup(args.by, args.country, args.genre, args.type, args.year_from, args.year_to, args.above)
+    if args.top is not None:
+        result = result.sort_values('titles', ascending=False, kind='stable').head(args.top)
+    print(result.to_string())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+import argparse
+import sys
+
+"""
+This is the single command line entry point for the project: download the Kaggle dataset, analyze it into
+the top picks report, print the report, or open the viewer. Only argparse is imported up front; pandas,
+kaggle, tkinter and matplotlib are imported inside the subcommand that needs them, so `--help` and the
+analysis-only path start quickly.
+
+    python datamax.py download
+    python datamax.py download octopusteam/full-hbo-max-dataset --dest data
+    python datamax.py analyze data.csv --chunksize 100000
+    python datamax.py batch data.csv --threshold 7.5 --threshold 8.5 --by type --by decade
+    python datamax.py report --limit 10
+    python datamax.py view
+    python datamax.py export --all-countries --format png --format svg
+    python datamax.py serve --port 8765
+    python datamax.py similar data.csv "Band of Brothers" --k 10
+    python datamax.py --trace trace.json analyze data.csv
+
+--trace (or the DATAMAX_TRACE environment variable) records how long every stage took, see instrument.py.
+"""
+
+REPORT_FILE = 'HBO_Max_Top_Picks.txt'
+
+# Function to download the dataset and analyze it, like running download_and_analyze.py
+# With dataset IDs on the command line nothing is asked: they are fetched concurrently and only when changed.
+def run_download(args):
+    from download_and_analyze import analyze_hbo_data, download_kaggle_dataset
+    if not args.dataset_ids:
+        csv_file_path = download_kaggle_dataset()
+    else:
+        import os
+        from downloader import KaggleSource, download_all, print_results
+        results = download_all(KaggleSource(), args.dataset_ids, args.dest, args.workers)
+        print_results(results)
+        first = results[0]
+        csv_file_path = os.path.join(first['folder'], 'data.csv') if first['status'] != 'failed' else None
+    if csv_file_path and not args.no_analyze:
+        analyze_hbo_data(csv_file_path)
+
+# Function to turn data.csv into the top picks report
+def run_analyze(args):
+    from download_and_analyze import analyze_hbo_data
+    analyze_hbo_data(args.csv_path, chunksize=args.chunksize, top_n=args.top, output_file=args.output,
+                     incremental=args.incremental)
+
+# Function to write reports for several thresholds and slices from one load of data.csv
+def run_batch(args):
+    from rating_index import RatingIndex, write_batch
+    index = RatingIndex.from_csv(args.csv_path)
+    for output_file, rows in write_batch(index, args.output_dir, args.threshold or [7.5], args.top, args.by):
+        print(f"{rows:8d} titles saved to {output_file}")
+
+# Function to analyze many CSV files in parallel and merge their top picks into one report
+def run_shards(args):
+    from sharded_analysis import analyze_shards
+    analyze_shards(args.pattern, args.output, args.shard_dir, args.threshold, args.top, args.workers)
+
+# Function to print one page of an existing report; only the records on that page are decoded
+def run_report(args):
+    from report_offsets import ReportReader
+    try:
+        reader = ReportReader(args.report)
+    except FileNotFoundError:
+        print(f"Report '{args.report}' not found. Run 'datamax.py analyze' first.")
+        return 1
+    with reader:
+        start = (args.page - 1) * args.limit
+        print(f"{len(reader)} titles in {args.report}")
+        print(reader.frame(range(start, min(len(reader), start + args.limit))).to_string(index=False))
+
+# Function to render every chart to files without a window
+def run_export(args):
+    from export_charts import export_charts
+    result = export_charts(args.report, args.output_dir, args.country, tuple(args.format or ['png']), args.workers,
+                           all_countries=args.all_countries)
+    for row in result['charts']:
+        print(f"{row['slice']:>6} {row['chart']:15s} render {row['render_seconds'] * 1000:8.2f} ms")
+    print(f"{len(result['charts'])} charts saved to {args.output_dir} in {result['wall_seconds']:.2f}s")
+
+# Function to serve the report as a JSON query API
+def run_serve(args):
+    import asyncio
+    from query_service import serve
+    try:
+        asyncio.run(serve(args.report, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+# Function to list the titles most similar to one title
+def run_similar(args):
+    from similarity import SimilarityEngine
+    engine = SimilarityEngine.from_csv(args.csv_path, countries=args.countries)
+    try:
+        print(engine.similar(args.title, args.k, args.metric).to_string(index=False))
+    except KeyError as e:
+        print(e.args[0])
+        return 1
+
+# Function to count titles per country, genre, year, type or rating from the aggregate cube
+def run_cube(args):
+    from cube import load_or_build_cube
+    cube = load_or_build_cube(args.path)
+    result = cube.rollup(args.by, args.country, args.genre, args.type, args.year_from, args.year_to, args.above)
+    if args.top is not None:
+        result = result.sort_values('titles', ascending=False, kind='stable').head(args.top)
+    print(result.to_string())
+
+# Function to open the Tk viewer
+def run_view(args):
+    import hbo_dataMax
+    hbo_dataMax.REPORT_FILE = args.report
+    hbo_dataMax.create_gui()
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='datamax', description="HBO Max top picks from the Kaggle dataset")
+    parser.add_argument('--trace', metavar='FILE', help="record stage timings to FILE (.json for a Chrome trace, else JSON lines)")
+    parser.add_argument('--trace-memory', action='store_true', help="also record the peak memory of every stage")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    download = commands.add_parser('download', help="download a Kaggle dataset and analyze it")
+    download.add_argument('dataset_ids', nargs='*', help="dataset IDs to fetch without prompting (the first is analyzed)")
+    download.add_argument('--dest', default='data', help="folder for the datasets given on the command line")
+    download.add_argument('--workers', type=int, default=4, help="datasets downloaded at the same time")
+    download.add_argument('--no-analyze', action='store_true', help="only download, skip the analysis")
+    download.set_defaults(handler=run_download)
+
+    analyze = commands.add_parser('analyze', help="generate the top picks report from data.csv")
+    analyze.add_argument('csv_path', nargs='?', default='data.csv')
+    analyze.add_argument('--output', default=REPORT_FILE, help="report file to write")
+    analyze.add_argument('--chunksize', type=int, default=None, help="stream the CSV in chunks of this many rows")
+    analyze.add_argument('--top', type=int, default=None, help="only keep the best N titles")
+    analyze.add_argument('--incremental', action='store_true', help="only reprocess rows changed since the last run")
+    analyze.set_defaults(handler=run_analyze)
+
+    batch = commands.add_parser('batch', help="write reports for several thresholds and slices in one pass")
+    batch.add_argument('csv_path', nargs='?', default='data.csv')
+    batch.add_argument('--threshold', type=float, action='append', help="IMDb rating cutoff (repeatable)")
+    batch.add_argument('--top', type=int, default=None, help="only keep the best N titles per report")
+    batch.add_argument('--by', action='append', default=[], choices=['type', 'decade'], help="also write one report per slice")
+    batch.add_argument('--output-dir', default='reports')
+    batch.set_defaults(handler=run_batch)
+
+    shards = commands.add_parser('shards', help="analyze many CSV files in parallel and merge their top picks")
+    shards.add_argument('pattern', help="a directory (searched for *.csv) or a glob pattern such as 'dumps/*.csv'")
+    shards.add_argument('--output', default=REPORT_FILE, help="global report to write")
+    shards.add_argument('--shard-dir', default='shards', help="folder for the report of every file")
+    shards.add_argument('--threshold', type=float, default=7.5)
+    shards.add_argument('--top', type=int, default=None, help="only keep the best N titles")
+    shards.add_argument('--workers', type=int, default=None, help="worker processes (default: one per core)")
+    shards.set_defaults(handler=run_shards)
+
+    report = commands.add_parser('report', help="print the titles of an existing report")
+    report.add_argument('--report', default=REPORT_FILE)
+    report.add_argument('--limit', type=int, default=20, help="number of titles to print")
+    report.add_argument('--page', type=int, default=1, help="page of --limit titles to print, counting from 1")
+    report.set_defaults(handler=run_report)
+
+    export = commands.add_parser('export', help="render the charts to PNG/SVG files, optionally per country")
+    export.add_argument('--report', default=REPORT_FILE)
+    export.add_argument('--output-dir', default='charts')
+    export.add_argument('--country', action='append', default=[], help="also render the slice for this country (repeatable)")
+    export.add_argument('--all-countries', action='store_true', help="render one slice per country in the report")
+    export.add_argument('--format', action='append', choices=['png', 'svg'], help="file format (repeatable, default png)")
+    export.add_argument('--workers', type=int, default=None, help="worker processes (default: one per core)")
+    export.set_defaults(handler=run_export)
+
+    serve = commands.add_parser('serve', help="answer top picks queries over HTTP as JSON")
+    serve.add_argument('--report', default=REPORT_FILE)
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8765)
+    serve.set_defaults(handler=run_serve)
+
+    similar = commands.add_parser('similar', help="list the titles most similar to a title by genre")
+    similar.add_argument('csv_path', nargs='?', default='data.csv')
+    similar.add_argument('title')
+    similar.add_argument('--k', type=int, default=10)
+    similar.add_argument('--metric', choices=['jaccard', 'cosine'], default='jaccard')
+    similar.add_argument('--countries', action='store_true', help="also compare where the titles are available")
+    similar.set_defaults(handler=run_similar)
+
+    cube = commands.add_parser('cube', help="count titles by country, genre, year, type or rating from a saved cube")
+    cube.add_argument('path', nargs='?', default='data.csv', help="data.csv or a top picks report")
+    cube.add_argument('--country', default=None)
+    cube.add_argument('--genre', default=None)
+    cube.add_argument('--type', default=None)
+    cube.add_argument('--above', type=float, default=None, help="only titles rated above this")
+    cube.add_argument('--year-from', type=int, default=None)
+    cube.add_argument('--year-to', type=int, default=None)
+    cube.add_argument('--by', action='append', default=[], choices=['country', 'genre', 'year', 'decade', 'type', 'rating'])
+    cube.add_argument('--top', type=int, default=None, help="only print the N largest groups")
+    cube.set_defaults(handler=run_cube)
+
+    view = commands.add_parser('view', help="open the viewer with its table and charts")
+    view.add_argument('--report', default=REPORT_FILE)
+    view.set_defaults(handler=run_view)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.trace:
+        import instrument
+        instrument.enable(args.trace, memory=args.trace_memory)
+    return args.handler(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+import os
+import threading
+import pandas as pd
+from instrument import file_size, span
+from sidecar import META_FILE, load_sidecar, sidecar_is_fresh, sidecar_path
+
+"""
+This is a small cache for the HBO Max top picks report. The GUI used to re-read and re-parse the whole
+text file every time a button was clicked, so now the file is parsed once into a typed DataFrame and kept
+in memory. The file is only parsed again when its modification time or size changes on disk.
+When the analysis also wrote the columnar sidecar next to the report, that is memory-mapped instead and
+the text is not parsed at all.
+"""
+
+# The prefixes of the text report mapped to the column names the GUI works with.
+REPORT_FIELDS = (
+    ('Title:', 'title'),
+    ('Genre:', 'genre'),
+    ('Year:', 'year'),
+    ('IMDb Rating:', 'imdb rating'),
+    ('Available in:', 'available regions'),
+)
+
+# Columns that hold numbers in the report and should not be kept as strings.
+NUMERIC_COLUMNS = ('year', 'imdb rating')
+
+# Function to parse the Title:/Genre: text report into a typed DataFrame
+def parse_report(file_path):
+    with open(file_path, 'r') as file:
+        lines = file.read().splitlines()
+
+    # Process the data line by line into a list of dictionaries
+    data_list = []
+    current_entry = {}
+    for line in lines:
+        line = line.strip()
+        for prefix, column in REPORT_FIELDS:
+            if line.startswith(prefix):
+                if column == 'title':
+                    if current_entry:
+                        data_list.append(current_entry)  # Save the previous entry if it exists
+                    current_entry = {}
+                current_entry[column] = line[len(prefix):].strip()
+                break
+
+    # Don't forget to append the last entry
+    if current_entry:
+        data_list.append(current_entry)
+
+    data = pd.DataFrame(data_list)
+    data.columns = data.columns.str.strip().str.lower()
+
+    # Years and ratings are written as text, so convert them once here instead of in every plot.
+    for column in NUMERIC_COLUMNS:
+        if column in data.columns:
+            data[column] = pd.to_numeric(data[column], errors='coerce')
+
+    return data
+
+# Function to load the report, preferring the memory-mapped sidecar when it is up to date
+def load_report(file_path):
+    if sidecar_is_fresh(file_path):
+        with span('load_data', path=file_path, source='sidecar') as stage:
+            data = load_sidecar(sidecar_path(file_path))
+            stage.add(rows=len(data))
+        return data
+    with span('load_data', path=file_path, source='text', bytes_read=lambda: file_size(file_path)) as stage:
+        data = parse_report(file_path)
+        stage.add(rows=len(data))
+    return data
+
+# Function to build the key that tells us whether the report (or its sidecar) changed on disk
+def report_signature(file_path):
+    stat = os.stat(file_path)
+    try:
+        meta = os.stat(os.path.join(sidecar_path(file_path), META_FILE))
+        sidecar = (meta.st_mtime_ns, meta.st_size)
+    except FileNotFoundError:
+        sidecar = None
+    return (stat.st_mtime_ns, stat.st_size, sidecar)
+
+# The cache keeps one parsed DataFrame per file, keyed on the file's mtime and size.
+class DatasetCache:
+    def __init__(self, loader=load_report, signature=report_signature):
+        self.loader = loader
+        self.signature = signature
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    # Function to return the parsed file, only loading it again when the file changed
+    def get(self, file_path):
+        path = os.path.abspath(file_path)
+        signature = self.signature(path)  # raises FileNotFoundError just like open() did
+
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == signature:
+                self.hits += 1
+                return entry[1]
+
+        data = self.loader(path)
+
+        with self._lock:
+            self.misses += 1
+            self._entries[path] = (signature, data)
+        return data
+
+    # Function to forget one file (or every file) so the next get() reloads it
+    def invalidate(self, file_path=None):
+        with self._lock:
+            if file_path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(os.path.abspath(file_path), None)
+
+    # Function to share the hit/miss counters, mostly to confirm repeated clicks hit the cache
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries)}
+
+# One shared cache for every part of the program that reads the report.
+dataset_cache = DatasetCache()
@@ -1,8 +1,10 @@
 #!/usr/bin/env python3
-from kaggle.api.kaggle_api_extended import KaggleApi
 import os
-import difflib
-import pandas as pd
+from instrument import file_size, span
+from incremental import incremental_top_picks
+from report_writer import rank_rows, report_values, write_report
+from schema import describe_problems, schema_for, validate
+from streaming_analysis import DEFAULT_CHUNKSIZE, stream_top_picks
 
 """
 This script downloads a dataset from Kaggle using the API and then performs analysis on the HBO Max data
@@ -15,7 +17,8 @@ def download_kaggle_dataset():
     kaggle_username = input("Enter your Kaggle username: ")
     dataset_id = input("Enter the dataset ID (e.g., 'octopusteam/full-hbo-max-dataset'): ")
 
-    # Set up Kaggle API client
+    # Set up Kaggle API client (imported here so analyzing a local file does not need kaggle)
+    from kaggle.api.kaggle_api_extended import KaggleApi
     api = KaggleApi()
     api.authenticate()
 
@@ -28,7 +31,9 @@ def download_kaggle_dataset():
     
     # Download the dataset
     try:
-        api.dataset_download_files(dataset_id, path=save_path, unzip=True)
+        with span('download', dataset=dataset_id) as stage:
+            api.dataset_download_files(dataset_id, path=save_path, unzip=True)
+            stage.add(bytes_written=lambda: file_size(os.path.join(save_path, 'data.csv')))
         print(f"Dataset '{dataset_id}' downloaded successfully to '{save_path}'.")
     except Exception as e:
         print(f"An error occurred while downloading the dataset: {e}")
@@ -38,60 +43,57 @@ def download_kaggle_dataset():
     return os.path.join(save_path, 'data.csv')
 
 # Function to analyze HBO Max data and generate top picks
-def analyze_hbo_data(file_path):
+# Passing a chunksize streams the CSV in chunks instead, so memory stays flat on very large dumps.
+# With incremental=True only the rows that changed since the last run are reprocessed.
+def analyze_hbo_data(file_path, chunksize=None, top_n=None, output_file='HBO_Max_Top_Picks.txt', incremental=False):
     if not os.path.exists(file_path):
         print(f"Data file '{file_path}' not found.")
         return
 
-    # Load the dataset
-    data = pd.read_csv(file_path)
-    print("Initial Columns:", data.columns)
-
-    # Normalize column names
-    data.columns = data.columns.str.strip().str.lower()
-    print("Normalized Columns:", data.columns)
-
-    # Find the closest matches for the expected column names
-    imdb_rating_col = difflib.get_close_matches('imdb_rating', data.columns, n=1, cutoff=0.6)
-    genres_col = difflib.get_close_matches('genre', data.columns, n=1, cutoff=0.6)
-    release_year_col = difflib.get_close_matches('year', data.columns, n=1, cutoff=0.6)
-    available_countries_col = difflib.get_close_matches('available_regions', data.columns, n=1, cutoff=0.6)
-
-    # Use the found column names or default to known names if not found
-    imdb_rating_col = imdb_rating_col[0] if imdb_rating_col else 'imdbaveragerating'
-    genres_col = genres_col[0] if genres_col else 'genres'
-    release_year_col = release_year_col[0] if release_year_col else 'releaseyear'
-    available_countries_col = available_countries_col[0] if available_countries_col else 'availablecountries'
-
-    print(f"Using columns - IMDb Rating: {imdb_rating_col}, Genres: {genres_col}, Year: {release_year_col}, Available Regions: {available_countries_col}")
-
-    # Filter for top picks with IMDb rating > 7.5
-    try:
-        top_picks = data[data[imdb_rating_col] > 7.5]
-    except KeyError:
-        print("Error: IMDb rating column not found. Please check the dataset.")
-        return
-
-    # Sort by IMDb rating in descending order
-    top_picks = top_picks.sort_values(by=imdb_rating_col, ascending=False)
-
-    # Select relevant columns
-    try:
-        top_picks_list = top_picks[['title', genres_col, release_year_col, imdb_rating_col, available_countries_col]]
-    except KeyError as e:
-        print(f"Error: {e}. One of the required columns is missing.")
-        return
-
-    # Save the top picks to a text file
-    output_file = 'HBO_Max_Top_Picks.txt'
-    with open(output_file, 'w') as file:
-        for _, row in top_picks_list.iterrows():
-            file.write(f"Title: {row['title']}\n")
-            file.write(f"Genre: {row[genres_col]}\n")
-            file.write(f"Year: {row[release_year_col]}\n")
-            file.write(f"IMDb Rating: {row[imdb_rating_col]}\n")
-            file.write(f"Available in: {row[available_countries_col]}\n")
-            file.write("\n")
+    if incremental:
+        try:
+            return incremental_top_picks(file_path, output_file)
+        except KeyError as e:
+            print(f"Error: {e}. One of the required columns is missing.")
+            return
+
+    if chunksize or top_n:
+        try:
+            return stream_top_picks(file_path, output_file, chunksize=chunksize or DEFAULT_CHUNKSIZE, top_n=top_n)
+        except KeyError as e:
+            print(f"Error: {e}. One of the required columns is missing.")
+            return
+
+    # Resolve the columns (once per header, see schema.py), then load only those with explicit dtypes
+    with span('column_resolution'):
+        try:
+            schema = schema_for(file_path).check()
+        except KeyError as e:
+            print(f"Error: {e}. One of the required columns is missing.")
+            return
+        columns = schema.columns
+    print(f"Using columns - IMDb Rating: {columns['rating']}, Genres: {columns['genres']}, Year: {columns['year']}, Available Regions: {columns['countries']}")
+
+    with span('csv_load', path=file_path) as stage:
+        data = schema.read(file_path)
+        stage.add(rows=len(data), bytes_read=lambda: file_size(file_path))
+    print("Loaded Columns:", data.columns)
+
+    problems = validate(data, schema)
+    if not problems.empty:
+        print(f"Warning: {describe_problems(problems)}")
+
+    # Filter for top picks with IMDb rating > 7.5, highest first (ties keep their order in data.csv)
+    with span('filter_sort', rows=len(data)) as stage:
+        top_picks = data.iloc[rank_rows(data[columns['rating']], 7.5)]
+        stage.add(picks=len(top_picks))
+
+    # Select relevant columns, in report order
+    top_picks_list = top_picks[[columns[key] for key in ('title', 'genres', 'year', 'rating', 'countries')]]
+    top_picks_list = report_values(top_picks_list, columns)
+
+    # Save the top picks to a text file (and its columnar sidecar)
+    write_report(top_picks_list, output_file)
 
     print(f"Top picks saved to {output_file}")
 
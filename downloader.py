@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+import argparse
+import base64
+import hashlib
+import json
+import os
+import shutil
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from http.client import IncompleteRead
+from urllib.error import HTTPError
+from urllib.parse import urlsplit
+from urllib.request import HTTPRedirectHandler, Request, build_opener
+
+"""
+This downloads Kaggle datasets without prompting and without fetching what is already there. Several
+dataset IDs are fetched at the same time, each into its own folder. An interrupted download is resumed
+with an HTTP Range request from where the .part file stopped. The archive is checked against the checksum
+the server announces (and always hashed with SHA-256). Nothing is downloaded when the server reports the
+same version as last time. Every file is copied out of the zip in chunks, never read whole into memory,
+and files whose CRC did not change are left alone.
+
+Where the archive comes from is pluggable: KaggleSource talks to the Kaggle REST API with the credentials
+from ~/.kaggle/kaggle.json (or KAGGLE_USERNAME / KAGGLE_KEY), HttpSource downloads <base_url>/<id>.zip
+from any server. benchmarks/download_check.py runs everything against a local HTTP server.
+
+    python downloader.py octopusteam/full-hbo-max-dataset another/dataset --dest data
+"""
+
+CHUNK_SIZE = 1 << 20
+MANIFEST_FILE = 'download.json'
+KAGGLE_DOWNLOAD_URL = 'https://www.kaggle.com/api/v1/datasets/download'
+
+# Raised when a downloaded archive does not match the checksum the server announced.
+class ChecksumError(Exception):
+    pass
+
+# What the source knows about a dataset before downloading it.
+class RemoteInfo:
+    def __init__(self, url, version=None, size=None, sha256=None, md5=None):
+        self.url = url
+        self.version = version
+        self.size = size
+        self.sha256 = sha256
+        self.md5 = md5
+
+# Follows redirects like urllib does, but drops the Authorization header when the redirect leaves the host,
+# so Kaggle credentials never reach the storage server the download is redirected to.
+class SameHostRedirectHandler(HTTPRedirectHandler):
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        request = super().redirect_request(req, fp, code, msg, headers, newurl)
+        if request is not None and urlsplit(newurl).netloc != urlsplit(req.full_url).netloc:
+            request.remove_header('Authorization')
+        return request
+
+# A source that downloads <base_url>/<dataset id>.zip over HTTP(S), with optional extra headers.
+# The headers (credentials) are only sent to the host of base_url.
+class HttpSource:
+    def __init__(self, base_url, headers=None, suffix='.zip', timeout=60):
+        self.base_url = base_url.rstrip('/')
+        self.headers = dict(headers or {})
+        self.suffix = suffix
+        self.timeout = timeout
+        self._opener = build_opener(SameHostRedirectHandler)
+
+    def url(self, dataset_id):
+        return f"{self.base_url}/{dataset_id}{self.suffix}"
+
+    # Function to pick the headers for a URL: ours for base_url's host, none for anywhere else
+    def headers_for(self, url):
+        return dict(self.headers) if urlsplit(url).netloc == urlsplit(self.base_url).netloc else {}
+
+    # Function to ask the server for the version, size and checksum of a dataset without downloading it
+    def describe(self, dataset_id):
+        url = self.url(dataset_id)
+        try:
+            with self._opener.open(Request(url, method='HEAD', headers=self.headers), timeout=self.timeout) as response:
+                headers = response.headers
+        except HTTPError as e:
+            if e.code in (403, 405, 501):
+                # Some servers do not answer HEAD; then the version is only known after downloading.
+                return RemoteInfo(url)
+            raise
+        return RemoteInfo(
+            response.url,
+            version=headers.get('ETag') or headers.get('Last-Modified'),
+            size=int(headers['Content-Length']) if headers.get('Content-Length') else None,
+            sha256=headers.get('X-Checksum-Sha256'),
+            md5=parse_md5(headers),
+        )
+
+    # Function to open the archive, starting at a byte offset; returns (response, whether the offset was honoured)
+    # info.url may be the signed URL a redirect led to, which gets no credentials (see headers_for).
+    def open(self, info, offset=0):
+        headers = self.headers_for(info.url)
+        if offset:
+            headers['Range'] = f'bytes={offset}-'
+            if info.version and not info.version.startswith('W/'):
+                # Only resume if the archive is still the one the .part came from; otherwise the server sends it whole
+                headers['If-Range'] = info.version
+        try:
+            response = self._opener.open(Request(info.url, headers=headers), timeout=self.timeout)
+        except HTTPError as e:
+            if e.code == 416 and offset:
+                # The server cannot serve from there (the file changed or the .part is too long): start over
+                return self.open(info, 0)
+            raise
+        if offset and response.status == 206 and content_range_start(response.headers) != offset:
+            # Only append bytes that start exactly where the .part file stops
+            response.close()
+            return self.open(info, 0)
+        return response, offset > 0 and response.status == 206
+
+# The Kaggle REST API, authenticated like the kaggle package but without needing it installed.
+class KaggleSource(HttpSource):
+    def __init__(self, username=None, key=None, timeout=60):
+        username, key = kaggle_credentials(username, key)
+        token = base64.b64encode(f"{username}:{key}".encode()).decode()
+        super().__init__(KAGGLE_DOWNLOAD_URL, {'Authorization': f'Basic {token}'}, suffix='', timeout=timeout)
+
+# Function to find the Kaggle credentials in the environment or in ~/.kaggle/kaggle.json (written by setup.py)
+def kaggle_credentials(username=None, key=None):
+    username = username or os.environ.get('KAGGLE_USERNAME')
+    key = key or os.environ.get('KAGGLE_KEY')
+    if username and key:
+        return username, key
+    config = os.path.join(os.environ.get('KAGGLE_CONFIG_DIR', os.path.expanduser('~/.kaggle')), 'kaggle.json')
+    try:
+        with open(config, 'r') as file:
+            saved = json.load(file)
+    except FileNotFoundError:
+        raise RuntimeError("No Kaggle credentials found. Run setup.py or set KAGGLE_USERNAME and KAGGLE_KEY.") from None
+    return saved['username'], saved['key']
+
+# Function to read the first byte of a Content-Range header like 'bytes 100-199/200' (None if there is none)
+def content_range_start(headers):
+    unit, _, spec = (headers.get('Content-Range') or '').partition(' ')
+    start = spec.partition('-')[0]
+    return int(start) if unit.strip().lower() == 'bytes' and start.isdigit() else None
+
+# Function to read an MD5 checksum from a Content-MD5 or x-goog-hash header (base64 encoded)
+def parse_md5(headers):
+    values = [headers.get('Content-MD5')] + [part.strip()[4:] for part in (headers.get('x-goog-hash') or '').split(',')
+                                             if part.strip().startswith('md5=')]
+    for value in values:
+        if value:
+            return base64.b64decode(value).hex()
+    return None
+
+# Function to turn a dataset ID like owner/name into a folder name
+def dataset_folder(dest, dataset_id):
+    return os.path.join(dest, dataset_id.replace('/', '__'))
+
+def load_manifest(folder):
+    try:
+        with open(os.path.join(folder, MANIFEST_FILE), 'r') as file:
+            return json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def save_manifest(folder, manifest):
+    path = os.path.join(folder, MANIFEST_FILE)
+    with open(path + '.tmp', 'w') as file:
+        json.dump(manifest, file, indent=2)
+    os.replace(path + '.tmp', path)
+
+# Function to hash what is already in a file, so a resumed download can keep hashing where it stopped
+def hash_file(path, *hashes):
+    with open(path, 'rb') as file:
+        while True:
+            block = file.read(CHUNK_SIZE)
+            if not block:
+                break
+            for digest in hashes:
+                digest.update(block)
+
+# Function to download the archive into archive_path, resuming from its .part file when it was left by
+# the same version (partial_version is the version the .part was started for)
+def fetch_archive(source, info, archive_path, partial_version):
+    part_path = archive_path + '.part'
+    sha256, md5 = hashlib.sha256(), hashlib.md5()
+    offset = 0
+    if os.path.exists(part_path) and info.version and partial_version == info.version:
+        offset = os.path.getsize(part_path)
+        if info.size is not None and offset > info.size:
+            offset = 0
+
+    if offset and offset == info.size:
+        # The last run got every byte but stopped before checking them; there is nothing left to request
+        hash_file(part_path, sha256, md5)
+    else:
+        response, resumed = source.open(info, offset)
+        with response:
+            if resumed:
+                hash_file(part_path, sha256, md5)
+                mode = 'ab'
+            else:
+                offset, mode = 0, 'wb'
+            with open(part_path, mode) as file:
+                while True:
+                    try:
+                        block = response.read(CHUNK_SIZE)
+                    except IncompleteRead as e:
+                        # Keep what did arrive; the next run resumes from there
+                        block = e.partial
+                    if not block:
+                        break
+                    file.write(block)
+                    sha256.update(block)
+                    md5.update(block)
+
+    size = os.path.getsize(part_path)
+    if info.size is not None and size < info.size:
+        raise ConnectionError(f"{info.url}: connection closed after {size} of {info.size} bytes; run again to resume")
+    expected = [(info.sha256, sha256.hexdigest()), (info.md5, md5.hexdigest())]
+    if (info.size is not None and size > info.size) or any(want and want.lower() != got for want, got in expected):
+        os.remove(part_path)
+        raise ChecksumError(f"{info.url}: downloaded archive does not match the announced size or checksum")
+    os.replace(part_path, archive_path)
+    return sha256.hexdigest(), offset
+
+# Function to extract a zip member by member in chunks, skipping files whose CRC did not change
+def extract_archive(archive_path, folder, previous_files):
+    files, extracted = {}, []
+    root = os.path.realpath(folder)
+    with zipfile.ZipFile(archive_path) as archive:
+        for member in archive.infolist():
+            if member.is_dir():
+                continue
+            target = os.path.realpath(os.path.join(folder, member.filename))
+            if not target.startswith(root + os.sep):
+                raise ValueError(f"Refusing to extract {member.filename} outside {folder}")
+            files[member.filename] = {'crc': member.CRC, 'size': member.file_size}
+            unchanged = previous_files.get(member.filename) == files[member.filename]
+            if unchanged and os.path.exists(target) and os.path.getsize(target) == member.file_size:
+                continue
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with archive.open(member) as source, open(target + '.tmp', 'wb') as output:
+                shutil.copyfileobj(source, output, CHUNK_SIZE)
+            os.replace(target + '.tmp', target)
+            extracted.append(member.filename)
+    return files, extracted
+
+# Function to bring one dataset up to date in dest/<owner>__<name>; returns a summary of what happened
+def download_dataset(source, dataset_id, dest='data', keep_archive=True):
+    folder = dataset_folder(dest, dataset_id)
+    os.makedirs(folder, exist_ok=True)
+    manifest = load_manifest(folder)
+    archive_path = os.path.join(folder, 'archive.zip')
+    info = source.describe(dataset_id)
+    result = {'dataset': dataset_id, 'folder': folder, 'version': info.version}
+
+    files_present = manifest.get('files') and all(os.path.exists(os.path.join(folder, name)) for name in manifest['files'])
+    if info.version and manifest.get('version') == info.version and files_present:
+        return {**result, 'status': 'unchanged', 'downloaded_bytes': 0, 'extracted': []}
+
+    # Remember which version the .part is for before saving the new one, so a .part of an older version is not resumed
+    partial_version = manifest.get('partial_version')
+    manifest['partial_version'] = info.version
+    save_manifest(folder, manifest)
+    sha256, resumed_from = fetch_archive(source, info, archive_path, partial_version)
+    downloaded = os.path.getsize(archive_path) - resumed_from
+
+    if manifest.get('sha256') == sha256 and files_present:
+        # Same bytes as last time (the server just did not tell us its version up front)
+        files, extracted = manifest['files'], []
+    else:
+        files, extracted = extract_archive(archive_path, folder, manifest.get('files', {}))
+    if not keep_archive:
+        os.remove(archive_path)
+
+    save_manifest(folder, {'dataset': dataset_id, 'version': info.version, 'sha256': sha256, 'files': files})
+    status = 'resumed' if resumed_from else 'downloaded'
+    return {**result, 'status': status, 'downloaded_bytes': downloaded, 'resumed_from': resumed_from, 'extracted': extracted}
+
+# Function to download several datasets at the same time; failures are reported per dataset
+def download_all(source, dataset_ids, dest='data', workers=4, keep_archive=True):
+    def run(dataset_id):
+        try:
+            return download_dataset(source, dataset_id, dest, keep_archive)
+        except Exception as e:
+            return {'dataset': dataset_id, 'status': 'failed', 'error': f"{type(e).__name__}: {e}"}
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(dataset_ids)))) as pool:
+        return list(pool.map(run, dataset_ids))
+
+# Function to print one line per dataset
+def print_results(results):
+    for result in results:
+        if result['status'] == 'failed':
+            print(f"{result['dataset']}: failed - {result['error']}")
+        else:
+            print(f"{result['dataset']}: {result['status']}, {result['downloaded_bytes']} bytes downloaded, "
+                  f"{len(result['extracted'])} files extracted to {result['folder']}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Download Kaggle datasets concurrently, resuming and skipping unchanged ones")
+    parser.add_argument('dataset_ids', nargs='+', help="dataset IDs like octopusteam/full-hbo-max-dataset")
+    parser.add_argument('--dest', default='data')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--base-url', default=None, help="download <base-url>/<id>.zip instead of using the Kaggle API")
+    parser.add_argument('--no-archive', action='store_true', help="delete the zip after extracting it")
+    args = parser.parse_args()
+
+    source = HttpSource(args.base_url) if args.base_url else KaggleSource()
+    print_results(download_all(source, args.dataset_ids, args.dest, args.workers, not args.no_archive))
+
+if __name__ == "__main__":
+    main()
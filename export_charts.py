@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from charts import CHARTS, CUBE_CHARTS
+from cube import ALL, load_or_build_cube
+
+"""
+This renders the charts of hbo_dataMax.py without a window, for the whole report and for any number of
+regional slices (one per country code). Every aggregate (histogram bins, genre counts, scatter points) is
+read per slice from the aggregate cube of the report (see cube.py), which is loaded once and only rebuilt
+when the report changed, so the titles themselves are never split or counted here. Only those small
+aggregates are sent to a pool of worker processes, which draw them with the Agg backend and save PNG/SVG
+files. Every chart reports how long its aggregate and its rendering took.
+"""
+
+REPORT_FILE = 'HBO_Max_Top_Picks.txt'
+ALL_TITLES = 'all'
+
+# Function to compute the aggregates of every chart for every slice from the cube of the report
+# With all_countries every country of the report gets a slice, taken from the cube's country members.
+def build_aggregates(cube, countries=(), all_countries=False):
+    if all_countries:
+        countries = [code for code in cube.vocabs['country'].tolist() if code != ALL]
+
+    slices = [(ALL_TITLES, {})] + [(code, {'country': code}) for code in countries]
+    aggregates = []
+    for name, filters in slices:
+        for kind, compute in CUBE_CHARTS.items():
+            start = time.perf_counter()
+            value = compute(cube, **filters)
+            aggregates.append((name, kind, value, time.perf_counter() - start))
+    return aggregates
+
+# Function that runs in a worker process: draw one chart with Agg and save it in every format
+def render_chart(name, kind, aggregate, output_dir, formats, dpi):
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    start = time.perf_counter()
+    figure = Figure(figsize=(6.4, 4.8))
+    FigureCanvasAgg(figure)
+    _, draw = CHARTS[kind]
+    draw(figure.add_subplot(), aggregate)
+    if name != ALL_TITLES:
+        figure.suptitle(f"Available in {name}")
+    figure.tight_layout()
+
+    paths = []
+    for extension in formats:
+        path = os.path.join(output_dir, f"{kind}_{name}.{extension}")
+        figure.savefig(path, dpi=dpi)
+        paths.append(path)
+    return name, kind, paths, time.perf_counter() - start
+
+# Function to export every chart for every slice in parallel and return one timing row per chart
+def export_charts(report_file=REPORT_FILE, output_dir='charts', countries=(), formats=('png',), workers=None, dpi=100,
+                  all_countries=False):
+    os.makedirs(output_dir, exist_ok=True)
+
+    start = time.perf_counter()
+    cube = load_or_build_cube(report_file)
+    load_seconds = time.perf_counter() - start
+    aggregates = build_aggregates(cube, countries, all_countries=all_countries)
+
+    timings = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            (pool.submit(render_chart, name, kind, value, output_dir, formats, dpi), aggregate_seconds)
+            for name, kind, value, aggregate_seconds in aggregates
+        ]
+        for future, aggregate_seconds in futures:
+            name, kind, paths, render_seconds = future.result()
+            timings.append({'slice': name, 'chart': kind, 'aggregate_seconds': aggregate_seconds,
+                            'render_seconds': render_seconds, 'files': paths})
+    return {'load_seconds': load_seconds, 'wall_seconds': time.perf_counter() - start, 'charts': timings}
+
+def main():
+    parser = argparse.ArgumentParser(description="Render the top picks charts to files without a window")
+    parser.add_argument('--report', default=REPORT_FILE)
+    parser.add_argument('--output-dir', default='charts')
+    parser.add_argument('--country', action='append', default=[], help="also render the slice for this country (repeatable)")
+    parser.add_argument('--all-countries', action='store_true', help="render one slice per country in the report")
+    parser.add_argument('--format', action='append', choices=['png', 'svg'], help="file format (repeatable, default png)")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: one per core)")
+    args = parser.parse_args()
+
+    result = export_charts(args.report, args.output_dir, args.country, tuple(args.format or ['png']), args.workers,
+                           all_countries=args.all_countries)
+
+    for row in result['charts']:
+        print(f"{row['slice']:>6} {row['chart']:15s} aggregate {row['aggregate_seconds'] * 1000:8.2f} ms"
+              f"   render {row['render_seconds'] * 1000:8.2f} ms")
+    print(f"{len(result['charts'])} charts in {result['wall_seconds']:.2f}s (cube loaded in {result['load_seconds']:.3f}s)")
+
+if __name__ == "__main__":
+    main()
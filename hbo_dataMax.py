@@ -1,136 +1,135 @@
 #!/usr/bin/env python3
-import pandas as pd
 import tkinter as tk
-from tkinter import ttk, messagebox
-import matplotlib.pyplot as plt
-
-# Load and normalize the data
-def load_data():
-    try:
-        # Try to open and read the file to inspect its content
-        with open("HBO_Max_Top_Picks.txt", 'r') as file:
-            lines = file.readlines()
-
-        # Process the data line by line into a list of dictionaries
-        data_list = []
-        current_entry = {}
-        
-        for line in lines:
-            line = line.strip()
-            if line.startswith('Title:'):
-                if current_entry:
-                    data_list.append(current_entry)  # Save the previous entry if it exists
-                current_entry = {'title': line[len('Title: '):].strip()}
-            elif line.startswith('Genre:'):
-                current_entry['genre'] = line[len('Genre: '):].strip()
-            elif line.startswith('Year:'):
-                current_entry['year'] = line[len('Year: '):].strip()
-            elif line.startswith('IMDb Rating:'):
-                current_entry['imdb rating'] = line[len('IMDb Rating: '):].strip()
-            elif line.startswith('Available in:'):
-                current_entry['available regions'] = line[len('Available in: '):].strip()
-
-        # Don't forget to append the last entry
-        if current_entry:
-            data_list.append(current_entry)
-
-        # Convert list of dictionaries to a DataFrame
-        data = pd.DataFrame(data_list)
-
-        # Normalize the column names (strip spaces and convert to lowercase)
-        data.columns = data.columns.str.strip().str.lower()
-
-        # Debugging: print columns and the first few rows of data
-        print("Columns:", data.columns)
-        print(data.head())  # Show the first few rows for validation
-
-        return data
-    except FileNotFoundError:
-        messagebox.showerror("Error", "File 'HBO_Max_Top_Picks.txt' not found!")
-        return pd.DataFrame()
-    except Exception as e:
-        messagebox.showerror("Error", f"Failed to load data: {e}")
-        return pd.DataFrame()
+from tkinter import messagebox
+from background import BackgroundRunner
+from charts import CHARTS, CUBE_CHARTS
+from cube import load_or_build_cube
+from dataset_cache import dataset_cache
+from virtual_table import TableModel, VirtualTable
+
+REPORT_FILE = "HBO_Max_Top_Picks.txt"
+
+# The main window, the background worker and the status line, set up in create_gui()
+root = None
+runner = None
+status = None
+
+# Function that runs on the worker thread: prepare one view
+# The table needs the titles (from the report cache); the charts are read from the saved aggregate cube,
+# rebuilt only when the report changes, so they never load the report when the cube is up to date.
+def prepare_view(token, kind):
+    if kind == 'table':
+        token.report("Loading report...")
+        data = dataset_cache.get(REPORT_FILE)
+        token.check()
+        token.report(f"Preparing table of {len(data)} titles...")
+        model = TableModel(data)
+        token.report("Indexing titles for search...")
+        model.build_search_index()
+        return model
+
+    token.report("Preparing chart...")
+    cube = load_or_build_cube(REPORT_FILE, load=dataset_cache.get)
+    token.check()
+    return CUBE_CHARTS[kind](cube)
+
+# Function to start preparing a view in the background; clicking again cancels the previous request
+def start_view(kind):
+    runner.submit('view', prepare_view, kind,
+                  on_done=lambda result: show_view(kind, result),
+                  on_error=show_error,
+                  on_progress=show_progress)
+
+# These callbacks run on the Tk main loop, polled through after() by the background runner.
+def show_progress(message, fraction=None):
+    status.config(text=message)
+
+def show_error(error):
+    status.config(text="")
+    if isinstance(error, FileNotFoundError):
+        messagebox.showerror("Error", f"File '{REPORT_FILE}' not found!")
+    else:
+        messagebox.showerror("Error", f"Failed to load data: {error}")
+
+def show_view(kind, result):
+    status.config(text="")
+    if kind == 'table':
+        show_table(result)
+    else:
+        show_chart(kind, result)
 
 # Display data in a table
 def display_data():
-    data = load_data()
-    if data.empty:
+    start_view('table')
+
+# Function to open the table window once the worker has prepared the rows
+def show_table(model):
+    if model.row_count == 0:
         return
-    
-    # Create a tkinter window to display the data
-    window = tk.Tk()
+
+    # A Toplevel of the main window, instead of a second tk.Tk() with its own event loop
+    window = tk.Toplevel(root)
     window.title("HBO Max Top Picks")
-    
-    # Set up a treeview (table) to show the data
-    tree = ttk.Treeview(window, columns=("Title", "Genre", "Year", "IMDb Rating", "Available Regions"), show="headings")
-    
-    # Define the column headings
-    tree.heading("Title", text="Title")
-    tree.heading("Genre", text="Genre")
-    tree.heading("Year", text="Year")
-    tree.heading("IMDb Rating", text="IMDb Rating")
-    tree.heading("Available Regions", text="Available Regions")
-    
-    # Populate the table with data
-    for _, row in data.iterrows():
-        tree.insert("", "end", values=(row.get('title', 'N/A'), row.get('genre', 'N/A'), row.get('year', 'N/A'),
-                                      row.get('imdb rating', 'N/A'), row.get('available regions', 'N/A')))
-    
-    # Place the treeview in the window and pack it
-    tree.pack(fill=tk.BOTH, expand=True)
-    
-    # Start the tkinter event loop
-    window.mainloop()
+
+    # A search box that filters the table by title as you type
+    search_bar = tk.Frame(window)
+    search_bar.pack(fill=tk.X, padx=5, pady=5)
+    tk.Label(search_bar, text="Search title:").pack(side=tk.LEFT)
+    query = tk.StringVar()
+    tk.Entry(search_bar, textvariable=query, width=40).pack(side=tk.LEFT, padx=5)
+    matches = tk.Label(search_bar, text=f"{model.row_count} titles")
+    matches.pack(side=tk.LEFT)
+
+    # Set up a virtual table: only the visible rows are ever turned into Treeview items
+    table = VirtualTable(window, model)
+    table.pack(fill=tk.BOTH, expand=True)
+
+    def on_search(*args):
+        matches.config(text=f"{table.search(query.get())} titles")
+    query.trace_add("write", on_search)
+
+# Function to draw a prepared chart in its own window
+# matplotlib is only imported the first time a chart is shown, so the main window opens quickly.
+def show_chart(kind, aggregate):
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+
+    _, draw = CHARTS[kind]
+    window = tk.Toplevel(root)
+    window.title("HBO Max Top Picks")
+
+    figure = Figure(figsize=(6.4, 4.8))
+    draw(figure.add_subplot(), aggregate)
+    figure.tight_layout()
+
+    canvas = FigureCanvasTkAgg(figure, master=window)
+    NavigationToolbar2Tk(canvas, window)
+    canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+    canvas.draw()
 
 # Plot IMDb rating histogram
 def plot_imdb_histogram():
-    data = load_data()
-    if data.empty:
-        return
-    
-    fig, ax = plt.subplots()
-    ax.hist(data.get('imdb rating', []), bins=10, color='skyblue', edgecolor='black')
-    ax.set_title('IMDb Rating Distribution')
-    ax.set_xlabel('IMDb Rating')
-    ax.set_ylabel('Frequency')
-    
-    plt.show()
+    start_view('histogram')
 
 # Plot top genres
 def plot_top_genres():
-    data = load_data()
-    if data.empty:
-        return
-    
-    # Handle genres properly, split and count them
-    genres = data.get('genre', '').str.split(', ').explode().value_counts().head(10)
-    genres.plot(kind='bar', color='lightcoral')
-    plt.title('Top 10 Genres')
-    plt.xlabel('Genres')
-    plt.ylabel('Frequency')
-    plt.xticks(rotation=45, ha="right")
-    plt.tight_layout()
-    plt.show()
+    start_view('genres')
 
 # Plot IMDb Rating vs Year
 def plot_rating_vs_year():
-    data = load_data()
-    if data.empty:
-        return
-    
-    fig, ax = plt.subplots()
-    ax.scatter(data.get('year', []), data.get('imdb rating', []), color='darkgreen')
-    ax.set_title('IMDb Rating vs Year')
-    ax.set_xlabel('Year')
-    ax.set_ylabel('IMDb Rating')
-    
-    plt.show()
+    start_view('rating_vs_year')
+
+# Function to handle window close: stop the worker before the window goes away
+def on_close():
+    runner.shutdown()
+    root.destroy()
 
 # Create GUI window
 def create_gui():
+    global root, runner, status
     root = tk.Tk()
     root.title("HBO Max Top Picks")
+    runner = BackgroundRunner(root)
 
     # Create buttons for different plots
     button1 = tk.Button(root, text="Display Data", command=display_data)
@@ -145,9 +144,14 @@ def create_gui():
     button4 = tk.Button(root, text="Plot Rating vs Year", command=plot_rating_vs_year)
     button4.pack(pady=10)
 
+    # A status line for the progress of whatever is loading in the background
+    status = tk.Label(root, text="", width=40)
+    status.pack(pady=5)
+
+    root.protocol("WM_DELETE_WINDOW", on_close)
+
     # Start the tkinter event loop
     root.mainloop()
 
 if __name__ == "__main__":
     create_gui()
-
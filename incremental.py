@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+import io
+import json
+import os
+import shutil
+import zlib
+import numpy as np
+import pandas as pd
+from catalog_index import CatalogIndex, file_signature, index_path
+from dataset_cache import report_signature
+from instrument import file_size, span
+from report_offsets import merge_reports, offsets_path
+from report_writer import rank_rows, report_values, write_report
+from schema import schema_for
+from sidecar import sidecar_is_fresh, sidecar_path
+
+"""
+This makes re-running the analysis on a refreshed data.csv cost roughly the size of the change instead of
+the size of the catalog. Next to the report a manifest keeps a hash of every line of data.csv, the imdbId
+key of every row and the row and rating of every title in the report. On the next run data.csv is read as
+raw lines and hashed, which is much cheaper than parsing it; lines that are in the manifest are unchanged
+rows, wherever they moved to, and only the other lines are parsed. Those are added or changed rows (a
+changed row is one whose key was in the manifest), and only they are filtered, formatted and split into
+genres and countries. The report is patched rather than rewritten: the unchanged records are copied byte
+for byte from the old report, the new ones are merged in at their place, and the sidecar, the record
+offsets and the catalog index (if one was built) are patched the same way. When nothing changed the
+report is left alone. The first run, a run with a different header, threshold or column mapping, or a
+file with records spanning several lines falls back to a full analysis.
+
+The result is the same file a full run writes: rating above the threshold, highest first, and equal
+ratings in the order of their rows in data.csv (see report_writer.rank_rows).
+"""
+
+MANIFEST_SUFFIX = '.manifest.npz'
+# Bumped whenever the keys or hashes are computed differently, so older manifests trigger a full run
+MANIFEST_VERSION = 2
+REPORT_COLUMNS = ('title', 'genres', 'year', 'rating', 'countries')
+
+# Function to find the manifest that belongs to a report
+def manifest_path(output_file):
+    root, _ = os.path.splitext(output_file)
+    return root + MANIFEST_SUFFIX
+
+# Function to read a CSV as its header line and its non-blank lines, one per row
+def read_lines(file_path):
+    with open(file_path, 'rb') as f:
+        buffer = f.read()
+    header, *lines = buffer.split(b'\n')
+    # read_csv skips blank lines, so they are not rows
+    return header, [line for line in lines if line and line != b'\r']
+
+# Function to hash every line to 64 bits (crc32 and adler32 side by side, both run at C speed)
+def line_hashes(lines):
+    crc = np.fromiter(map(zlib.crc32, lines), dtype=np.uint64, count=len(lines))
+    adler = np.fromiter(map(zlib.adler32, lines), dtype=np.uint64, count=len(lines))
+    return (crc << np.uint64(32)) | adler
+
+# Function to parse some lines of the CSV with the given schema
+def parse_lines(schema, header, lines):
+    return schema.read(io.BytesIO(b'\n'.join([header, *lines])), extra=('imdbid',))
+
+# Function to build a 64-bit key per row: the imdbId, or title and year for rows without one
+def row_keys(data, columns):
+    ids = data['imdbid'].astype(object) if 'imdbid' in data.columns else pd.Series(np.nan, index=data.index, dtype=object)
+    missing = ids.isna().to_numpy()
+    if missing.any():
+        title = data[columns['title']][missing].astype(object).fillna('').astype(str)
+        year = data[columns['year']][missing].astype(object).fillna('').astype(str)
+        ids = ids.copy()
+        ids[missing] = '~' + title + '|' + year
+    return pd.util.hash_array(ids.to_numpy(dtype=object))
+
+# Function to number the repeats of every value (0 for the first, 1 for the second, ...)
+def occurrence(values):
+    return pd.Series(values).groupby(values, sort=False).cumcount().to_numpy()
+
+# Function to find every value of new in old, pairing repeated values one to one in order (-1 when not found)
+# Identical lines are interchangeable, so which copy is paired with which does not matter.
+def match(old, new):
+    if pd.Index(old).is_unique and pd.Index(new).is_unique:
+        return pd.Index(old).get_indexer(new)
+    old_pairs = pd.MultiIndex.from_arrays([old, occurrence(old)])
+    return old_pairs.get_indexer(pd.MultiIndex.from_arrays([new, occurrence(new)]))
+
+# Function to read the previous manifest, or None when it cannot be used for this run
+def load_manifest(output_file, header, threshold, columns):
+    path = manifest_path(output_file)
+    if not (os.path.exists(path) and os.path.exists(output_file) and sidecar_is_fresh(output_file)):
+        return None
+    with np.load(path, allow_pickle=False) as saved:
+        manifest = {name: saved[name] for name in saved.files}
+    if int(manifest.get('version', 0)) != MANIFEST_VERSION or manifest['header'] != header:
+        return None
+    if float(manifest['threshold']) != threshold or json.loads(str(manifest['columns'])) != columns:
+        return None
+    # The report must be exactly the one this manifest was written with.
+    if json.loads(str(manifest['report'])) != list(report_signature(output_file)[:2]):
+        return None
+    return manifest
+
+# Function to save the manifest for the report that was just written
+def save_manifest(output_file, file_path, header, hashes, keys, pick_rows, pick_ratings, threshold, columns):
+    np.savez(
+        manifest_path(output_file),
+        version=np.int64(MANIFEST_VERSION), header=header, hashes=hashes, keys=keys,
+        pick_rows=np.asarray(pick_rows, dtype=np.int64), pick_ratings=np.asarray(pick_ratings, dtype=np.float32),
+        threshold=np.float64(threshold), columns=json.dumps(columns),
+        report=json.dumps(list(report_signature(output_file)[:2])), source=file_signature(file_path),
+    )
+
+# Function to write the given rows of a frame, already in report order, as a report
+def write_picks(data, rows, columns, output_file):
+    picks = data.iloc[rows][[columns[key] for key in REPORT_COLUMNS]]
+    return write_report(report_values(picks, columns), output_file)
+
+# Function to remove a temporary report with its sidecar and offsets
+def remove_report(report_file):
+    for path in (report_file, offsets_path(report_file)):
+        if os.path.exists(path):
+            os.remove(path)
+    shutil.rmtree(sidecar_path(report_file), ignore_errors=True)
+
+# Function to patch the catalog index of data.csv, if there is one and it matches the previous run
+def patch_index(file_path, manifest, data, columns, old_to_new, rows, row_count):
+    path = index_path(file_path)
+    if not os.path.exists(path):
+        return False
+    index = CatalogIndex.load(path)
+    if not np.array_equal(index.signature, manifest['source']):
+        # Stale already; load_or_build_index rebuilds it the next time it is used
+        return False
+    # The index keeps ratings as float64 parsed from the text; the 6 decimals of the report recover them
+    ratings = np.round(data[columns['rating']].to_numpy(dtype=np.float64), 6)
+    index = index.patch(old_to_new, rows, data[columns['genres']], data[columns['countries']],
+                        ratings, row_count, signature=file_signature(file_path))
+    index.save(path)
+    return True
+
+# Function to analyze the whole file and, when it has one record per line, save a manifest for the next run
+def full_top_picks(file_path, schema, header, lines, hashes, output_file, threshold):
+    columns = schema.columns
+    with span('full_analysis', path=file_path) as stage:
+        data = schema.read(file_path, extra=('imdbid',))
+        ratings = data[columns['rating']].to_numpy()
+        pick_rows = rank_rows(ratings, threshold)
+        write_picks(data, pick_rows, columns, output_file)
+        stage.add(rows=len(data))
+    if len(data) == len(lines):
+        save_manifest(output_file, file_path, header, hashes, row_keys(data, columns),
+                      pick_rows, ratings[pick_rows], threshold, columns)
+    else:
+        # Quoted values with line breaks: lines are not rows, so changes cannot be found line by line
+        print(f"{file_path} has records spanning several lines; every run will be a full analysis")
+        if os.path.exists(manifest_path(output_file)):
+            os.remove(manifest_path(output_file))
+    print(f"Full analysis: {len(pick_rows)} top picks saved to {output_file}")
+    return {'added': len(data), 'changed': 0, 'removed': 0, 'rows_written': len(pick_rows)}
+
+# Function to bring the report up to date with data.csv, reprocessing only the rows that changed
+def incremental_top_picks(file_path, output_file='HBO_Max_Top_Picks.txt', threshold=7.5):
+    with span('column_resolution'):
+        schema = schema_for(file_path).check()
+        columns = schema.columns
+    with span('csv_lines', path=file_path) as stage:
+        header_line, lines = read_lines(file_path)
+        hashes = line_hashes(lines)
+        header = line_hashes([header_line])[0]
+        stage.add(rows=len(lines), bytes_read=lambda: file_size(file_path))
+
+    manifest = load_manifest(output_file, header, threshold, columns)
+    if manifest is None:
+        return full_top_picks(file_path, schema, header, lines, hashes, output_file, threshold)
+
+    # Lines that were already there are unchanged rows, wherever they are now; old_to_new maps them
+    old_rows = match(manifest['hashes'], hashes)
+    same = old_rows >= 0
+    delta = np.flatnonzero(~same)
+    old_to_new = np.full(len(manifest['hashes']), -1, dtype=np.int64)
+    old_to_new[old_rows[same]] = np.flatnonzero(same)
+    if not len(delta) and len(old_rows) == len(old_to_new) and np.array_equal(old_rows, np.arange(len(old_rows))):
+        print(f"No changes in {file_path}; {output_file} is up to date")
+        return {'added': 0, 'changed': 0, 'removed': 0, 'rows_written': 0}
+
+    with span('csv_load', rows=len(delta)):
+        try:
+            data = parse_lines(schema, header_line, [lines[i] for i in delta])
+        except pd.errors.ParserError:
+            data = None
+    if data is None or len(data) != len(delta):
+        return full_top_picks(file_path, schema, header, lines, hashes, output_file, threshold)
+
+    # A new line whose key belonged to a line that is gone is a changed row; the others were added
+    gone = np.flatnonzero(old_to_new < 0)
+    delta_keys = row_keys(data, columns)
+    changed = int((match(manifest['keys'][gone], delta_keys) >= 0).sum())
+    stats = {'added': len(delta) - changed, 'changed': changed, 'removed': len(gone) - changed}
+    keys = np.empty(len(lines), dtype=np.uint64)
+    keys[same] = manifest['keys'][old_rows[same]]
+    keys[delta] = delta_keys
+
+    with span('patch_report', path=output_file) as stage:
+        # The previous picks that are still there, at their new rows
+        kept_rows = old_to_new[manifest['pick_rows']]
+        kept = np.flatnonzero(kept_rows >= 0)
+
+        # Only the parsed rows are filtered and formatted, into a small report of their own
+        ratings = data[columns['rating']].to_numpy()
+        picked = rank_rows(ratings, threshold)
+        delta_file = os.path.splitext(output_file)[0] + '.delta.txt'
+        write_picks(data, picked, columns, delta_file)
+
+        # Rank old and new picks together, then copy their records out of the two reports in that order
+        rows = np.concatenate([kept_rows[kept], delta[picked]])
+        pick_ratings = np.concatenate([manifest['pick_ratings'][kept], ratings[picked]])
+        order = np.lexsort((rows, -pick_ratings))
+        sources = np.repeat([0, 1], [len(kept), len(picked)])[order]
+        positions = np.concatenate([kept, np.arange(len(picked))])[order]
+        try:
+            written = merge_reports([output_file, delta_file], sources, positions, output_file)
+        finally:
+            remove_report(delta_file)
+        stage.add(rows=written, formatted=len(picked))
+    save_manifest(output_file, file_path, header, hashes, keys, rows[order], pick_ratings[order], threshold, columns)
+
+    with span('patch_index'):
+        patch_index(file_path, manifest, data, columns, old_to_new, delta, len(lines))
+
+    print(f"Incremental update: {stats['added']} added, {stats['changed']} changed, {stats['removed']} removed; "
+          f"{written} top picks saved to {output_file}")
+    return {**stats, 'rows_written': written}
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+import atexit
+import json
+import os
+import threading
+import time
+
+"""
+This is the instrumentation used across the pipeline. Every stage (download, column resolution, reading
+the CSV, filtering and sorting, writing the report, loading it back) runs inside a span that records its
+wall time, the rows it handled and the bytes it read or wrote, and optionally the peak memory tracemalloc
+saw while it ran. Spans are written as JSON lines, or as a Chrome trace (open it in chrome://tracing or
+Perfetto) when the output file ends in .json.
+
+Tracing is off unless DATAMAX_TRACE is set to an output file (DATAMAX_TRACE_MEMORY=1 adds the memory
+peaks), or enable() is called, e.g. by `datamax.py --trace trace.json`. When it is off span() hands back
+one shared do-nothing object, so the stages pay a function call and nothing else.
+"""
+
+TRACE_ENV = 'DATAMAX_TRACE'
+MEMORY_ENV = 'DATAMAX_TRACE_MEMORY'
+
+# A span that records nothing; span() returns this one object whenever tracing is off.
+class NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def add(self, **fields):
+        pass
+
+NULL_SPAN = NullSpan()
+
+# One timed stage. Counters like rows, bytes_read and bytes_written are added with add().
+# A counter may be given as a function (e.g. `bytes_read=lambda: file_size(path)`); it is only called by a
+# real span, so nothing is computed while tracing is off.
+class Span:
+    def __init__(self, tracer, name, fields):
+        self.tracer = tracer
+        self.name = name
+        self.fields = {}
+        self.peak_bytes = 0
+        self.add(**fields)
+
+    # Function to add to the counters of the span (numbers are summed, anything else is replaced)
+    def add(self, **fields):
+        for key, value in fields.items():
+            if callable(value):
+                value = value()
+            if isinstance(value, (int, float)) and isinstance(self.fields.get(key), (int, float)):
+                self.fields[key] += value
+            else:
+                self.fields[key] = value
+
+    def __enter__(self):
+        self.tracer.push(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.seconds = time.perf_counter() - self.start
+        if exc_type is not None:
+            self.fields['error'] = exc_type.__name__
+        self.tracer.pop(self)
+        return False
+
+# The tracer keeps a stack of open spans per thread and writes every span as it closes.
+class Tracer:
+    def __init__(self, output_file, memory=False):
+        self.output_file = output_file
+        self.chrome = output_file.endswith('.json')
+        self.memory = memory
+        self.origin = time.perf_counter()
+        self.events = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._file = None if self.chrome else open(output_file, 'a')
+        if memory:
+            import tracemalloc
+            self._tracemalloc = tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def push(self, span):
+        stack = self._stack()
+        if self.memory:
+            # Peaks are measured from a reset, so the parent keeps the peak it reached before this child
+            # started, and a closing child hands its peak to its parent.
+            current, peak = self._tracemalloc.get_traced_memory()
+            if stack:
+                stack[-1].peak_bytes = max(stack[-1].peak_bytes, peak - stack[-1].base_bytes)
+            span.base_bytes = current
+            self._tracemalloc.reset_peak()
+        stack.append(span)
+
+    def pop(self, span):
+        stack = self._stack()
+        stack.pop()
+        if self.memory:
+            _, peak = self._tracemalloc.get_traced_memory()
+            span.peak_bytes = max(span.peak_bytes, peak - span.base_bytes)
+            if stack:
+                stack[-1].peak_bytes = max(stack[-1].peak_bytes, peak - stack[-1].base_bytes)
+        self.record(span, len(stack))
+
+    # Function to write out one finished span
+    def record(self, span, depth):
+        start = span.start - self.origin
+        if self.chrome:
+            args = dict(span.fields)
+            if self.memory:
+                args['peak_bytes'] = span.peak_bytes
+            event = {'name': span.name, 'cat': 'datamax', 'ph': 'X', 'ts': round(start * 1e6, 1),
+                     'dur': round(span.seconds * 1e6, 1), 'pid': os.getpid(), 'tid': threading.get_ident(), 'args': args}
+            with self._lock:
+                self.events.append(event)
+            return
+
+        line = {'stage': span.name, 'start': round(start, 6), 'seconds': round(span.seconds, 6), 'depth': depth}
+        line.update(span.fields)
+        if self.memory:
+            line['peak_bytes'] = span.peak_bytes
+        with self._lock:
+            self._file.write(json.dumps(line, default=str) + '\n')
+            self._file.flush()
+
+    def close(self):
+        if self.chrome:
+            with open(self.output_file, 'w') as file:
+                json.dump({'traceEvents': self.events, 'displayTimeUnit': 'ms'}, file, default=str)
+        elif not self._file.closed:
+            self._file.close()
+
+_tracer = None
+
+# Function to turn tracing on, writing spans to output_file (.json for a Chrome trace, anything else for JSON lines)
+def enable(output_file, memory=False):
+    global _tracer
+    disable()
+    _tracer = Tracer(output_file, memory)
+    atexit.register(disable)
+    return _tracer
+
+# Function to turn tracing off and write out what was collected
+def disable():
+    global _tracer
+    if _tracer is not None:
+        tracer, _tracer = _tracer, None
+        tracer.close()
+
+def enabled():
+    return _tracer is not None
+
+# Function to time one stage: `with span('csv_load', path=file_path) as s: ...; s.add(rows=len(data))`
+def span(name, **fields):
+    if _tracer is None:
+        return NULL_SPAN
+    return Span(_tracer, name, fields)
+
+# Function to look up the size of a file for the bytes_read / bytes_written counters (0 if it is missing)
+def file_size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+if os.environ.get(TRACE_ENV):
+    enable(os.environ[TRACE_ENV], memory=os.environ.get(MEMORY_ENV, '') not in ('', '0'))
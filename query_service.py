@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+import argparse
+import asyncio
+import json
+import math
+from collections import OrderedDict
+from urllib.parse import parse_qsl, urlsplit
+import numpy as np
+import pandas as pd
+from compact import MultiHot
+from dataset_cache import load_report, report_signature
+
+"""
+This is a small local HTTP service for the top picks, so other tools can ask for titles instead of each
+re-reading HBO_Max_Top_Picks.txt. The report is loaded once (from the sidecar when it is fresh), the genre
+and region lists become bit-packed matrices, and every query is a few boolean masks over those arrays.
+Responses are kept in an LRU cache keyed on the normalized query; the cache is dropped and the report
+reloaded as soon as the file changes on disk. Only the standard library's asyncio is used for HTTP.
+
+    python query_service.py --port 8765
+    curl 'http://127.0.0.1:8765/titles?min_rating=8&genre=Drama&country=SE&year_from=1990&per_page=20'
+
+Query parameters of /titles: min_rating, genre and country (repeatable, all must match), year_from,
+year_to, page (from 1) and per_page (at most MAX_PER_PAGE). /stats shows the cache counters.
+"""
+
+REPORT_FILE = 'HBO_Max_Top_Picks.txt'
+DEFAULT_PER_PAGE = 50
+MAX_PER_PAGE = 1000
+CACHE_SIZE = 1024
+RECORD_FIELDS = ('title', 'genre', 'year', 'imdb rating', 'available regions')
+
+# Raised for a query the service cannot answer; becomes a 400 response.
+class BadQuery(ValueError):
+    pass
+
+# The report in query form: numeric arrays for rating and year, multi-hot matrices for genres and regions.
+class QueryCatalog:
+    def __init__(self, data):
+        self.data = data
+        self.ratings = pd.to_numeric(data['imdb rating'], errors='coerce').to_numpy(dtype=float)
+        self.years = pd.to_numeric(data['year'], errors='coerce').to_numpy(dtype=float)
+        self.genres = MultiHot.from_strings(data['genre'])
+        self.regions = MultiHot.from_strings(data['available regions'])
+        self.columns = [data[field].to_numpy(dtype=object) for field in RECORD_FIELDS]
+
+    def __len__(self):
+        return len(self.data)
+
+    # Function to return the matching row numbers, in report order (best rated first)
+    def match(self, query):
+        mask = np.ones(len(self), dtype=bool)
+        if query['min_rating'] is not None:
+            mask &= self.ratings >= query['min_rating']
+        if query['year_from'] is not None:
+            mask &= self.years >= query['year_from']
+        if query['year_to'] is not None:
+            mask &= self.years <= query['year_to']
+        for genre in query['genre']:
+            mask &= self.genres.contains(genre)
+        for country in query['country']:
+            mask &= self.regions.contains(country)
+        return np.flatnonzero(mask)
+
+    # Function to turn rows into JSON ready records (missing values become null)
+    def records(self, rows):
+        records = []
+        for row in rows.tolist():
+            record = {}
+            for field, values in zip(RECORD_FIELDS, self.columns):
+                value = values[row]
+                if isinstance(value, float) and math.isnan(value):
+                    value = None
+                elif isinstance(value, np.generic):
+                    value = value.item()
+                record[field] = value
+            records.append(record)
+        return records
+
+    # Function to answer one query with a page of results
+    def page(self, query):
+        rows = self.match(query)
+        start = (query['page'] - 1) * query['per_page']
+        return {
+            'total': len(rows),
+            'page': query['page'],
+            'per_page': query['per_page'],
+            'results': self.records(rows[start:start + query['per_page']]),
+        }
+
+# Function to read the query string of /titles into a normalized query (the cache key is built from it)
+def parse_query(query_string):
+    params = {}
+    for key, value in parse_qsl(query_string, keep_blank_values=False):
+        params.setdefault(key, []).append(value)
+    unknown = set(params) - {'min_rating', 'genre', 'country', 'year_from', 'year_to', 'page', 'per_page'}
+    if unknown:
+        raise BadQuery(f"Unknown parameters: {', '.join(sorted(unknown))}")
+
+    def number(name, kind=float, default=None):
+        if name not in params:
+            return default
+        try:
+            return kind(params[name][-1])
+        except ValueError:
+            raise BadQuery(f"{name} must be a number") from None
+
+    query = {
+        'min_rating': number('min_rating'),
+        'year_from': number('year_from'),
+        'year_to': number('year_to'),
+        'genre': tuple(sorted(set(params.get('genre', ())))),
+        'country': tuple(sorted(set(params.get('country', ())))),
+        'page': number('page', int, 1),
+        'per_page': number('per_page', int, DEFAULT_PER_PAGE),
+    }
+    if query['page'] < 1 or not 1 <= query['per_page'] <= MAX_PER_PAGE:
+        raise BadQuery(f"page must be 1 or more and per_page between 1 and {MAX_PER_PAGE}")
+    return query
+
+# A least recently used cache of encoded responses.
+class ResponseCache:
+    def __init__(self, maxsize=CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        body = self._entries.get(key)
+        if body is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return body
+
+    def put(self, key, body):
+        self._entries[key] = body
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries), 'maxsize': self.maxsize}
+
+# The service: holds the catalog, checks the report for changes and answers HTTP requests.
+class QueryService:
+    def __init__(self, report_file=REPORT_FILE, cache_size=CACHE_SIZE):
+        self.report_file = report_file
+        self.cache = ResponseCache(cache_size)
+        self.catalog = None
+        self.signature = None
+        self.reloads = 0
+        self._reload_lock = asyncio.Lock()
+
+    # Function to make sure the catalog matches the report on disk, reloading it (off the event loop) if not
+    async def refresh(self):
+        signature = report_signature(self.report_file)
+        if signature == self.signature:
+            return
+        async with self._reload_lock:
+            signature = report_signature(self.report_file)
+            if signature == self.signature:
+                return
+            data = await asyncio.to_thread(load_report, self.report_file)
+            self.catalog = await asyncio.to_thread(QueryCatalog, data)
+            self.signature = signature
+            self.cache.clear()
+            self.reloads += 1
+
+    # Function to answer one request, returning (status, body bytes)
+    async def respond(self, target):
+        url = urlsplit(target)
+        if url.path == '/health':
+            return 200, b'{"status": "ok"}'
+
+        try:
+            await self.refresh()
+        except FileNotFoundError:
+            return 503, json.dumps({'error': f"Report '{self.report_file}' not found"}).encode()
+
+        if url.path == '/stats':
+            stats = {'titles': len(self.catalog), 'reloads': self.reloads, 'cache': self.cache.stats()}
+            return 200, json.dumps(stats).encode()
+        if url.path != '/titles':
+            return 404, b'{"error": "not found"}'
+
+        try:
+            query = parse_query(url.query)
+        except BadQuery as e:
+            return 400, json.dumps({'error': str(e)}).encode()
+
+        key = tuple(query.items())
+        body = self.cache.get(key)
+        if body is None:
+            body = json.dumps(self.catalog.page(query)).encode()
+            self.cache.put(key, body)
+        return 200, body
+
+    # Function to serve one client connection, answering requests until the client closes it
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip().lower()
+
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    status, body, version = 400, b'{"error": "bad request"}', 'HTTP/1.0'
+                else:
+                    if method != 'GET':
+                        status, body = 405, b'{"error": "only GET is supported"}'
+                    else:
+                        try:
+                            status, body = await self.respond(target)
+                        except Exception as e:
+                            # A bad report or a bug in one query must not drop the connection or the server
+                            print(f"Error answering {target}: {e!r}")
+                            status, body = 500, b'{"error": "internal error"}'
+
+                keep_alive = version == 'HTTP/1.1' and headers.get('connection') != 'close'
+                writer.write(
+                    f"HTTP/1.1 {status} {STATUS_TEXT.get(status, 'OK')}\r\n"
+                    f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + body
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionResetError, BrokenPipeError):
+            pass
+        finally:
+            writer.close()
+
+STATUS_TEXT = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+               500: 'Internal Server Error', 503: 'Service Unavailable'}
+
+# Function to run the service until it is interrupted
+async def serve(report_file=REPORT_FILE, host='127.0.0.1', port=8765, cache_size=CACHE_SIZE):
+    service = QueryService(report_file, cache_size)
+    try:
+        await service.refresh()
+    except FileNotFoundError:
+        print(f"Report '{report_file}' not found yet; it will be loaded once it exists.")
+    server = await asyncio.start_server(service.handle, host, port, backlog=1024)
+    titles = len(service.catalog) if service.catalog is not None else 0
+    print(f"Serving {titles} titles from {report_file} on http://{host}:{port}/titles")
+    async with server:
+        await server.serve_forever()
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the top picks report as a JSON query API")
+    parser.add_argument('--report', default=REPORT_FILE)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--cache-size', type=int, default=CACHE_SIZE, help="number of responses kept in the LRU cache")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.report, args.host, args.port, args.cache_size))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
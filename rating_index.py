@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+import argparse
+import os
+import numpy as np
+import pandas as pd
+from report_writer import report_values, write_report
+from schema import VALID_RANGES, resolve_columns, schema_for
+
+"""
+This keeps the catalog sorted by IMDb rating (and by number of votes for equal ratings) once, as a
+permutation of the rows. Any threshold is then a binary search in the sorted ratings and any top N is a
+slice, so reports for several cutoffs, or for slices like one type or one decade, no longer need their own
+load, filter and sort. The batch mode writes all of them from a single load of data.csv.
+"""
+
+# Function to work out the decade of every row (e.g. 1990 for 1994), NaN when the year is missing
+def decades(years):
+    years = pd.to_numeric(years, errors='coerce').to_numpy(dtype=float)
+    return np.floor(years / 10) * 10
+
+class RatingIndex:
+    def __init__(self, data, columns=None, by_votes=True):
+        self.data = data
+        self.columns = columns or resolve_columns(data.columns)
+        ratings = pd.to_numeric(data[self.columns['rating']], errors='coerce').to_numpy(dtype=float)
+        # Ratings outside 0..10 are treated as missing, so they never make a cutoff (see schema.VALID_RANGES)
+        low, high = VALID_RANGES['rating']
+        self.ratings = np.where((ratings < low) | (ratings > high), np.nan, ratings)
+
+        # Highest rating first, most votes first among equal ratings, missing ratings last.
+        keys = [-self.ratings]
+        if by_votes and 'imdbnumvotes' in data.columns:
+            votes = pd.to_numeric(data['imdbnumvotes'], errors='coerce').to_numpy(dtype=float)
+            keys.insert(0, -np.nan_to_num(votes, nan=-1.0))
+        self.order = np.lexsort(keys)
+        self.sorted_ratings = self.ratings[self.order]
+        self._slices = {}
+        self._groups = {}
+
+    # Function to load data.csv once and index it
+    @classmethod
+    def from_csv(cls, file_path, by_votes=True):
+        schema = schema_for(file_path)
+        data = report_values(schema.read(file_path, extra=('type', 'imdbnumvotes')), schema.columns)
+        return cls(data, schema.columns, by_votes=by_votes)
+
+    # Function to return the sorted rows (and their ratings) of one slice, e.g. ('type', 'movie')
+    # The slice keeps the global order, so it never has to be sorted again.
+    def slice(self, by=None, value=None):
+        if by is None:
+            return self.order, self.sorted_ratings
+        key = (by, value)
+        if key not in self._slices:
+            groups = self.slice_values(by)
+            order = self.order[groups[self.order] == value]
+            self._slices[key] = (order, self.ratings[order])
+        return self._slices[key]
+
+    # Function to return the value every row has for a slicing dimension ('type' or 'decade')
+    def slice_values(self, by):
+        if by not in self._groups:
+            if by == 'decade':
+                self._groups[by] = decades(self.data[self.columns['year']])
+            else:
+                self._groups[by] = self.data[by].astype(object).to_numpy()
+        return self._groups[by]
+
+    # Function to list the values of a slicing dimension
+    def slice_keys(self, by):
+        values = pd.Series(self.slice_values(by)).dropna().unique()
+        return sorted(values.tolist())
+
+    # Function to return the rows rated above a threshold (and at most top_n of them), best first
+    def query(self, threshold=None, top_n=None, by=None, value=None):
+        order, ratings = self.slice(by, value)
+        if threshold is not None:
+            # ratings are sorted descending, so the ones above the threshold are a prefix
+            stop = int(np.searchsorted(-ratings, -threshold, side='left'))
+        else:
+            stop = int(np.count_nonzero(~np.isnan(ratings)))
+        if top_n is not None:
+            stop = min(stop, top_n)
+        return order[:stop]
+
+    # Function to return the report columns for a set of rows
+    def report_frame(self, rows):
+        columns = self.columns
+        frame = self.data.iloc[rows][[columns['title'], columns['genres'], columns['year'], columns['rating'], columns['countries']]]
+        return frame.assign(**{columns['rating']: self.ratings[rows]})
+
+# Function to build the file name of one report in a batch
+def report_name(threshold, top_n, by, value):
+    parts = ['HBO_Max_Top_Picks']
+    if threshold is not None:
+        parts.append(f'above_{threshold:g}')
+    if top_n is not None:
+        parts.append(f'top_{top_n}')
+    if by is not None:
+        parts.append(f'{by}_{value:g}' if isinstance(value, float) else f'{by}_{value}')
+    return '_'.join(parts) + '.txt'
+
+# Function to write every combination of thresholds and slices from a single load
+def write_batch(index, output_dir, thresholds=(7.5,), top_n=None, slice_by=()):
+    os.makedirs(output_dir, exist_ok=True)
+    slices = [(None, None)] + [(by, value) for by in slice_by for value in index.slice_keys(by)]
+    written = []
+    for threshold in thresholds:
+        for by, value in slices:
+            rows = index.query(threshold, top_n, by, value)
+            output_file = os.path.join(output_dir, report_name(threshold, top_n, by, value))
+            write_report(index.report_frame(rows), output_file)
+            written.append((output_file, len(rows)))
+    return written
+
+def main():
+    parser = argparse.ArgumentParser(description="Write top picks reports for several thresholds and slices")
+    parser.add_argument('csv_path', nargs='?', default='data.csv')
+    parser.add_argument('--threshold', type=float, action='append', help="IMDb rating cutoff (repeatable)")
+    parser.add_argument('--top', type=int, default=None, help="only keep the best N titles per report")
+    parser.add_argument('--by', action='append', default=[], choices=['type', 'decade'], help="also write one report per slice")
+    parser.add_argument('--output-dir', default='reports')
+    args = parser.parse_args()
+
+    index = RatingIndex.from_csv(args.csv_path)
+    for output_file, rows in write_batch(index, args.output_dir, args.threshold or [7.5], args.top, args.by):
+        print(f"{rows:8d} titles saved to {output_file}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+import argparse
+import mmap
+import os
+import numpy as np
+import pandas as pd
+from dataset_cache import NUMERIC_COLUMNS, REPORT_FIELDS
+from sidecar import copy_rows, sidecar_path
+
+"""
+This gives random access to the records of HBO_Max_Top_Picks.txt without parsing the whole file. The report
+writer saves the byte offset of every "Title:" block next to the report as <name>.offsets: an 8 byte
+header, the record count, then one little-endian uint64 per record plus the end of the file. The reader
+memory-maps the report and decodes only the records it is asked for, so reading record N, a page of
+records or a random sample costs the same whether the report holds a thousand titles or ten million. When
+the offsets file is missing or older than the report, the offsets are found with one vectorized scan for
+"\n\nTitle: " instead.
+
+    python report_offsets.py --record 0 --record 1000
+    python report_offsets.py --page 2 --page-size 20
+    python report_offsets.py --sample 5
+"""
+
+OFFSETS_SUFFIX = '.offsets'
+OFFSETS_MAGIC = b'DMXOFF1\0'
+TITLE_PREFIX = b'Title: '
+
+# Function to find the offsets file that belongs to a report
+def offsets_path(report_file):
+    root, _ = os.path.splitext(report_file)
+    return root + OFFSETS_SUFFIX
+
+# Function to save record offsets (record starts followed by the end of the file)
+def write_offsets(path, offsets):
+    offsets = np.asarray(offsets, dtype='<u8')
+    with open(path + '.tmp', 'wb') as file:
+        file.write(OFFSETS_MAGIC)
+        np.array([len(offsets) - 1], dtype='<u8').tofile(file)
+        offsets.tofile(file)
+    os.replace(path + '.tmp', path)
+    return path
+
+# Function to load the saved offsets of a report, or None if they are missing or do not match the report
+def load_offsets(report_file):
+    path = offsets_path(report_file)
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    report = os.stat(report_file)
+    if stat.st_mtime_ns < report.st_mtime_ns:
+        return None
+    with open(path, 'rb') as file:
+        if file.read(len(OFFSETS_MAGIC)) != OFFSETS_MAGIC:
+            return None
+        count = int(np.fromfile(file, dtype='<u8', count=1)[0])
+    offsets = np.memmap(path, dtype='<u8', mode='r', offset=len(OFFSETS_MAGIC) + 8, shape=(count + 1,))
+    # The last offset is the size the report had when it was written
+    if int(offsets[-1]) != report.st_size:
+        return None
+    return offsets
+
+# Function to find the record offsets by scanning the bytes of a report for "Title: " at the start of a block
+def scan_offsets(buffer):
+    data = np.frombuffer(buffer, dtype=np.uint8)
+    size = len(data)
+    if size < len(TITLE_PREFIX):
+        return np.array([size], dtype='<u8') if size == 0 else np.array([0, size], dtype='<u8')
+    candidates = np.flatnonzero(data[:size - len(TITLE_PREFIX) + 1] == TITLE_PREFIX[0])
+    for i, byte in enumerate(TITLE_PREFIX[1:], start=1):
+        candidates = candidates[data[candidates + i] == byte]
+    # A record starts at the beginning of the file or right after the blank line ending the previous one
+    starts = candidates[(candidates == 0) | ((candidates >= 2) & (data[np.maximum(candidates - 1, 0)] == 10)
+                                              & (data[np.maximum(candidates - 2, 0)] == 10))]
+    return np.append(starts, size).astype('<u8')
+
+# Function to decode one record (the bytes of one Title: block) into (title, genre, year, rating, regions)
+def parse_record(block):
+    values = {}
+    for line in block.decode('utf-8', errors='replace').splitlines():
+        line = line.strip()
+        for prefix, column in REPORT_FIELDS:
+            if line.startswith(prefix):
+                values[column] = line[len(prefix):].strip()
+                break
+    record = {}
+    for _, column in REPORT_FIELDS:
+        value = values.get(column)
+        if column in NUMERIC_COLUMNS:
+            try:
+                value = float(value)
+            except (TypeError, ValueError):
+                value = np.nan
+        record[column] = value
+    return record
+
+# Memory-maps a report and decodes records on demand.
+class ReportReader:
+    def __init__(self, report_file, save_offsets=True):
+        self.report_file = report_file
+        self._file = open(report_file, 'rb')
+        size = os.fstat(self._file.fileno()).st_size
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+        offsets = load_offsets(report_file)
+        if offsets is None:
+            offsets = scan_offsets(self._map)
+            if save_offsets and size:
+                write_offsets(offsets_path(report_file), offsets)
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    # Function to decode record i (negative numbers count from the end)
+    def record(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(f"Record {i} out of range, the report has {len(self)} records")
+        return parse_record(self.raw(i, i + 1))
+
+    # Function to return the bytes of records [start, stop) exactly as they are in the report
+    def raw(self, start, stop):
+        return self._map[int(self.offsets[start]):int(self.offsets[stop])]
+
+    # Function to decode records [start, stop)
+    def records(self, start, stop):
+        start, stop, _ = slice(start, stop).indices(len(self))
+        return [self.record(i) for i in range(start, stop)]
+
+    # Function to decode a page of records (pages count from 1)
+    def page(self, number, size=50):
+        return self.records((number - 1) * size, number * size)
+
+    # Function to decode any set of records into a DataFrame with the GUI's columns
+    def frame(self, rows):
+        return pd.DataFrame([self.record(int(i)) for i in rows], columns=[column for _, column in REPORT_FIELDS])
+
+    # Function to decode a random sample of n records, in report order
+    def sample(self, n, seed=None):
+        rng = np.random.default_rng(seed)
+        rows = np.sort(rng.choice(len(self), size=min(n, len(self)), replace=False))
+        return self.frame(rows)
+
+    def close(self):
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+# Function to write a report made of records of other reports: record positions[i] of reports[sources[i]]
+# The records are copied byte for byte, neighbouring records of one report with a single slice, and the
+# offsets and sidecar of the new report are written from those of the old ones. The output may be one of
+# the inputs; it is only replaced once everything has been read.
+def merge_reports(reports, sources, positions, output_file, batch_runs=10_000):
+    sources = np.asarray(sources, dtype=np.int64)
+    positions = np.asarray(positions, dtype=np.int64)
+    readers = [ReportReader(report) for report in reports]
+    try:
+        breaks = np.flatnonzero((np.diff(sources) != 0) | (np.diff(positions) != 1)) + 1
+        run_starts = np.r_[0, breaks] if len(sources) else breaks
+        run_stops = np.r_[breaks, len(sources)] if len(sources) else breaks
+        sizes = np.zeros(len(sources), dtype=np.int64)
+        for source, reader in enumerate(readers):
+            mine = sources == source
+            offsets = np.asarray(reader.offsets, dtype=np.int64)
+            sizes[mine] = offsets[positions[mine] + 1] - offsets[positions[mine]]
+
+        with open(output_file + '.tmp', 'wb') as file:
+            for first in range(0, len(run_starts), batch_runs):
+                file.write(b''.join(readers[sources[start]].raw(positions[start], positions[stop - 1] + 1)
+                                    for start, stop in zip(run_starts[first:first + batch_runs].tolist(),
+                                                           run_stops[first:first + batch_runs].tolist())))
+    finally:
+        for reader in readers:
+            reader.close()
+    os.replace(output_file + '.tmp', output_file)
+    write_offsets(offsets_path(output_file), np.r_[0, np.cumsum(sizes)])
+    copy_rows([sidecar_path(report) for report in reports], sources, positions, sidecar_path(output_file))
+    return len(sources)
+
+def main():
+    parser = argparse.ArgumentParser(description="Read single records of the top picks report without parsing it all")
+    parser.add_argument('--report', default='HBO_Max_Top_Picks.txt')
+    parser.add_argument('--record', type=int, action='append', default=[], help="record number to print (repeatable)")
+    parser.add_argument('--page', type=int, default=None, help="page to print, counting from 1")
+    parser.add_argument('--page-size', type=int, default=20)
+    parser.add_argument('--sample', type=int, default=None, help="print this many random records")
+    args = parser.parse_args()
+
+    with ReportReader(args.report) as reader:
+        print(f"{len(reader)} records in {args.report}")
+        if args.record:
+            print(reader.frame(args.record).to_string())
+        if args.page is not None:
+            print(pd.DataFrame(reader.page(args.page, args.page_size)).to_string())
+        if args.sample is not None:
+            print(reader.sample(args.sample).to_string())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+import os
+import numpy as np
+from instrument import file_size, span
+from report_offsets import offsets_path, write_offsets
+from schema import VALID_RANGES
+from sidecar import SIDECAR_COLUMNS, SidecarWriter, sidecar_path
+
+"""
+This is the one place that writes HBO_Max_Top_Picks.txt. The old scripts called iterrows() and made five
+file.write calls per title, which dominated the runtime on big inputs. Here every column is pulled out as
+a whole array once, a large chunk of rows is formatted in a single pass and written with one bulk write.
+The output is byte for byte the same as the old loop produced. The columnar sidecar, and the byte offset
+of every record (see report_offsets.py), are written next to the report in the same pass.
+"""
+
+DEFAULT_CHUNK_ROWS = 50_000
+
+# Function to format rows given as five equally long columns (title, genre, year, rating, regions)
+# The values are formatted exactly like the old per-row f-strings did.
+def render_records(columns):
+    title, genre, year, rating, regions = columns
+    return [
+        f"Title: {t}\nGenre: {g}\nYear: {y}\nIMDb Rating: {r}\nAvailable in: {a}\n\n"
+        for t, g, y, r, a in zip(title, genre, year, rating, regions)
+    ]
+
+def render_rows(columns):
+    return "".join(render_records(columns))
+
+# Function to work out how many bytes every record takes in a text file with the given encoding
+def record_sizes(records, text, encoding):
+    if text.isascii():
+        sizes = np.fromiter(map(len, records), dtype=np.int64, count=len(records))
+    else:
+        sizes = np.fromiter((len(record.encode(encoding)) for record in records), dtype=np.int64, count=len(records))
+    if os.linesep != '\n':
+        # Text mode writes every \n as os.linesep
+        sizes += (len(os.linesep) - 1) * np.fromiter((record.count('\n') for record in records), dtype=np.int64, count=len(records))
+    return sizes
+
+# Function to pull the five report columns out of a DataFrame, in report order
+def frame_columns(frame, start=0, stop=None):
+    # object arrays keep every value as the same Python object iterrows() used to hand out
+    return [frame.iloc[start:stop, i].to_numpy(dtype=object) for i in range(len(SIDECAR_COLUMNS))]
+
+# Function to render a whole DataFrame (columns in report order) as report text
+def render_report(frame):
+    return render_rows(frame_columns(frame))
+
+# The writer appends chunks of rows to the text report and to its sidecar.
+class ReportWriter:
+    def __init__(self, output_file, sidecar=True, offsets=True):
+        self.output_file = output_file
+        self.rows = 0
+        self._file = open(output_file, 'w')
+        self._sidecar = SidecarWriter(sidecar_path(output_file)) if sidecar else None
+        self._sizes = [] if offsets else None
+
+    # Function to append rows given as five equally long columns
+    def append(self, columns):
+        records = render_records(columns)
+        text = "".join(records)
+        self._file.write(text)
+        if self._sizes is not None:
+            self._sizes.append(record_sizes(records, text, self._file.encoding))
+        if self._sidecar is not None:
+            self._sidecar.append({column: values for (column, _), values in zip(SIDECAR_COLUMNS, columns)})
+        self.rows += len(columns[0])
+
+    def close(self):
+        self._file.close()
+        if self._sidecar is not None:
+            self._sidecar.close()
+        if self._sizes is not None:
+            self.write_offsets()
+
+    # Function to save the byte offset of every record; skipped if the sizes do not add up to the file
+    def write_offsets(self):
+        path = offsets_path(self.output_file)
+        sizes = np.concatenate(self._sizes) if self._sizes else np.empty(0, dtype=np.int64)
+        offsets = np.zeros(len(sizes) + 1, dtype=np.int64)
+        np.cumsum(sizes, out=offsets[1:])
+        if offsets[-1] == os.path.getsize(self.output_file):
+            write_offsets(path, offsets)
+        elif os.path.exists(path):
+            os.remove(path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._file.close()
+            if self._sidecar is not None:
+                self._sidecar.__exit__(exc_type, exc, tb)
+
+# Function to tell which ratings make the top picks: above the threshold, and a valid rating
+# Ratings outside schema.VALID_RANGES (an 11.0 in a broken dump) are reported by validate() and left out.
+def top_pick_mask(ratings, threshold=7.5):
+    low, high = VALID_RANGES['rating']
+    ratings = np.asarray(ratings)
+    return (ratings > threshold) & (ratings >= low) & (ratings <= high)
+
+# Function to pick the rows of a report and put them in report order: rated above the threshold, highest
+# rating first, and equal ratings in the order of their rows in data.csv. Every path that writes a report
+# (in memory, streamed, incremental, sharded) ranks this way, so they all produce the same file.
+def rank_rows(ratings, threshold=7.5):
+    ratings = np.asarray(ratings)
+    rows = np.flatnonzero(top_pick_mask(ratings, threshold))
+    return rows[np.argsort(-ratings[rows], kind='stable')]
+
+# Function to give typed columns (see schema.py) back the values the report has always shown
+# Years are written as 'Year: 2001.0' and ratings as read; float32 keeps about 7 significant digits, so
+# rounding to 6 decimals gives back the 0-10 rating that was in the CSV.
+def report_values(picks, columns):
+    return picks.assign(**{
+        columns['year']: picks[columns['year']].astype('float64'),
+        columns['rating']: picks[columns['rating']].astype('float64').round(6),
+    })
+
+# Function to save the top picks (a DataFrame with the report columns in order) to the text report
+def write_report(frame, output_file='HBO_Max_Top_Picks.txt', chunk_rows=DEFAULT_CHUNK_ROWS, sidecar=True, offsets=True):
+    with span('report_write', path=output_file) as stage:
+        with ReportWriter(output_file, sidecar=sidecar, offsets=offsets) as writer:
+            for start in range(0, len(frame), chunk_rows):
+                writer.append(frame_columns(frame, start, start + chunk_rows))
+        stage.add(rows=writer.rows, bytes_written=lambda: file_size(output_file))
+    return writer.rows
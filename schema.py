@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+import difflib
+import hashlib
+import json
+import os
+import numpy as np
+import pandas as pd
+
+"""
+This is where the scripts agree on which columns of the Kaggle HBO Max dataset they use. The column names
+are normalized to lowercase and matched with fuzzy matching, falling back to the known names of the
+octopusteam/full-hbo-max-dataset when nothing close enough is found.
+
+Matching is done once per distinct header: the result is kept by a hash of the header, in memory and in a
+small JSON file (~/.cache/datamax/schemas.json, or $DATAMAX_SCHEMA_CACHE), so a later run on a file with the
+same columns skips difflib entirely. The resolved CsvSchema also knows the dtype of every column, so
+read_csv only parses the columns we use, straight into nullable integers for years and votes and float32 for
+ratings, instead of inferring everything as object and float64. Missing columns are reported all at once
+before anything is read, and bad values are collected by validate() in one vectorized pass.
+"""
+
+# The columns the analysis needs: (key, name we search for, default column name)
+EXPECTED_COLUMNS = (
+    ('title', 'title', 'title'),
+    ('rating', 'imdb_rating', 'imdbaveragerating'),
+    ('genres', 'genre', 'genres'),
+    ('year', 'year', 'releaseyear'),
+    ('countries', 'available_regions', 'availablecountries'),
+)
+
+# The dtype every column is read with: by key for the expected columns, by normalized name for the extra ones
+COLUMN_DTYPES = {
+    'title': object,
+    'rating': 'float32',
+    'genres': object,
+    'year': 'Int16',
+    'countries': object,
+}
+EXTRA_DTYPES = {
+    'type': 'category',
+    'imdbid': object,
+    'imdbnumvotes': 'Int32',
+}
+# Values outside these ranges are reported by validate(): (low, high), either may be None
+VALID_RANGES = {
+    'rating': (0, 10),
+    'year': (1870, 2100),
+    'imdbnumvotes': (0, None),
+}
+# What happens to the rows with a value out of range, added to the problem they are reported with
+RANGE_NOTES = {
+    'rating': 'left out of the top picks',
+}
+
+SCHEMA_CACHE_FILE = os.environ.get('DATAMAX_SCHEMA_CACHE') or os.path.join(os.path.expanduser('~'), '.cache', 'datamax', 'schemas.json')
+
+# Schemas resolved in this process, by header hash
+_schemas = {}
+
+# Raised when required columns are missing; a KeyError so the scripts' existing handlers still catch it.
+class SchemaError(KeyError):
+    def __init__(self, missing):
+        super().__init__(f"Missing columns in the dataset - {missing}")
+        self.missing = missing
+
+# Function to normalize column names so everything is understood in lowercased text
+def normalize_columns(columns):
+    return [str(col).strip().lower() for col in columns]
+
+# Helper function to find the closest matching column
+def find_closest_column(expected_name, columns):
+    match = difflib.get_close_matches(expected_name.lower(), normalize_columns(columns), n=1, cutoff=0.6)
+    return match[0] if match else None
+
+# Function to hash a header together with what we look for in it, so changing EXPECTED_COLUMNS invalidates the cache
+def header_hash(columns):
+    text = json.dumps([[str(col) for col in columns], EXPECTED_COLUMNS])
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+# Function to read the saved schemas, or nothing if the file is missing or unreadable
+def load_schema_cache(path=SCHEMA_CACHE_FILE):
+    try:
+        with open(path) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+# Function to add one resolved header to the saved schemas; a read-only home just means no caching
+def save_schema(key, columns, path=SCHEMA_CACHE_FILE):
+    saved = load_schema_cache(path)
+    saved[key] = columns
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + '.tmp', 'w') as file:
+            json.dump(saved, file)
+        os.replace(path + '.tmp', path)
+    except OSError:
+        pass
+
+# Function to resolve every expected column, returning {key: normalized column name}
+def resolve_columns(columns):
+    return dict(resolve_header(columns).columns)
+
+# Function to resolve a header once: from memory, from the saved schemas, or with difflib as a last resort
+def resolve_header(header):
+    header = [str(col) for col in header]
+    key = header_hash(header)
+    schema = _schemas.get(key)
+    if schema is None:
+        columns = load_schema_cache().get(key)
+        if columns is None:
+            columns = {key: find_closest_column(expected, header) or default for key, expected, default in EXPECTED_COLUMNS}
+            save_schema(key, columns)
+        schema = _schemas[key] = CsvSchema(header, columns)
+    return schema
+
+# Function to read the header of a CSV file and resolve it
+def schema_for(file_path):
+    return resolve_header(pd.read_csv(file_path, nrows=0).columns)
+
+# The resolved columns of one header, and how to read them. Plain attributes only, so it pickles to workers.
+class CsvSchema:
+    def __init__(self, header, columns):
+        self.header = list(header)
+        self.columns = columns
+        self.original = dict(zip(normalize_columns(header), header))
+
+    # The normalized names of the expected columns that are not in the header
+    @property
+    def missing(self):
+        return [column for column in self.columns.values() if column not in self.original]
+
+    # Function to fail early, naming every missing column at once
+    def check(self):
+        if self.missing:
+            raise SchemaError(self.missing)
+        return self
+
+    # Function to map a normalized column name to the dtype it is read with
+    def dtype(self, column):
+        for key, name in self.columns.items():
+            if name == column:
+                return COLUMN_DTYPES[key]
+        return EXTRA_DTYPES.get(column, object)
+
+    # Function to list the normalized names to read: the expected columns, then any extras the file has
+    def usecols(self, extra=()):
+        names = list(dict.fromkeys(self.columns.values()))
+        return names + [column for column in extra if column in self.original and column not in names]
+
+    # The normalized names of every column in the header, to read a whole file with read(extra=schema.names)
+    @property
+    def names(self):
+        return normalize_columns(self.header)
+
+    # Function to read a CSV with this header, parsing only the needed columns with their dtypes
+    # Columns come back normalized, in file order. Values that do not parse become NA and are listed in
+    # the frame's attrs['problems'] (see validate()).
+    def read(self, file_path, extra=(), **kwargs):
+        self.check()
+        kinds = {column: self.dtype(column) for column in self.usecols(extra)}
+        usecols = [self.original[column] for column in kinds]
+        # pandas parses nullable integers far slower than floats, so whole numbers are read as float64
+        # (exact up to 2**53) and converted afterwards
+        parse = {column: 'float64' if is_integer(kind) else kind for column, kind in kinds.items()}
+        try:
+            data = pd.read_csv(file_path, usecols=usecols, dtype={self.original[c]: kind for c, kind in parse.items()}, **kwargs)
+            text = {}
+        except (ValueError, TypeError):
+            # Some value is not a number: read the numbers as text and convert them column by column
+            text = {column: kind for column, kind in parse.items() if kind not in (object, 'category')}
+            dtype = {self.original[c]: object if c in text else kind for c, kind in parse.items()}
+            data = pd.read_csv(file_path, usecols=usecols, dtype=dtype, **kwargs)
+        return convert_columns(data, kinds, text)
+
+    # Function to read a CSV with this header in chunks, each typed and checked like read()
+    # The numbers are left to pandas and converted per chunk, so one bad value only costs its own chunk a
+    # slower conversion. Chunks keep the row numbers of the file as their index, and so do their problems.
+    def read_chunks(self, file_path, chunksize, extra=()):
+        self.check()
+        kinds = {column: self.dtype(column) for column in self.usecols(extra)}
+        text = {column: 'float64' if is_integer(kind) else kind
+                for column, kind in kinds.items() if kind not in (object, 'category')}
+        dtype = {self.original[c]: kind for c, kind in kinds.items() if c not in text}
+        usecols = [self.original[column] for column in kinds]
+        for chunk in pd.read_csv(file_path, usecols=usecols, dtype=dtype, chunksize=chunksize):
+            yield convert_columns(chunk, kinds, text)
+
+# Function to finish a frame read with CsvSchema: normalize the names, convert the numbers read as text and
+# the whole numbers read as floats, and list what did not convert in attrs['problems']
+def convert_columns(data, kinds, text):
+    data.columns = normalize_columns(data.columns)
+    problems = [coerce_numbers(data, column, kind) for column, kind in text.items()]
+    problems += [to_nullable_int(data, column, kind) for column, kind in kinds.items() if is_integer(kind)]
+    data.attrs['problems'] = pd.concat([problem_frame()] + [p for p in problems if len(p)], ignore_index=True)
+    return data
+
+# Function to tell whether a dtype is one of pandas' nullable integers
+def is_integer(dtype):
+    return isinstance(dtype, str) and dtype.startswith(('Int', 'UInt'))
+
+# Function to build an empty (or filled) table of problems: one row per bad value
+def problem_frame(rows=(), column=None, values=(), problem=None):
+    return pd.DataFrame({'row': np.asarray(rows, dtype=np.int64), 'column': column,
+                         'value': pd.Series(values, dtype=object), 'problem': problem})
+
+# Function to turn positions in a frame into the row numbers problems are reported with (its index, which
+# is the row of the file, also for a chunk)
+def row_numbers(data, positions):
+    return data.index.to_numpy()[positions]
+
+# Function to convert one text column to numbers in place, returning the values that are not numbers
+def coerce_numbers(data, column, dtype):
+    raw = data[column]
+    numbers = pd.to_numeric(raw, errors='coerce')
+    rows = np.flatnonzero((raw.notna() & numbers.isna()).to_numpy())
+    data[column] = numbers.astype(dtype)
+    return problem_frame(row_numbers(data, rows), column, raw.iloc[rows].to_numpy(), 'not a number')
+
+# Function to convert a float column to a nullable integer in place, returning the values that are not
+# whole numbers or do not fit
+def to_nullable_int(data, column, dtype):
+    values = data[column].to_numpy(dtype=np.float64)
+    limits = np.iinfo(dtype.lower())
+    missing = np.isnan(values)
+    bad = ~missing & ((values != np.round(values)) | (values < limits.min) | (values > limits.max))
+    rows = np.flatnonzero(bad)
+    missing |= bad
+    data[column] = pd.arrays.IntegerArray(np.where(missing, 0, values).astype(dtype.lower()), missing)
+    return problem_frame(row_numbers(data, rows), column, values[rows].astype(object), f'not a whole number that fits {dtype}')
+
+# Function to collect every problem of a frame read with CsvSchema.read in one vectorized pass
+# Returns a DataFrame with the row, column, value and problem of each bad value (empty when all is well).
+def validate(data, schema):
+    problems = [data.attrs.get('problems', problem_frame())]
+    title = data[schema.columns['title']]
+    rows = np.flatnonzero(title.isna().to_numpy())
+    problems.append(problem_frame(row_numbers(data, rows), schema.columns['title'], title.iloc[rows].to_numpy(), 'missing'))
+
+    for name, (low, high) in VALID_RANGES.items():
+        column = schema.columns.get(name, name)
+        if column not in data.columns:
+            continue
+        values = data[column]
+        outside = pd.Series(False, index=values.index)
+        if low is not None:
+            outside |= values < low
+        if high is not None:
+            outside |= values > high
+        rows = np.flatnonzero(outside.fillna(False).to_numpy(dtype=bool))
+        problem = f'outside {low}..{high}' if low is not None and high is not None else f'below {low}' if low is not None else f'above {high}'
+        if name in RANGE_NOTES:
+            problem += f', {RANGE_NOTES[name]}'
+        problems.append(problem_frame(row_numbers(data, rows), column, values.iloc[rows].to_numpy(dtype=object), problem))
+    problems = pd.concat([p for p in problems if len(p)] or [problem_frame()], ignore_index=True)
+    return problems.sort_values(['row', 'column'], kind='stable', ignore_index=True)
+
+# Function to summarize a table of problems in a few lines
+def describe_problems(problems, limit=5):
+    if problems.empty:
+        return "no problems found"
+    counts = problems.groupby(['column', 'problem'], sort=True).size()
+    return format_problems(len(problems), counts, problems.head(limit))
+
+# Function to write the summary: the total, a count per column and problem, and the first few bad values
+def format_problems(total, counts, examples):
+    lines = [f"{total} bad values:"]
+    lines += [f"  {column}: {count} {problem}" for (column, problem), count in counts.items()]
+    lines += [f"  row {row}, {column}: {value!r} ({problem})" for row, column, value, problem in examples.itertuples(index=False)]
+    return "\n".join(lines)
+
+# Adds up the problems of a file read in chunks without keeping them all: the counts per column and
+# problem, and the first few bad values for the summary.
+class ProblemTally:
+    def __init__(self, limit=5):
+        self.limit = limit
+        self.total = 0
+        self.counts = {}
+        self.examples = problem_frame()
+
+    def add(self, problems):
+        if problems.empty:
+            return
+        self.total += len(problems)
+        for key, count in problems.groupby(['column', 'problem'], sort=True).size().items():
+            self.counts[key] = self.counts.get(key, 0) + int(count)
+        if len(self.examples) < self.limit:
+            self.examples = pd.concat([self.examples, problems.head(self.limit - len(self.examples))], ignore_index=True)
+
+    def describe(self):
+        if not self.total:
+            return "no problems found"
+        return format_problems(self.total, dict(sorted(self.counts.items())), self.examples)
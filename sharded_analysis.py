@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+import argparse
+import glob
+import heapq
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from instrument import span
+from report_offsets import merge_reports
+from report_writer import rank_rows, report_values, write_report
+from schema import schema_for, validate
+
+"""
+This runs the top picks analysis over many catalog dumps at once (one per region, one per snapshot date, ...)
+and merges them into one global ranking. The CSV files are found from a directory or a glob pattern, their
+headers are resolved once in the parent (files with the same header share one schema, see schema.py), and
+every file is analyzed in its own worker process with the schema handed to it, so no worker repeats the
+column matching. Each worker writes the report of its shard and returns the sorted ratings of its picks; the
+parent then does a k-way merge of those sorted lists (ties go to the earlier file, then the earlier row) and
+builds the global report by copying the shard records byte for byte in that order (see report_offsets.py).
+
+    python sharded_analysis.py "dumps/*.csv" --workers 8
+    python sharded_analysis.py data/ --top 1000
+"""
+
+REPORT_COLUMNS = ('title', 'genres', 'year', 'rating', 'countries')
+
+# Function to list the CSV files of a directory (searched recursively) or of a glob pattern, in a stable order
+def find_shards(pattern):
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, '**', '*.csv')
+    return sorted(glob.glob(pattern, recursive=True))
+
+# Function to name the report of a shard after its path, so data/se/data.csv and data/br/data.csv do not collide
+def shard_report_name(file_path, root):
+    relative = os.path.relpath(file_path, root)
+    return os.path.splitext(relative)[0].replace(os.sep, '__') + '.txt'
+
+# Function that runs in a worker process: analyze one shard with the schema resolved by the parent
+def analyze_shard(file_path, schema, output_file, threshold=7.5, top_n=None):
+    start = time.perf_counter()
+    data = schema.read(file_path)
+    problems = validate(data, schema)
+    columns = schema.columns
+
+    # The same ranking as the other scripts (see report_writer.rank_rows); equal ratings keep their file order
+    ratings = data[columns['rating']].to_numpy()
+    keep = rank_rows(ratings, threshold)[:top_n]
+    picks = report_values(data.iloc[keep][[columns[key] for key in REPORT_COLUMNS]], columns)
+    write_report(picks, output_file)
+    return {
+        'path': file_path, 'report': output_file, 'rows': len(data), 'picks': len(picks),
+        'problems': len(problems), 'ratings': ratings[keep], 'seconds': time.perf_counter() - start,
+    }
+
+# Function to merge the sorted ratings of every shard into one ranking, as (shard, position) arrays
+# This is a k-way merge: ties go to the earlier shard, then the earlier row, like one big stable sort.
+def merge_ranking(shard_ratings, top_n=None):
+    streams = [zip((-ratings).tolist(), itertools.repeat(shard), range(len(ratings)))
+               for shard, ratings in enumerate(shard_ratings)]
+    merged = heapq.merge(*streams)
+    if top_n is not None:
+        merged = itertools.islice(merged, top_n)
+    shards, positions = [], []
+    for _, shard, position in merged:
+        shards.append(shard)
+        positions.append(position)
+    return np.array(shards, dtype=np.int64), np.array(positions, dtype=np.int64)
+
+# Function to analyze every CSV matching a pattern across a process pool and merge the top picks
+def analyze_shards(pattern, output_file='HBO_Max_Top_Picks.txt', shard_dir='shards', threshold=7.5, top_n=None, workers=None):
+    wall_start = time.perf_counter()
+    paths = find_shards(pattern)
+    if not paths:
+        print(f"No CSV files found for '{pattern}'.")
+        return None
+
+    # Resolve every header in the parent; files with the same header get the same schema object
+    schemas = {}
+    with span('column_resolution', shards=len(paths)):
+        for path in paths:
+            try:
+                schemas[path] = schema_for(path).check()
+            except (KeyError, ValueError, OSError) as e:
+                print(f"Skipping {path}: {e}")
+    paths = [path for path in paths if path in schemas]
+    if not paths:
+        return None
+    print(f"Analyzing {len(paths)} files ({len({id(schema) for schema in schemas.values()})} distinct headers)")
+
+    os.makedirs(shard_dir, exist_ok=True)
+    root = os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in paths])
+    results = [None] * len(paths)
+    with span('shards', shards=len(paths)) as stage:
+        shard_start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(analyze_shard, path, schemas[path],
+                            os.path.join(shard_dir, shard_report_name(os.path.abspath(path), root)), threshold, top_n): i
+                for i, path in enumerate(paths)
+            }
+            for future in as_completed(futures):
+                path = paths[futures[future]]
+                try:
+                    result = results[futures[future]] = future.result()
+                except Exception as e:
+                    # One unreadable file should not cost the whole run; it is left out of the merge
+                    print(f"Skipping {path}: {e}")
+                    continue
+                print(f"{result['rows']:10d} rows {result['picks']:9d} picks {result['seconds']:7.2f}s  {result['path']}")
+        shard_seconds = time.perf_counter() - shard_start
+        results = [result for result in results if result is not None]
+        stage.add(rows=sum(result['rows'] for result in results))
+    if not results:
+        return None
+
+    merge_start = time.perf_counter()
+    with span('merge', path=output_file) as stage:
+        shards, positions = merge_ranking([result['ratings'] for result in results], top_n)
+        written = merge_reports([result['report'] for result in results], shards, positions, output_file)
+        stage.add(rows=written)
+    summary = {
+        'shards': len(results),
+        'rows': sum(result['rows'] for result in results),
+        'picks': sum(result['picks'] for result in results),
+        'problems': sum(result['problems'] for result in results),
+        'written': written,
+        'shard_seconds': shard_seconds,
+        'merge_seconds': time.perf_counter() - merge_start,
+        'wall_seconds': time.perf_counter() - wall_start,
+    }
+    print(f"Merged {summary['written']} top picks from {summary['shards']} files ({summary['rows']} rows) "
+          f"into {output_file} in {summary['wall_seconds']:.2f}s")
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyze many catalog CSVs in parallel and merge their top picks")
+    parser.add_argument('pattern', help="a directory (searched for *.csv) or a glob pattern such as 'dumps/*.csv'")
+    parser.add_argument('--output', default='HBO_Max_Top_Picks.txt', help="global report to write")
+    parser.add_argument('--shard-dir', default='shards', help="folder for the report of every file")
+    parser.add_argument('--threshold', type=float, default=7.5)
+    parser.add_argument('--top', type=int, default=None, help="only keep the best N titles")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: one per core)")
+    args = parser.parse_args()
+    analyze_shards(args.pattern, args.output, args.shard_dir, args.threshold, args.top, args.workers)
+
+if __name__ == "__main__":
+    main()
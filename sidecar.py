@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+import json
+import os
+import shutil
+import numpy as np
+import pandas as pd
+
+"""
+This is the machine readable companion of HBO_Max_Top_Picks.txt. Next to the text report the analysis
+writes a small directory of columns: numbers are stored as raw little-endian arrays and strings as one
+UTF-8 blob plus an offsets array, with a meta.json describing them. The GUI memory-maps these files, so
+years and ratings come back as real numbers and no text has to be parsed at all. The text report stays
+for humans to read.
+"""
+
+META_FILE = 'meta.json'
+FORMAT_VERSION = 1
+
+# The report columns in the order they are written, with the dtype used for the numeric ones.
+SIDECAR_COLUMNS = (
+    ('title', 'str'),
+    ('genre', 'str'),
+    ('year', '<f8'),
+    ('imdb rating', '<f8'),
+    ('available regions', 'str'),
+)
+
+# Function to find the sidecar directory that belongs to a text report
+def sidecar_path(report_file):
+    root, _ = os.path.splitext(report_file)
+    return root + '.cols'
+
+# Function to turn a column name into a file name (column names can contain spaces)
+def column_file(directory, column, suffix):
+    return os.path.join(directory, column.replace(' ', '_') + suffix)
+
+# The writer appends batches of rows and only publishes the sidecar when it is closed.
+class SidecarWriter:
+    def __init__(self, directory, columns=SIDECAR_COLUMNS):
+        self.directory = directory
+        self.columns = columns
+        self.rows = 0
+        self._tmp = directory + '.tmp'
+        shutil.rmtree(self._tmp, ignore_errors=True)
+        os.makedirs(self._tmp)
+        self._files = {}
+        self._string_end = {}
+        for column, kind in columns:
+            if kind == 'str':
+                self._files[column] = (
+                    open(column_file(self._tmp, column, '.bytes'), 'wb'),
+                    open(column_file(self._tmp, column, '.offsets'), 'wb'),
+                    open(column_file(self._tmp, column, '.valid'), 'wb'),
+                )
+                self._string_end[column] = 0
+                np.zeros(1, dtype='<i8').tofile(self._files[column][1])
+            else:
+                self._files[column] = (open(column_file(self._tmp, column, '.data'), 'wb'),)
+
+    # Function to append a batch of rows given as {column: sequence of values}
+    def append(self, batch):
+        encoded = {}
+        for column, kind in self.columns:
+            values = batch[column]
+            if kind == 'str':
+                is_valid = pd.notna(pd.Series(values, dtype=object)).to_numpy()
+                items = [str(value).encode('utf-8') if ok else b'' for value, ok in zip(values, is_valid)]
+                encoded[column] = (b''.join(items), np.fromiter(map(len, items), dtype='<i8', count=len(items)), is_valid)
+            else:
+                encoded[column] = np.asarray(pd.to_numeric(pd.Series(values), errors='coerce'), dtype=kind)
+        self.append_encoded(encoded)
+
+    # Function to append rows that are already encoded: (UTF-8 blob, lengths, valid) for string columns and
+    # arrays for numeric ones. Rows copied from other sidecars never have to be decoded this way.
+    def append_encoded(self, batch):
+        lengths = {len(batch[column][1]) if kind == 'str' else len(batch[column]) for column, kind in self.columns}
+        if len(lengths) != 1:
+            raise ValueError("Every column in a sidecar batch needs the same number of rows")
+        for column, kind in self.columns:
+            if kind == 'str':
+                blob, offsets, valid = self._files[column]
+                data, sizes, is_valid = batch[column]
+                ends = self._string_end[column] + np.cumsum(sizes, dtype='<i8')
+                blob.write(data)
+                ends.astype('<i8').tofile(offsets)
+                np.asarray(is_valid).astype(np.uint8).tofile(valid)
+                if len(ends):
+                    self._string_end[column] = int(ends[-1])
+            else:
+                np.asarray(batch[column], dtype=kind).tofile(self._files[column][0])
+        self.rows += lengths.pop()
+
+    # Function to finish the files and swap the new sidecar in place of the old one
+    def close(self):
+        for handles in self._files.values():
+            for handle in handles:
+                handle.close()
+        meta = {
+            'version': FORMAT_VERSION,
+            'rows': self.rows,
+            'columns': [{'name': column, 'kind': kind} for column, kind in self.columns],
+        }
+        with open(os.path.join(self._tmp, META_FILE), 'w') as file:
+            json.dump(meta, file)
+
+        old = self.directory + '.old'
+        shutil.rmtree(old, ignore_errors=True)
+        if os.path.exists(self.directory):
+            os.rename(self.directory, old)
+        os.rename(self._tmp, self.directory)
+        shutil.rmtree(old, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            for handles in self._files.values():
+                for handle in handles:
+                    handle.close()
+            shutil.rmtree(self._tmp, ignore_errors=True)
+
+# Function to memory-map one raw array, handling empty files which cannot be mapped
+def map_array(path, dtype, length):
+    if length == 0:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode='r', shape=(length,))
+
+# Function to decode a string column from its blob and offsets
+def decode_strings(directory, column, rows):
+    offsets = map_array(column_file(directory, column, '.offsets'), '<i8', rows + 1)
+    valid = map_array(column_file(directory, column, '.valid'), np.uint8, rows)
+    blob = map_array(column_file(directory, column, '.bytes'), np.uint8, int(offsets[-1])).tobytes()
+    starts = offsets[:-1].tolist()
+    ends = offsets[1:].tolist()
+    return [blob[start:end].decode('utf-8') if ok else None for start, end, ok in zip(starts, ends, valid.tolist())]
+
+# Function to write a sidecar made of rows of other sidecars: row positions[i] of sources[shards[i]]
+# Strings are copied as encoded bytes, so nothing is decoded or encoded again.
+def copy_rows(sources, shards, positions, directory, batch_rows=50_000):
+    metas = []
+    for source in sources:
+        with open(os.path.join(source, META_FILE), 'r') as file:
+            metas.append(json.load(file))
+    counts = [meta['rows'] for meta in metas]
+    index = np.cumsum([0] + counts[:-1], dtype=np.int64)[shards] + positions if len(sources) else np.empty(0, dtype=np.int64)
+
+    # Every source column as one array (strings as one blob with starts and ends into it)
+    columns = {}
+    for column, kind in SIDECAR_COLUMNS:
+        if kind == 'str':
+            blobs, starts, ends, valid = [], [], [], []
+            base = 0
+            for source, rows in zip(sources, counts):
+                offsets = map_array(column_file(source, column, '.offsets'), '<i8', rows + 1)
+                blobs.append(map_array(column_file(source, column, '.bytes'), np.uint8, int(offsets[-1])).tobytes())
+                starts.append(offsets[:-1] + base)
+                ends.append(offsets[1:] + base)
+                valid.append(map_array(column_file(source, column, '.valid'), np.uint8, rows))
+                base += int(offsets[-1])
+            columns[column] = (b''.join(blobs), np.concatenate(starts or [[]]).astype(np.int64),
+                               np.concatenate(ends or [[]]).astype(np.int64), np.concatenate(valid or [[]]).astype(bool))
+        else:
+            columns[column] = np.concatenate([map_array(column_file(source, column, '.data'), kind, rows)
+                                              for source, rows in zip(sources, counts)] or [np.empty(0, dtype=kind)])
+
+    with SidecarWriter(directory) as writer:
+        for first in range(0, len(index), batch_rows):
+            rows = index[first:first + batch_rows]
+            batch = {}
+            for column, kind in SIDECAR_COLUMNS:
+                if kind == 'str':
+                    blob, starts, ends, valid = columns[column]
+                    batch[column] = (b''.join([blob[start:end] for start, end in zip(starts[rows].tolist(), ends[rows].tolist())]),
+                                     ends[rows] - starts[rows], valid[rows])
+                else:
+                    batch[column] = columns[column][rows]
+            writer.append_encoded(batch)
+    return directory
+
+# Function to load the sidecar into a DataFrame; numeric columns stay backed by the memory map
+def load_sidecar(directory):
+    with open(os.path.join(directory, META_FILE), 'r') as file:
+        meta = json.load(file)
+    if meta.get('version') != FORMAT_VERSION:
+        raise ValueError(f"Unsupported sidecar version {meta.get('version')} in '{directory}'")
+
+    rows = meta['rows']
+    data = {}
+    for column in meta['columns']:
+        name, kind = column['name'], column['kind']
+        if kind == 'str':
+            data[name] = pd.Series(decode_strings(directory, name, rows), dtype=object)
+        else:
+            data[name] = pd.Series(map_array(column_file(directory, name, '.data'), kind, rows), copy=False)
+    return pd.DataFrame(data)
+
+# Function to tell whether the sidecar exists and was written after the text report
+def sidecar_is_fresh(report_file):
+    meta_file = os.path.join(sidecar_path(report_file), META_FILE)
+    if not os.path.exists(meta_file):
+        return False
+    return os.stat(meta_file).st_mtime_ns >= os.stat(report_file).st_mtime_ns
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+import argparse
+import numpy as np
+import pandas as pd
+from compact import compact_frame
+from schema import normalize_columns, schema_for
+
+"""
+This answers "titles like this one" from the genres (and optionally the countries) of every title. The
+genre lists are turned into a 0/1 matrix once, with one row per title and one column per genre. Then the
+Jaccard or cosine similarity of one title against the whole catalog is a single matrix-vector product, and
+for many titles at once a matrix-matrix product, worked through in blocks so memory stays bounded. The
+best K are picked with np.argpartition instead of sorting the whole catalog. Only those K are sorted,
+with equal scores ranked by IMDb rating.
+
+    python similarity.py data.csv "Band of Brothers" --k 10 --metric cosine --countries
+"""
+
+METRICS = ('jaccard', 'cosine')
+# Added to the scores to rank equal similarities by rating; far below the gap between two distinct scores
+TIE_BREAK = 1e-7
+# Upper bound on the size of one (queries x titles) score block in batch queries
+BLOCK_CELLS = 1 << 23
+
+class SimilarityEngine:
+    def __init__(self, features, weights, titles, ratings, genres):
+        self.features = features
+        self.weights = weights
+        self.titles = titles
+        self.ratings = ratings
+        self.genres = genres
+        # Weighted sizes of every row, for the Jaccard union and the cosine norm
+        self.sizes = features @ weights
+        self.norms = np.sqrt(features @ (weights * weights))
+        self.tie_break = np.nan_to_num(ratings, nan=0.0) / 10 * TIE_BREAK
+        self._lookup = None
+
+    # Function to build the engine from a loaded data.csv frame (genres, plus countries when asked for)
+    @classmethod
+    def from_frame(cls, data, countries=False, country_weight=0.5):
+        catalog = compact_frame(data)
+        matrices = [catalog.genres.dense(np.float32)]
+        weights = [np.ones(len(catalog.genres.vocab), dtype=np.float32)]
+        if countries:
+            matrices.append(catalog.countries.dense(np.float32))
+            weights.append(np.full(len(catalog.countries.vocab), country_weight, dtype=np.float32))
+        features = np.hstack(matrices) if len(matrices) > 1 else matrices[0]
+
+        columns = catalog.columns
+        titles = catalog.frame[columns['title']].astype(object).to_numpy()
+        ratings = catalog.frame[columns['rating']].to_numpy(dtype=np.float64, na_value=np.nan)
+        original = dict(zip(normalize_columns(data.columns), data.columns))
+        genres = data[original[columns['genres']]].astype(object).to_numpy()
+        return cls(features, np.concatenate(weights), titles, ratings, genres)
+
+    # Function to load data.csv and build the engine
+    @classmethod
+    def from_csv(cls, file_path, countries=False, country_weight=0.5):
+        return cls.from_frame(schema_for(file_path).read(file_path), countries, country_weight)
+
+    def __len__(self):
+        return len(self.titles)
+
+    # Function to find the row of a title (case-insensitive, first match)
+    def find(self, title):
+        if self._lookup is None:
+            keys = pd.Series(self.titles).astype(str).str.casefold()
+            self._lookup = dict(zip(keys.iloc[::-1].tolist(), range(len(keys) - 1, -1, -1)))
+        row = self._lookup.get(str(title).casefold())
+        if row is None:
+            raise KeyError(f"Title not found: {title}")
+        return row
+
+    # Function to score a block of query rows against every title; returns a (queries x titles) matrix
+    def scores(self, rows, metric='jaccard'):
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric {metric!r}, expected one of {METRICS}")
+        rows = np.asarray(rows)
+        queries = self.features[rows]
+        if metric == 'jaccard':
+            intersection = (queries * self.weights) @ self.features.T
+            denominator = self.sizes[rows][:, None] + self.sizes[None, :] - intersection
+        else:
+            intersection = (queries * (self.weights * self.weights)) @ self.features.T
+            denominator = self.norms[rows][:, None] * self.norms[None, :]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(denominator > 0, intersection / denominator, 0).astype(np.float64)
+
+    # Function to pick the best k of every row of a score block, best first; the query itself is left out
+    def top_k(self, scores, rows, k):
+        k = min(k, len(self) - 1)
+        if k <= 0:
+            return np.empty((len(rows), 0), dtype=np.int64), np.empty((len(rows), 0))
+        scores[np.arange(len(rows)), rows] = -np.inf
+        scores += self.tie_break
+        # argpartition puts the k best (in any order) at the end; only those are sorted
+        best = np.argpartition(scores, len(self) - k, axis=1)[:, -k:]
+        best_scores = np.take_along_axis(scores, best, axis=1)
+        order = np.argsort(-best_scores, axis=1, kind='stable')
+        best = np.take_along_axis(best, order, axis=1)
+        return best, np.take_along_axis(best_scores, order, axis=1) - self.tie_break[best]
+
+    # Function to find the k most similar titles for many query rows at once; returns (rows, scores), both queries x k
+    def similar_batch(self, rows, k=10, metric='jaccard'):
+        rows = np.asarray(rows, dtype=np.int64)
+        block = max(1, BLOCK_CELLS // max(1, len(self)))
+        indices, values = [], []
+        for start in range(0, len(rows), block):
+            chunk = rows[start:start + block]
+            best, best_scores = self.top_k(self.scores(chunk, metric), chunk, k)
+            indices.append(best)
+            values.append(best_scores)
+        return np.vstack(indices), np.vstack(values)
+
+    # Function to list the k titles most similar to one title (given by row number or by name)
+    def similar(self, title_or_row, k=10, metric='jaccard'):
+        row = title_or_row if isinstance(title_or_row, (int, np.integer)) else self.find(title_or_row)
+        best, best_scores = self.similar_batch([row], k, metric)
+        best = best[0]
+        return pd.DataFrame({
+            'title': self.titles[best],
+            'genres': self.genres[best],
+            'imdb rating': self.ratings[best],
+            'similarity': np.round(best_scores[0], 4),
+        })
+
+def main():
+    parser = argparse.ArgumentParser(description="List the titles most similar to a title")
+    parser.add_argument('csv_path', nargs='?', default='data.csv')
+    parser.add_argument('title')
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--metric', choices=METRICS, default='jaccard')
+    parser.add_argument('--countries', action='store_true', help="also compare where the titles are available")
+    args = parser.parse_args()
+
+    engine = SimilarityEngine.from_csv(args.csv_path, countries=args.countries)
+    try:
+        print(engine.similar(args.title, args.k, args.metric).to_string(index=False))
+    except KeyError as e:
+        print(e.args[0])
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+import heapq
+import os
+import pickle
+import tempfile
+import numpy as np
+from instrument import file_size, span
+from schema import ProblemTally, schema_for, validate
+from report_writer import ReportWriter, report_values, top_pick_mask
+
+"""
+This is the streaming version of the top picks analysis for catalog dumps that are much bigger than the
+Kaggle file. The CSV is read in chunks with only the five columns the report needs, typed and checked by
+the same schema as the in-memory analysis (see schema.py; bad values are summed up over the chunks and
+reported once at the end), every chunk is filtered and sorted on its own and spilled to a temporary run file, and the runs are merged back together while the
+report is written. Only one chunk is ever held in memory, so memory stays flat no matter how big the input is.
+When only the best N titles are wanted, a running top-N heap is kept instead of the run files.
+The report and its columnar sidecar are written in batches during the same merge.
+"""
+
+DEFAULT_CHUNKSIZE = 100_000
+WRITE_BATCH = 10_000
+
+REPORT_COLUMNS = ('title', 'genres', 'year', 'rating', 'countries')
+
+# Function to turn the picks of one chunk into (sort key, row, row values) records
+# The key is the negated rating as read (float32), so the order is the one rank_rows() gives the in-memory
+# analysis: highest rating first, and the original row order breaks ties.
+def chunk_records(picks, row_numbers, keys):
+    for key, row, values in zip(keys.tolist(), row_numbers.tolist(), zip(*(picks[col] for col in picks.columns))):
+        yield (key, row, values)
+
+# Function to append a batch of row values to the report writer
+def flush_batch(writer, batch):
+    if batch:
+        writer.append(list(zip(*batch)))
+        batch.clear()
+
+# Function to write one sorted run to a temporary file and return its path
+def spill_run(records, tmp_dir):
+    handle, path = tempfile.mkstemp(prefix='top_picks_run_', suffix='.pkl', dir=tmp_dir)
+    with os.fdopen(handle, 'wb') as file:
+        for record in records:
+            pickle.dump(record, file, protocol=pickle.HIGHEST_PROTOCOL)
+    return path
+
+# Function to read a run file back one record at a time
+def read_run(path):
+    with open(path, 'rb') as file:
+        while True:
+            try:
+                yield pickle.load(file)
+            except EOFError:
+                return
+
+# Function to stream data.csv into the top picks report without loading the whole file
+def stream_top_picks(file_path, output_file='HBO_Max_Top_Picks.txt', threshold=7.5,
+                     chunksize=DEFAULT_CHUNKSIZE, top_n=None, tmp_dir=None):
+    schema = schema_for(file_path).check()
+    columns = schema.columns
+    report_columns = [columns[key] for key in REPORT_COLUMNS]
+    problems = ProblemTally()
+
+    runs = []
+    heap = []
+    rows_read = 0
+    rows_kept = 0
+    try:
+        with span('csv_stream', path=file_path, bytes_read=lambda: file_size(file_path)) as stage:
+            for chunk in schema.read_chunks(file_path, chunksize):
+                stage.add(rows=len(chunk))
+                problems.add(validate(chunk, schema))
+
+                # Filter for top picks, then sort the chunk by IMDb rating in descending order
+                ratings = chunk[columns['rating']].to_numpy()
+                rows = np.flatnonzero(top_pick_mask(ratings, threshold))
+                first_row = rows_read
+                rows_read += len(chunk)
+                if not len(rows):
+                    continue
+                rows_kept += len(rows)
+                picks = report_values(chunk.iloc[rows][report_columns], columns)
+                # Keep the original row number of every pick so ties keep their order in the merge.
+                records = sorted(chunk_records(picks, first_row + rows, -ratings[rows]))
+
+                if top_n is None:
+                    runs.append(spill_run(records, tmp_dir))
+                else:
+                    for record in records:
+                        # The heap holds the best top_n records, with the worst one on top.
+                        item = ((-record[0], -record[1]), record)
+                        if len(heap) < top_n:
+                            heapq.heappush(heap, item)
+                        elif item > heap[0]:
+                            heapq.heapreplace(heap, item)
+
+            stage.add(picks=rows_kept, runs=len(runs))
+
+        if top_n is None:
+            merged = heapq.merge(*(read_run(path) for path in runs))
+        else:
+            merged = sorted(record for _, record in heap)
+
+        # Write the report (and its sidecar) incrementally while the runs are merged
+        batch = []
+        with span('report_write', path=output_file) as stage:
+            with ReportWriter(output_file) as writer:
+                for _, _, values in merged:
+                    batch.append(values)
+                    if len(batch) >= WRITE_BATCH:
+                        flush_batch(writer, batch)
+                flush_batch(writer, batch)
+            stage.add(rows=writer.rows, bytes_written=lambda: file_size(output_file))
+        rows_written = writer.rows
+    finally:
+        for path in runs:
+            os.remove(path)
+
+    if problems.total:
+        print(f"Warning: {problems.describe()}")
+    print(f"Streamed {rows_read} rows, {rows_kept} above {threshold}, wrote {rows_written} to {output_file}")
+    return output_file
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+import unicodedata
+import numpy as np
+import pandas as pd
+
+"""
+This is the title search behind the viewer's search box. Titles are folded once (case and accents
+removed, so "amelie" finds "Amélie"), and every substring of one, two and three characters is indexed
+with the sorted list of rows that contain it. A query is answered by intersecting the lists of its n-grams,
+shortest first, and checking the few remaining candidates with a plain substring test. While the user types,
+each keystroke starts from the result of the longest earlier query it contains instead of the whole
+catalog, so the result set only ever narrows.
+"""
+
+# How many earlier queries and their results are kept for narrowing (backspace finds them again)
+HISTORY_SIZE = 64
+# Bits per character in an n-gram key; code points + 1 always fit in 21 bits
+CHAR_BITS = 21
+
+# Function to fold a string for searching: compatibility-decompose, drop combining accents, casefold
+def fold(text):
+    text = str(text)
+    if text.isascii():
+        return text.lower()
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch)).casefold()
+
+# Function to turn the 1, 2 and 3 character n-grams starting at every position into integer keys
+# codes holds the code points of all folded titles separated by 0; n-grams never cross a separator.
+def ngram_keys(codes, n):
+    keys = np.zeros(len(codes) - n + 1, dtype=np.int64)
+    valid = np.ones(len(keys), dtype=bool)
+    for i in range(n):
+        part = codes[i:len(codes) - n + 1 + i].astype(np.int64)
+        valid &= part != 0
+        keys |= (part + 1) << (CHAR_BITS * (2 - i))
+    return keys, valid
+
+# Function to intersect two sorted arrays of unique rows by binary-searching the shorter one in the longer one
+def intersect_sorted(a, b):
+    if len(a) > len(b):
+        a, b = b, a
+    if not len(a):
+        return a
+    positions = np.minimum(np.searchsorted(b, a), len(b) - 1)
+    return a[b[positions] == a]
+
+# Function to compute the keys of the n-grams of one folded query (all trigrams, or the whole query if shorter)
+def query_keys(folded):
+    n = min(3, len(folded))
+    codes = np.array([ord(ch) for ch in folded], dtype=np.int64)
+    keys, _ = ngram_keys(codes, n)
+    return np.unique(keys)
+
+class TitleIndex:
+    def __init__(self, titles):
+        titles = ['' if title is None or title != title else title for title in titles]
+        # Fold every distinct title once; catalogs repeat titles across types and years
+        distinct = {title: fold(title) for title in set(titles)}
+        self.folded = np.array([distinct[title] for title in titles], dtype=object)
+        self.row_count = len(titles)
+
+        # One long UTF-32 array of all folded titles, separated by 0, and the row of every position
+        text = ''.join(title + '\0' for title in self.folded.tolist())
+        codes = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+        lengths = np.fromiter((len(title) + 1 for title in self.folded), dtype=np.int64, count=self.row_count)
+        rows = np.repeat(np.arange(self.row_count, dtype=np.int64), lengths)
+
+        all_keys, all_rows = [], []
+        for n in (1, 2, 3):
+            if len(codes) < n:
+                continue
+            keys, valid = ngram_keys(codes, n)
+            all_keys.append(keys[valid])
+            all_rows.append(rows[:len(keys)][valid])
+        keys = np.concatenate(all_keys) if all_keys else np.empty(0, dtype=np.int64)
+        rows = np.concatenate(all_rows) if all_rows else np.empty(0, dtype=np.int64)
+
+        # Number the distinct n-grams in key order, then sort (n-gram number, row) packed into one integer;
+        # a plain sort of int64 is far quicker than an argsort, and repeats within a title fall out as duplicates.
+        codes, uniques = pd.factorize(keys)
+        ranks = np.empty(len(uniques), dtype=np.int64)
+        ranks[np.argsort(uniques)] = np.arange(len(uniques))
+        packed = np.sort(ranks[codes] * max(1, self.row_count) + rows)
+        if len(packed):
+            packed = packed[np.r_[True, packed[1:] != packed[:-1]]]
+        codes, self.rows = np.divmod(packed, max(1, self.row_count))
+        starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]]) if len(codes) else np.empty(0, dtype=np.int64)
+        self.keys = np.sort(uniques)
+        self.offsets = np.append(starts, len(codes))
+
+    # Function to return the sorted rows whose folded title contains an n-gram key
+    def posting(self, key):
+        position = np.searchsorted(self.keys, key)
+        if position == len(self.keys) or self.keys[position] != key:
+            return np.empty(0, dtype=np.int64)
+        return self.rows[self.offsets[position]:self.offsets[position + 1]]
+
+    # Function to return the sorted rows whose title contains the query, searching only within `within` if given
+    def search(self, query, within=None):
+        folded = fold(query)
+        if not folded:
+            return np.arange(self.row_count) if within is None else within
+
+        postings = [self.posting(key) for key in query_keys(folded)]
+        if within is not None:
+            postings.append(within)
+        postings.sort(key=len)
+        rows = postings[0]
+        for other in postings[1:]:
+            if not len(rows):
+                break
+            rows = intersect_sorted(rows, other)
+
+        if len(folded) > 3 and len(rows):
+            # Having all the trigrams does not mean they are next to each other; check the candidates
+            rows = rows[np.fromiter((folded in title for title in self.folded[rows]), dtype=bool, count=len(rows))]
+        return rows
+
+# Keeps the results of recent queries so every keystroke narrows from the best earlier result.
+class SearchSession:
+    def __init__(self, index):
+        self.index = index
+        self._history = {}
+
+    def search(self, query):
+        folded = fold(query)
+        if folded in self._history:
+            rows = self._history.pop(folded)
+        else:
+            # The longest earlier query contained in this one holds a superset of the answer
+            base = max((earlier for earlier in self._history if earlier and earlier in folded), key=len, default=None)
+            rows = self.index.search(folded, self._history[base] if base is not None else None)
+        self._history[folded] = rows
+        if len(self._history) > HISTORY_SIZE:
+            self._history.pop(next(iter(self._history)))
+        return rows
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+import math
+import tkinter as tk
+from tkinter import ttk
+import numpy as np
+import pandas as pd
+from title_search import SearchSession, TitleIndex
+
+"""
+This is a virtual scrolling table for the top picks viewer. Inserting every title into a ttk.Treeview
+up front made the table slow to open and memory hungry once the report grew past a few thousand titles.
+The table here only ever holds one Treeview item per visible line: scrolling rewrites the values of those
+items from the underlying column arrays, with a small buffer of formatted rows around the visible window.
+Sorting by a column uses a sort order computed once per column, so clicking a heading again never sorts
+Python rows. The search box above the table filters by title through a prebuilt title index (see
+title_search.py); the filter and the sort order combine without re-sorting.
+"""
+
+# The columns shown by the viewer: (DataFrame column, heading)
+DISPLAY_COLUMNS = (
+    ('title', 'Title'),
+    ('genre', 'Genre'),
+    ('year', 'Year'),
+    ('imdb rating', 'IMDb Rating'),
+    ('available regions', 'Available Regions'),
+)
+
+# Function to format one cell for display
+def format_cell(value):
+    if value is None:
+        return 'N/A'
+    if isinstance(value, (float, np.floating)):
+        return 'N/A' if math.isnan(value) else f"{value:g}"
+    return str(value)
+
+# The model keeps the column arrays, the current row order and the formatted buffer; it has no Tk in it.
+class TableModel:
+    def __init__(self, data, columns=DISPLAY_COLUMNS, buffer_rows=20):
+        self.columns = columns
+        self.buffer_rows = buffer_rows
+        self.row_count = len(data)
+        # Missing columns show up as N/A, just like row.get(..., 'N/A') used to do.
+        self.arrays = [
+            data[name].to_numpy() if name in data.columns else np.full(self.row_count, None, dtype=object)
+            for name, _ in columns
+        ]
+        self.total_rows = self.row_count
+        self.order = np.arange(self.row_count)
+        self.sort_column = None
+        self.descending = False
+        self.query = ''
+        self._sorted = self.order
+        self._matches = None
+        self._search = None
+        self._sort_orders = {}
+        self._buffer_start = 0
+        self._buffer = []
+
+    # Function to build the title index up front (e.g. on the worker thread) instead of on the first keystroke
+    def build_search_index(self):
+        if self._search is None:
+            names = [name for name, _ in self.columns]
+            titles = self.arrays[names.index('title') if 'title' in names else 0]
+            self._search = SearchSession(TitleIndex(titles))
+        return self._search.index
+
+    # Function to show only the titles containing the query (case and accents ignored); '' shows everything
+    def search(self, query):
+        self.query = query
+        if query.strip():
+            self.build_search_index()
+            self._matches = self._search.search(query)
+        else:
+            self._matches = None
+        self.apply_order()
+        return self.row_count
+
+    # Function to combine the current sort order with the search filter (matching rows, ascending)
+    def apply_order(self):
+        order = self._sorted
+        if self._matches is not None:
+            if self.sort_column is None:
+                # Unsorted means report order, which is exactly the order of the matches
+                order = self._matches
+            else:
+                keep = np.zeros(self.total_rows, dtype=bool)
+                keep[self._matches] = True
+                order = order[keep[order]]
+        self.order = order
+        self.row_count = len(self.order)
+        self._buffer = []
+
+    # Function to compute (once) the ascending order of a column; missing values always go last
+    def sort_order(self, column):
+        cached = self._sort_orders.get(column)
+        if cached is None:
+            values = pd.Series(self.arrays[column])
+            if values.dtype == object or pd.api.types.is_string_dtype(values):
+                values = values.astype(object).where(values.notna(), None)
+                key = lambda s: s.map(lambda v: v.casefold() if isinstance(v, str) else v)
+            else:
+                key = None
+            sorted_values = values.sort_values(kind='stable', na_position='last', key=key)
+            order = sorted_values.index.to_numpy()
+            missing = int(sorted_values.isna().sum())
+            self._sort_orders[column] = cached = (order, missing)
+        return cached
+
+    # Function to sort by a column; choosing the same column again flips the direction
+    def sort_by(self, column):
+        if self.sort_column == column:
+            self.descending = not self.descending
+        else:
+            self.sort_column = column
+            self.descending = False
+
+        order, missing = self.sort_order(column)
+        if self.descending:
+            # Reverse the present values but keep the missing ones at the bottom.
+            present = order[:len(order) - missing]
+            order = np.concatenate([present[::-1], order[len(order) - missing:]])
+        self._sorted = order
+        self.apply_order()
+
+    # Function to format one row of the current order
+    def row_values(self, position):
+        row = self.order[position]
+        return tuple(format_cell(array[row]) for array in self.arrays)
+
+    # Function to return the formatted rows [start, stop), refilling the buffer only when needed
+    def window(self, start, stop):
+        buffer_stop = self._buffer_start + len(self._buffer)
+        if start < self._buffer_start or stop > buffer_stop:
+            self._buffer_start = max(0, start - self.buffer_rows)
+            end = min(self.row_count, stop + self.buffer_rows)
+            self._buffer = [self.row_values(position) for position in range(self._buffer_start, end)]
+        offset = start - self._buffer_start
+        return self._buffer[offset:offset + (stop - start)]
+
+# The widget: a Treeview with one item per visible line and a scrollbar driven by the model.
+class VirtualTable(ttk.Frame):
+    # data is either the report DataFrame or a TableModel prepared beforehand (e.g. on a worker thread)
+    def __init__(self, master, data, columns=DISPLAY_COLUMNS, visible_rows=25, buffer_rows=20):
+        super().__init__(master)
+        self.model = data if isinstance(data, TableModel) else TableModel(data, columns, buffer_rows)
+        columns = self.model.columns
+        self.first = 0
+        self.visible_rows = visible_rows
+        headings = [heading for _, heading in columns]
+
+        self.tree = ttk.Treeview(self, columns=headings, show="headings", height=visible_rows)
+        for position, heading in enumerate(headings):
+            self.tree.heading(heading, text=heading, command=lambda p=position: self.sort_by(p))
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.on_scrollbar)
+
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        self.tree.bind("<Configure>", self.on_resize)
+        self.tree.bind("<MouseWheel>", self.on_mousewheel)
+        self.tree.bind("<Button-4>", lambda event: self.scroll_by(-3))
+        self.tree.bind("<Button-5>", lambda event: self.scroll_by(3))
+        for key, step in (("<Up>", -1), ("<Down>", 1)):
+            self.tree.bind(key, lambda event, s=step: self.scroll_by(s) or "break")
+        for key, pages in (("<Prior>", -1), ("<Next>", 1)):
+            self.tree.bind(key, lambda event, p=pages: self.scroll_by(p * self.visible_rows) or "break")
+
+        self.refresh()
+
+    # Function to fit the number of Treeview items to the height of the widget
+    def on_resize(self, event):
+        row_height = int(ttk.Style().lookup("Treeview", "rowheight") or 20)
+        rows = max(1, (event.height - row_height) // row_height)  # minus the heading line
+        if rows != self.visible_rows:
+            self.visible_rows = rows
+            self.tree.configure(height=rows)
+            self.refresh()
+
+    def on_mousewheel(self, event):
+        self.scroll_by(-3 if event.delta > 0 else 3)
+
+    # Function to handle the scrollbar, which sends ('moveto', fraction) or ('scroll', n, 'units'/'pages')
+    def on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self.scroll_to(int(float(amount) * self.model.row_count))
+        elif action == "scroll":
+            step = int(amount) * (self.visible_rows if unit == "pages" else 1)
+            self.scroll_by(step)
+
+    def scroll_by(self, rows):
+        self.scroll_to(self.first + rows)
+
+    def scroll_to(self, first):
+        last_first = max(0, self.model.row_count - self.visible_rows)
+        first = min(max(0, first), last_first)
+        if first != self.first:
+            self.first = first
+            self.refresh()
+
+    def sort_by(self, column):
+        self.model.sort_by(column)
+        self.first = 0
+        self.refresh()
+
+    # Function to filter the table by title; returns how many titles match
+    def search(self, query):
+        count = self.model.search(query)
+        self.first = 0
+        self.refresh()
+        return count
+
+    # Function to rewrite the visible items from the model and update the scrollbar
+    def refresh(self):
+        stop = min(self.model.row_count, self.first + self.visible_rows)
+        rows = self.model.window(self.first, stop)
+        items = self.tree.get_children()
+
+        # Reuse the existing items and only add or delete the difference.
+        for item, values in zip(items, rows):
+            self.tree.item(item, values=values)
+        for values in rows[len(items):]:
+            self.tree.insert("", "end", values=values)
+        if len(items) > len(rows):
+            self.tree.delete(*items[len(rows):])
+
+        total = max(1, self.model.row_count)
+        self.scrollbar.set(self.first / total, stop / total)